@@ -46,6 +46,9 @@ async def main():
         print(f"数据已保存到 {os.path.join(output_dir, question_id)} 目录")
     except Exception as e:
         print(f"抓取过程中出错: {e}")
+    finally:
+        # 关闭浏览器页面池
+        await scraper.close_browser()
 
 if __name__ == "__main__":
     asyncio.run(main()) 
\ No newline at end of file
@@ -9,9 +9,11 @@ setup(
         "asyncio",
         "aiofiles",
         "beautifulsoup4",
+        "html2text",
         "python-dotenv",
     ],
     extras_require={
+        "parquet": ["pyarrow>=12.0.0"],
         "ai": ["browser-use", "langchain-openai", "langchain-deepseek", "langchain-anthropic", "langchain-google-genai"],
     },
     entry_points={
@@ -0,0 +1,174 @@
+"""
+知乎接口数据解析 - 将回答列表接口和页面初始数据中的JSON转换为回答记录
+"""
+
+import asyncio
+import json
+import re
+from zhihu_scraper.dedup import answer_key
+
+# 问题回答列表接口，新版为feeds，旧版为answers
+ANSWERS_API_PATTERN = re.compile(r"/api/v4/questions/(\d+)/(?:feeds|answers)")
+
+def answer_from_api(data, users=None):
+    """将接口中的回答对象转换为回答记录
+
+    Args:
+        data: 接口返回的回答对象（feeds接口中为target字段）
+        users: 可选的用户实体字典，用于解析只包含url_token的作者字段
+
+    Returns:
+        dict: 与页面提取结果相同结构的回答记录
+    """
+    author = data.get('author') or {}
+    if isinstance(author, str):
+        author = (users or {}).get(author, {'url_token': author})
+    url_token = author.get('url_token') or author.get('urlToken')
+    author_record = {'name': author.get('name') or '匿名用户'}
+    if url_token:
+        author_record['link'] = f"https://www.zhihu.com/people/{url_token}"
+
+    answer_id = data.get('id')
+    question = data.get('question') or {}
+    question_id = question.get('id') if isinstance(question, dict) else question
+    record = {
+        'id': str(answer_id) if answer_id is not None else None,
+        'author': author_record,
+        'content': data.get('content') or '',
+        'upvotes': data.get('voteup_count', data.get('voteupCount', 0)) or 0,
+        'comments': data.get('comment_count', data.get('commentCount', 0)) or 0,
+        'created_time': data.get('created_time', data.get('created')),
+        'updated_time': data.get('updated_time', data.get('updatedTime', data.get('updated'))),
+    }
+    if question_id and answer_id:
+        record['url'] = f"https://www.zhihu.com/question/{question_id}/answer/{answer_id}"
+    return record
+
+def parse_answers_payload(payload):
+    """解析回答列表接口的返回数据
+
+    Args:
+        payload: 接口返回的JSON对象
+
+    Returns:
+        tuple: (回答记录列表, 分页信息字典)
+    """
+    answers = []
+    for item in payload.get('data') or []:
+        # feeds接口的回答包装在target中，answers接口直接返回回答对象
+        target = item.get('target', item) if isinstance(item, dict) else None
+        if not isinstance(target, dict):
+            continue
+        if item.get('target_type', target.get('type', 'answer')) != 'answer':
+            continue
+        answers.append(answer_from_api(target))
+    return answers, payload.get('paging') or {}
+
+def parse_initial_data(initial_data, question_id):
+    """解析问题页面中js-initialData脚本的数据
+
+    页面首屏的回答由服务端渲染，不会出现在接口请求中，需要从这里读取。
+
+    Args:
+        initial_data: js-initialData的JSON对象或字符串
+        question_id: 知乎问题ID
+
+    Returns:
+        tuple: (问题信息字典, 回答记录列表)
+    """
+    if isinstance(initial_data, str):
+        initial_data = json.loads(initial_data)
+    entities = (initial_data or {}).get('initialState', {}).get('entities', {})
+    users = entities.get('users') or {}
+
+    question = (entities.get('questions') or {}).get(str(question_id)) or {}
+    question_info = {
+        'title': question.get('title'),
+        'description': question.get('detail') or question.get('excerpt') or ''
+    }
+
+    answers = []
+    for data in (entities.get('answers') or {}).values():
+        answer_question = data.get('question') or {}
+        answer_question_id = answer_question.get('id') if isinstance(answer_question, dict) else answer_question
+        if answer_question_id is not None and str(answer_question_id) != str(question_id):
+            continue
+        answers.append(answer_from_api(data, users))
+    return question_info, answers
+
+class AnswerInterceptor:
+    """回答接口响应拦截器
+
+    监听页面的response事件，捕获回答列表接口返回的JSON并直接转换为回答记录，
+    无需遍历DOM和序列化innerHTML，点赞数和评论数也是接口中的精确值。
+    """
+
+    def __init__(self, question_id, cache=None):
+        """初始化拦截器
+
+        Args:
+            question_id: 只收集该问题下的回答
+            cache: 可选的PageCache，提供时把接口响应的原始内容写入缓存
+        """
+        self.question_id = str(question_id)
+        self.cache = cache
+        self.answers = {}
+        self.paging = {}
+        self.responses = 0
+        self._pending = set()
+
+    def attach(self, page):
+        """开始监听页面的响应"""
+        page.on("response", self._on_response)
+
+    def detach(self, page):
+        """停止监听页面的响应"""
+        page.remove_listener("response", self._on_response)
+
+    def add_answers(self, answers):
+        """按回答ID合并回答记录，已存在的回答会被更新
+
+        Returns:
+            int: 新增的回答数量
+        """
+        added = 0
+        for answer in answers:
+            key = answer_key(answer)
+            if key is None:
+                continue
+            if key not in self.answers:
+                added += 1
+            self.answers[key] = answer
+        return added
+
+    def _on_response(self, response):
+        match = ANSWERS_API_PATTERN.search(response.url)
+        if not match or match.group(1) != self.question_id or response.status != 200:
+            return
+        task = asyncio.ensure_future(self._handle_response(response))
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+
+    async def _handle_response(self, response):
+        try:
+            body = await response.body()
+            if self.cache is not None:
+                await self.cache.aput(response.url, body, "answers", self.question_id)
+            payload = json.loads(body)
+        except Exception as e:
+            print(f"解析回答接口响应失败: {str(e)}")
+            return
+        answers, paging = parse_answers_payload(payload)
+        self.responses += 1
+        self.paging = paging
+        added = self.add_answers(answers)
+        print(f"拦截到回答接口响应，新增 {added} 个回答，累计 {len(self.answers)} 个")
+
+    async def wait_pending(self):
+        """等待所有正在解析的响应处理完成"""
+        if self._pending:
+            await asyncio.gather(*list(self._pending), return_exceptions=True)
+
+    def get_answers(self):
+        """返回已收集的回答记录列表"""
+        return list(self.answers.values())
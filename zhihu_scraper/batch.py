@@ -0,0 +1,88 @@
+"""
+批量爬取模块 - 在同一个浏览器中并发爬取多个问题
+"""
+
+import asyncio
+import os
+import time
+from zhihu_scraper.crawler import _scrape_http, _scrape_pooled
+from zhihu_scraper.utils import parse_question_id
+
+async def _scrape_one(self, question_id, output_dir):
+    """按爬取引擎爬取单个问题，HTTP引擎失败时回退到浏览器页面池"""
+    if self.from_cache:
+        return await self.replay_question(question_id, output_dir)
+    
+    # 增量模式按爬取引擎获取回答，需在HTTP引擎的完整爬取之前处理
+    if self.incremental:
+        return await self.incremental_update(question_id, output_dir)
+    
+    # 流式、深度爬取和断点续爬模式同样由iter_answers按爬取引擎获取回答
+    if self.stream or self.deep or self.resume:
+        return await self.stream_question(question_id, output_dir)
+    
+    if self.engine == 'http':
+        try:
+            return await _scrape_http(self, question_id, output_dir)
+        except Exception as e:
+            print(f"问题 {question_id} HTTP引擎爬取失败，回退到浏览器模式: {str(e)}")
+    
+    # 页面池在第一次需要浏览器时才启动，页面出错时换新页面重试
+    return await _scrape_pooled(self, question_id, output_dir)
+
+async def scrape_questions(self, question_ids, output_dir='output', concurrency=3, on_result=None):
+    """批量爬取多个知乎问题
+
+    所有问题共用爬虫的浏览器页面池，通过信号量控制同时爬取的问题数量，
+    单个问题失败不会影响其他问题。浏览器在返回后保持运行，需调用close_browser()释放。
+
+    Args:
+        question_ids: 知乎问题ID或URL列表
+        output_dir: 输出目录
+        concurrency: 同时爬取的问题数量，默认3
+        on_result: 可选的回调函数，每个问题完成后以(问题ID, 结果)调用
+
+    Returns:
+        dict: 问题ID到爬取结果的映射，每项包含status、answers、elapsed，失败时包含error
+    """
+    # 解析并去重问题ID，保持原有顺序
+    ids = list(dict.fromkeys(parse_question_id(str(item).strip()) for item in question_ids))
+
+    results = {}
+    if not ids:
+        return results
+
+    os.makedirs(output_dir, exist_ok=True)
+    concurrency = max(1, min(concurrency, len(ids)))
+    # 页面池尚未创建时按并发数扩大页面上限
+    if self.browser is None:
+        self.pool_size = max(self.pool_size, concurrency)
+    semaphore = asyncio.Semaphore(concurrency)
+    print(f"开始批量爬取 {len(ids)} 个问题，并发数: {concurrency}")
+
+    async def scrape_one(question_id):
+        async with semaphore:
+            start = time.time()
+            try:
+                result = await _scrape_one(self, question_id, output_dir)
+                results[question_id] = {
+                    "status": "ok",
+                    "answers": result.get("answer_count", len(result.get("answers") or [])),
+                    "elapsed": round(time.time() - start, 2)
+                }
+            except Exception as e:
+                print(f"问题 {question_id} 爬取失败: {str(e)}")
+                results[question_id] = {
+                    "status": "error",
+                    "answers": 0,
+                    "elapsed": round(time.time() - start, 2),
+                    "error": str(e)
+                }
+            print(f"进度: {len(results)}/{len(ids)} - 问题 {question_id}: {results[question_id]['status']}")
+            if on_result is not None:
+                on_result(question_id, results[question_id])
+
+    await asyncio.gather(*(scrape_one(question_id) for question_id in ids))
+
+    # 按输入顺序返回结果
+    return {question_id: results[question_id] for question_id in ids}
@@ -9,6 +9,15 @@ import asyncio
 import json
 import time
 from playwright.async_api import async_playwright
+from zhihu_scraper.api import AnswerInterceptor
+from zhihu_scraper.cache import HTML
+from zhihu_scraper.crawler import _asave_result, _extract_intercepted, expand_and_extract
+from zhihu_scraper.dedup import dedupe_answers
+from zhihu_scraper.loader import scroll_until_stable
+from zhihu_scraper.profiles import get_profile, needs_warm_up, pick_slow_mo
+from zhihu_scraper.ratelimit import get_rate_limiter
+from zhihu_scraper.retry import RetryPolicy, classify_error, navigate
+from zhihu_scraper.utils import headless_launch_options, parse_cookie_string
 
 async def _launch_browser_manually(self, question_id, output_dir='output'):
     """使用手动浏览器模式爬取知乎问题数据
@@ -19,7 +28,6 @@ async def _launch_browser_manually(self, question_id, output_dir='output'):
     
     print("启动手动浏览器模式...")
     question_url = f"https://www.zhihu.com/question/{question_id}"
-    output_file = os.path.join(output_dir, f"zhihu_question_{question_id}.json")
     
     # 确保输出目录存在
     os.makedirs(output_dir, exist_ok=True)
@@ -32,18 +40,14 @@ async def _launch_browser_manually(self, question_id, output_dir='output'):
     # 解析cookie为字典形式
     cookies = []
     if self.zhihu_cookie:
-        cookie_parts = self.zhihu_cookie.split(';')
-        for part in cookie_parts:
-            if '=' in part:
-                name, value = part.strip().split('=', 1)
-                if name and value:
-                    for domain in [".zhihu.com", "www.zhihu.com", "zhihu.com"]:
-                        cookies.append({
-                            "name": name,
-                            "value": value,
-                            "domain": domain,
-                            "path": "/"
-                        })
+        for name, value in parse_cookie_string(self.zhihu_cookie).items():
+            for domain in [".zhihu.com", "www.zhihu.com", "zhihu.com"]:
+                cookies.append({
+                    "name": name,
+                    "value": value,
+                    "domain": domain,
+                    "path": "/"
+                })
     
         # 确保至少添加z_c0和SESSIONID cookie（知乎的主要身份验证cookie）
         # 处理z_c0
@@ -318,6 +322,13 @@ async def _launch_browser_manually(self, question_id, output_dir='output'):
         print("未找到持久化配置目录，使用临时浏览器上下文")
         use_persistent_context = False
     
+    # 爬取配置档：控制首页预热、模拟人类行为和slow_mo
+    profile = getattr(self, 'profile', None) or get_profile()
+    print(f"使用配置档: {profile['name']}")
+    headless = getattr(self, 'headless', False)
+    if headless:
+        print("使用无头模式启动浏览器")
+    
     # 自定义浏览器启动参数，模拟真实Chromium浏览器
     async with async_playwright() as p:
         try:
@@ -329,9 +340,8 @@ async def _launch_browser_manually(self, question_id, output_dir='output'):
                 # 直接使用持久化上下文启动，保留所有cookie和存储
                 context = await p.chromium.launch_persistent_context(
                     user_data_dir=user_data_dir,
-                    headless=False,
-                    slow_mo=50 + random.randint(0, 100),
-                    args=browser_args,
+                    slow_mo=pick_slow_mo(profile),
+                    **headless_launch_options(headless, browser_args),
                     viewport={"width": width, "height": height},
                     user_agent=selected_ua,
                     locale="zh-CN",
@@ -358,9 +368,8 @@ async def _launch_browser_manually(self, question_id, output_dir='output'):
                 # 非持久化模式，标准浏览器启动
                 print("使用非持久化浏览器模式...")
                 browser = await p.chromium.launch(
-                    headless=False,
-                    slow_mo=100 + random.randint(0, 150),
-                    args=browser_args
+                    slow_mo=pick_slow_mo(profile),
+                    **headless_launch_options(headless, browser_args)
                 )
                 
                 # 创建上下文，更完整的浏览器环境配置
@@ -391,9 +400,29 @@ async def _launch_browser_manually(self, question_id, output_dir='output'):
                     await context.add_cookies(cookies)
                     print("非持久化模式：应用临时cookie")
             
+            # 拦截不需要的资源请求
+            if getattr(self, 'resource_filter', None) is not None:
+                await self.resource_filter.install(context)
+            
+            # 请求节奏由进程内共享的限速器控制，被限流时自动降速
+            rate_limiter = getattr(self, 'rate_limiter', None) or get_rate_limiter()
+            retry_policy = getattr(self, 'retry_policy', None) or RetryPolicy()
+            context.on("response", rate_limiter.observe_response)
+            
             # 创建新页面
             page = await context.new_page()
             
+            # 网络拦截模式：从回答接口的JSON响应和页面初始数据中获取回答（页面随浏览器一起关闭，无需卸载）
+            # 启用页面缓存时同样监听接口响应，把原始JSON写入缓存
+            intercept = getattr(self, 'intercept', False)
+            cache = self.get_page_cache()
+            interceptor = None
+            if intercept or cache is not None:
+                interceptor = AnswerInterceptor(question_id, cache=cache)
+                interceptor.attach(page)
+            if cache is not None:
+                cache.begin(question_id)
+            
             # 注入JS脚本来模拟真实浏览器环境，隐藏自动化特征
             await page.add_init_script(anti_detection_js)
             
@@ -425,62 +454,75 @@ async def _launch_browser_manually(self, question_id, output_dir='output'):
                 # 随机的短暂停顿
                 await asyncio.sleep(1 + random.random() * 3)
             
-            # 先访问知乎首页，模拟正常浏览路径
+            # 先访问知乎首页，模拟正常浏览路径（已登录的上下文按配置档直接访问问题页面）
             try:
-                # 先访问知乎主页，然后再去问题页面，更符合正常用户行为
-                print("先访问知乎首页...")
-                await page.goto("https://www.zhihu.com", wait_until="domcontentloaded")
-                await asyncio.sleep(2 + random.random() * 3)
-                
-                # 模拟人类行为
-                await simulate_human_behavior(page)
-                
-                # 随机等待一段时间
-                wait_time = 2 + random.random() * 3
-                print(f"等待 {wait_time:.2f} 秒...")
-                await asyncio.sleep(wait_time)
+                if await needs_warm_up(profile, context):
+                    # 先访问知乎主页，然后再去问题页面，更符合正常用户行为
+                    print("先访问知乎首页...")
+                    try:
+                        await navigate(page, "https://www.zhihu.com", rate_limiter, retry_policy, wait_until="domcontentloaded")
+                        
+                        # 模拟人类行为
+                        if profile["human_behavior"] >= 2:
+                            await simulate_human_behavior(page)
+                    except Exception as e:
+                        # 首页只用于模拟浏览路径，打不开时直接访问问题页面
+                        print(f"访问知乎首页失败，直接打开问题页面: {str(e)}")
                 
-                # 再访问问题页面
+                # 再访问问题页面，两次访问之间的间隔由限速器决定
                 print(f"正在打开问题页面: {question_url}")
-                await page.goto(question_url, wait_until="domcontentloaded")
+                await navigate(page, question_url, rate_limiter, retry_policy, wait_until="domcontentloaded")
                 
-                # 等待页面加载完成
-                await asyncio.sleep(2 + random.random() * 3)
+                # 等待问题内容出现
+                try:
+                    await page.wait_for_selector(
+                        ".QuestionHeader-title, .AnswerItem",
+                        timeout=retry_policy.timeout("wait") * 1000
+                    )
+                except Exception:
+                    print("等待问题内容超时，继续尝试加载回答")
                 
                 # 模拟人类浏览行为
-                await simulate_human_behavior(page)
+                if profile["human_behavior"] >= 1:
+                    await simulate_human_behavior(page)
                 
-                # 收集回答数据
-                question_title = await page.title()
-                print(f"问题标题: {question_title}")
+                # 滚动加载更多回答，直到回答数量不再增长
+                await scroll_until_stable(
+                    page,
+                    target_count=getattr(self, 'target_answers', None),
+                    max_time=getattr(self, 'scroll_timeout', 60)
+                )
                 
-                # 滚动加载更多回答
-                for i in range(random.randint(4, 8)):
-                    # 随机滚动距离
-                    scroll_distance = random.randint(800, 1500)
-                    await page.evaluate(f"window.scrollBy(0, {scroll_distance})")
-                    
-                    # 随机等待加载
-                    await asyncio.sleep(1 + random.random() * 2)
-                    
-                    # 尝试点击展开回答
-                    expand_buttons = await page.query_selector_all("button.ContentItem-expandButton")
-                    if expand_buttons and random.random() > 0.3:  # 70%概率点击展开
-                        button_to_click = random.choice(expand_buttons)
-                        try:
-                            await button_to_click.click()
-                            await asyncio.sleep(0.5 + random.random() * 1)
-                        except:
-                            pass
+                if intercept:
+                    # 接口数据中已包含完整回答内容，无需展开和遍历DOM
+                    result = await _extract_intercepted(page, interceptor, question_id, retry_policy)
+                else:
+                    # 在一次页面调用中展开全部回答并提取为普通的回答记录
+                    result = await expand_and_extract(page, retry_policy)
+                if cache is not None:
+                    # 保存加载完成后的页面HTML，供离线重新解析
+                    await interceptor.wait_pending()
+                    await cache.aput(question_url, await page.content(), HTML, question_id)
+                print(f"问题标题: {result.get('title')}")
+                answers = dedupe_answers(result['answers'])
+                print(f"找到 {len(answers)} 个回答")
                 
-                # 收集页面上的回答元素
-                answer_elements = await page.query_selector_all(".AnswerItem")
-                print(f"找到 {len(answer_elements)} 个回答")
-                answers = answer_elements
+                max_answers = getattr(self, 'max_answers', None)
+                if max_answers:
+                    answers = answers[:max_answers]
+                result['answers'] = answers
+                if getattr(self, 'comments', False):
+                    await self.crawl_comments(question_id, answers, output_dir, page=page)
+                await _asave_result(
+                    result, question_id, output_dir,
+                    sink=getattr(self, 'sink', None), converter=getattr(self, 'markdown_converter', None),
+                    media=getattr(self, 'media_downloader', None)
+                )
                 
             except Exception as e:
-                print(f"浏览过程中发生错误: {str(e)}")
-                answers = []
+                # 不再返回空结果掩盖错误，由调用方决定是否重试或跳过该问题
+                print(f"浏览过程中发生错误（{classify_error(e)}）: {str(e)}")
+                raise
                 
         finally:
             # 确保关闭浏览器
@@ -0,0 +1,359 @@
+"""
+页面缓存 - 按内容寻址的压缩磁盘缓存，保存原始HTML和接口JSON，用于离线重新解析
+"""
+
+import asyncio
+import gzip
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+from zhihu_scraper.api import ANSWERS_API_PATTERN, parse_answers_payload
+from zhihu_scraper.dedup import dedupe_answers
+from zhihu_scraper.utils import write_atomic
+
+# 缓存条目类型
+HTML = "html"
+ANSWERS = "answers"
+INFO = "info"
+
+# 每写入多少个条目检查一次缓存大小
+EVICT_CHECK_INTERVAL = 50
+
+# 从接口或页面URL中提取问题ID
+QUESTION_URL_PATTERN = re.compile(r"questions?/(\d+)")
+
+# 问题页面中服务端渲染的初始数据
+INITIAL_DATA_PATTERN = re.compile(r'<script id="js-initialData"[^>]*>(.*?)</script>', re.S)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    url TEXT PRIMARY KEY,
+    digest TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    stored_at REAL NOT NULL,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_lru ON entries (accessed_at);
+CREATE INDEX IF NOT EXISTS entries_digest ON entries (digest);
+CREATE TABLE IF NOT EXISTS manifest (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    question_id TEXT NOT NULL,
+    url TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    UNIQUE (question_id, url)
+);
+"""
+
+class CacheMiss(Exception):
+    """缓存中没有问题所需的数据"""
+
+def question_id_from_url(url):
+    """从页面或接口URL中提取问题ID，无法识别时返回None"""
+    match = QUESTION_URL_PATTERN.search(url or "")
+    return match.group(1) if match else None
+
+class PageCache:
+    """按内容寻址的页面缓存
+
+    内容以gzip压缩后按SHA-256存放在 <root>/objects/<前两位>/<摘要>.gz，
+    相同内容只保存一份；SQLite索引记录URL到内容摘要的映射和访问时间，
+    以及每个问题由哪些页面和接口响应组成（清单），用于离线回放。
+    超过TTL的条目视为不存在，总大小超过上限时按最近最少使用淘汰。
+    """
+
+    def __init__(self, root='output/.cache', ttl=30 * 86400, max_bytes=1024 ** 3):
+        """打开（必要时创建）缓存目录
+
+        Args:
+            root: 缓存目录，默认output/.cache
+            ttl: 条目的有效期（秒），None表示永不过期，默认30天
+            max_bytes: 压缩后的总大小上限（字节），None表示不限制，默认1GB
+        """
+        self.root = root
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        os.makedirs(os.path.join(root, "objects"), exist_ok=True)
+        self._lock = threading.Lock()
+        self._puts = 0
+        # 页面和接口响应在后台线程中写入，连接需要允许跨线程使用
+        self.conn = sqlite3.connect(
+            os.path.join(root, "index.db"), timeout=30, isolation_level=None, check_same_thread=False
+        )
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+
+    def _object_path(self, digest):
+        return os.path.join(self.root, "objects", digest[:2], digest + ".gz")
+
+    def _expired(self, stored_at, now=None):
+        return self.ttl is not None and stored_at + self.ttl < (now or time.time())
+
+    def begin(self, question_id):
+        """开始重新爬取问题，清空该问题的清单（缓存内容保留，由LRU淘汰）"""
+        with self._lock:
+            self.conn.execute("DELETE FROM manifest WHERE question_id = ?", (str(question_id),))
+
+    def put(self, url, body, kind, question_id=None):
+        """保存一个页面或接口响应
+
+        Args:
+            url: 页面或接口的完整URL（包含查询参数）
+            body: 原始内容（str或bytes）
+            kind: 条目类型（html、answers、info）
+            question_id: 可选的问题ID，提供时把条目加入该问题的清单
+
+        Returns:
+            str: 内容的SHA-256摘要
+        """
+        if isinstance(body, str):
+            body = body.encode("utf-8")
+        digest = hashlib.sha256(body).hexdigest()
+        path = self._object_path(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            write_atomic(path, gzip.compress(body, compresslevel=6))
+        size = os.path.getsize(path)
+
+        now = time.time()
+        with self._lock:
+            self.conn.execute(
+                "INSERT INTO entries (url, digest, kind, size, stored_at, accessed_at) VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(url) DO UPDATE SET digest = excluded.digest, kind = excluded.kind, "
+                "size = excluded.size, stored_at = excluded.stored_at, accessed_at = excluded.accessed_at",
+                (url, digest, kind, size, now, now)
+            )
+            if question_id is not None:
+                self.conn.execute(
+                    "INSERT OR IGNORE INTO manifest (question_id, url, kind) VALUES (?, ?, ?)",
+                    (str(question_id), url, kind)
+                )
+            self._puts += 1
+            check = self._puts % EVICT_CHECK_INTERVAL == 0
+        if check:
+            self.evict()
+        return digest
+
+    async def aput(self, url, body, kind, question_id=None):
+        """在后台线程中保存条目，不阻塞事件循环，参数与put()相同"""
+        return await asyncio.to_thread(self.put, url, body, kind, question_id)
+
+    def get(self, url):
+        """读取缓存的内容
+
+        Returns:
+            bytes: 原始内容，未缓存、已过期或文件丢失时返回None
+        """
+        with self._lock:
+            row = self.conn.execute("SELECT digest, stored_at FROM entries WHERE url = ?", (url,)).fetchone()
+            if row is None:
+                return None
+            digest, stored_at = row
+            if self._expired(stored_at):
+                return None
+            self.conn.execute("UPDATE entries SET accessed_at = ? WHERE url = ?", (time.time(), url))
+        try:
+            with open(self._object_path(digest), "rb") as f:
+                return gzip.decompress(f.read())
+        except (OSError, EOFError):
+            return None
+
+    def get_json(self, url):
+        """读取缓存的JSON内容，未命中时返回None"""
+        body = self.get(url)
+        return json.loads(body) if body is not None else None
+
+    def manifest(self, question_id):
+        """问题的缓存清单
+
+        Returns:
+            list: (url, kind)元组列表，按写入顺序排列
+        """
+        with self._lock:
+            return self.conn.execute(
+                "SELECT url, kind FROM manifest WHERE question_id = ? ORDER BY seq", (str(question_id),)
+            ).fetchall()
+
+    def questions(self):
+        """缓存清单中的全部问题ID，按首次写入顺序排列"""
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT question_id FROM manifest GROUP BY question_id ORDER BY MIN(seq)"
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def snapshot_files(self, question_id):
+        """问题清单中未过期条目的内容文件，供其他进程直接读取
+
+        Returns:
+            list: (url, kind, 内容文件路径)元组列表，按写入顺序排列
+        """
+        now = time.time()
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT m.url, m.kind, e.digest, e.stored_at FROM manifest m JOIN entries e ON e.url = m.url "
+                "WHERE m.question_id = ? ORDER BY m.seq", (str(question_id),)
+            ).fetchall()
+        return [
+            (url, kind, self._object_path(digest))
+            for url, kind, digest, stored_at in rows
+            if not self._expired(stored_at, now)
+        ]
+
+    def total_size(self):
+        """缓存内容压缩后的总大小（字节），相同内容只计算一次"""
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT COALESCE(SUM(size), 0) FROM (SELECT MAX(size) AS size FROM entries GROUP BY digest)"
+            ).fetchone()
+        return row[0]
+
+    def _remove_entries(self, urls):
+        """删除索引条目，并删除不再被引用的内容文件"""
+        for url in urls:
+            row = self.conn.execute("SELECT digest FROM entries WHERE url = ?", (url,)).fetchone()
+            if row is None:
+                continue
+            self.conn.execute("DELETE FROM entries WHERE url = ?", (url,))
+            self.conn.execute("DELETE FROM manifest WHERE url = ?", (url,))
+            if self.conn.execute("SELECT 1 FROM entries WHERE digest = ? LIMIT 1", (row[0],)).fetchone() is None:
+                try:
+                    os.remove(self._object_path(row[0]))
+                except OSError:
+                    pass
+
+    def evict(self):
+        """删除过期条目，总大小超过上限时按最近最少使用淘汰到上限的90%
+
+        Returns:
+            int: 删除的条目数量
+        """
+        removed = 0
+        with self._lock:
+            if self.ttl is not None:
+                expired = [row[0] for row in self.conn.execute(
+                    "SELECT url FROM entries WHERE stored_at < ?", (time.time() - self.ttl,)
+                )]
+                self._remove_entries(expired)
+                removed += len(expired)
+        if self.max_bytes is None:
+            return removed
+
+        total = self.total_size()
+        if total <= self.max_bytes:
+            return removed
+        target = self.max_bytes * 0.9
+        with self._lock:
+            rows = self.conn.execute("SELECT url, size FROM entries ORDER BY accessed_at").fetchall()
+            victims = []
+            for url, size in rows:
+                if total <= target:
+                    break
+                victims.append(url)
+                total -= size
+            self._remove_entries(victims)
+        removed += len(victims)
+        print(f"页面缓存超过 {self.max_bytes // (1024 * 1024)}MB，已淘汰 {removed} 个条目")
+        return removed
+
+    def close(self):
+        """关闭索引数据库"""
+        self.conn.close()
+
+def extract_initial_data(html):
+    """从问题页面HTML中提取js-initialData的JSON字符串，没有时返回None"""
+    match = INITIAL_DATA_PATTERN.search(html or "")
+    return match.group(1) if match else None
+
+def load_cached_question(cache, question_id):
+    """从缓存中重建问题的爬取结果，不访问网络也不启动浏览器
+
+    页面HTML按离线解析的规则提取DOM中的回答和js-initialData中的首屏回答以及问题信息，
+    回答接口的JSON提供后续加载的回答；同一个回答同时出现在两者中时使用接口中的数据。
+
+    Args:
+        cache: PageCache实例
+        question_id: 知乎问题ID
+
+    Returns:
+        dict: 与在线爬取结构相同的爬取结果
+    """
+    # parser模块依赖本模块，在函数内导入
+    from zhihu_scraper.parser import parse_question_html
+
+    entries = cache.manifest(question_id)
+    if not entries:
+        raise CacheMiss(f"缓存中没有问题 {question_id} 的数据")
+
+    question_info = {}
+    page_answers = []
+    api_answers = []
+    used = 0
+    for url, kind in entries:
+        body = cache.get(url)
+        if body is None:
+            continue
+        used += 1
+        if kind == HTML:
+            parsed = parse_question_html(body.decode("utf-8", errors="replace"), str(question_id))
+            info = {'title': parsed['title'], 'description': parsed['description']}
+            question_info = {key: value for key, value in info.items() if value} | question_info
+            page_answers.extend(parsed['answers'])
+        elif kind == INFO:
+            data = json.loads(body)
+            question_info['title'] = data.get('title') or question_info.get('title')
+            question_info['description'] = data.get('detail') or question_info.get('description', '')
+        elif kind == ANSWERS:
+            answers, _ = parse_answers_payload(json.loads(body))
+            api_answers.extend(answers)
+    if not used:
+        raise CacheMiss(f"问题 {question_id} 的缓存已过期或被淘汰")
+
+    return {
+        "title": question_info.get('title'),
+        "description": question_info.get('description', ''),
+        "answers": [
+            answer for answer in dedupe_answers(page_answers + api_answers, keep='last') if answer.get('content')
+        ],
+        "meta": {
+            "crawl_time": datetime.now(timezone.utc).isoformat(),
+            "question_id": str(question_id),
+            "url": f"https://www.zhihu.com/question/{question_id}",
+            "source": "cache"
+        }
+    }
+
+async def replay_question(self, question_id, output_dir='output'):
+    """从页面缓存离线重建问题并重新导出
+
+    Args:
+        question_id: 知乎问题ID
+        output_dir: 输出目录
+
+    Returns:
+        dict: 爬取结果
+    """
+    from zhihu_scraper.crawler import _asave_result
+
+    cache = self.get_page_cache()
+    result = load_cached_question(cache, question_id)
+    max_answers = getattr(self, 'max_answers', None)
+    if max_answers:
+        result['answers'] = result['answers'][:max_answers]
+    print(f"从缓存中重建问题 {question_id}，共 {len(result['answers'])} 个回答")
+    await _asave_result(
+        result, question_id, output_dir,
+        sink=getattr(self, 'sink', None), converter=getattr(self, 'markdown_converter', None),
+        media=getattr(self, 'media_downloader', None)
+    )
+    return result
+
+def cache_kind(url):
+    """根据接口URL判断缓存条目类型"""
+    return ANSWERS if ANSWERS_API_PATTERN.search(url) else INFO
@@ -0,0 +1,110 @@
+"""
+断点续爬模块 - 记录每个问题的爬取进度，中断后可以从断点继续
+"""
+
+import asyncio
+import json
+import os
+from datetime import datetime
+from zhihu_scraper.utils import write_atomic
+
+class Checkpoint:
+    """单个问题的爬取断点
+
+    保存在 output/<问题ID>/checkpoint.json，记录接口分页游标、已获取回答的去重键
+    （回答ID，没有ID时为内容哈希，见dedup.answer_key）和已写入的回答数量。
+    """
+
+    FILE_NAME = "checkpoint.json"
+
+    def __init__(self, question_id, output_dir='output'):
+        """初始化空断点
+
+        Args:
+            question_id: 知乎问题ID
+            output_dir: 输出目录
+        """
+        self.question_id = str(question_id)
+        self.path = os.path.join(output_dir, self.question_id, self.FILE_NAME)
+        self.cursor = None
+        self.seen_ids = set()
+        self.offset = 0
+        self.completed = False
+        self.updated_at = None
+
+    @classmethod
+    def load(cls, question_id, output_dir='output'):
+        """读取断点文件，不存在或损坏时返回空断点
+
+        Returns:
+            Checkpoint: 断点对象
+        """
+        checkpoint = cls(question_id, output_dir)
+        if not os.path.exists(checkpoint.path):
+            return checkpoint
+        try:
+            with open(checkpoint.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"读取断点文件失败，将重新开始爬取: {str(e)}")
+            return checkpoint
+        checkpoint.cursor = data.get('cursor')
+        checkpoint.seen_ids = set(data.get('seen_ids') or [])
+        checkpoint.offset = data.get('offset', 0)
+        checkpoint.completed = data.get('completed', False)
+        checkpoint.updated_at = data.get('updated_at')
+        return checkpoint
+
+    @property
+    def resumable(self):
+        """是否存在未完成的进度"""
+        return not self.completed and (self.offset > 0 or self.cursor is not None)
+
+    def record(self, key):
+        """记录一个已写入的回答
+
+        Args:
+            key: 回答的去重键（dedup.answer_key的返回值）
+        """
+        if key:
+            self.seen_ids.add(key)
+        self.offset += 1
+
+    def save(self, completed=None):
+        """写入断点文件，先写临时文件再替换，避免中断时文件损坏
+
+        Args:
+            completed: 可选，标记问题是否已经爬取完成
+        """
+        self._write(self._snapshot(completed))
+
+    async def asave(self, completed=None):
+        """在线程池中写入断点文件，去重键较多时序列化不阻塞事件循环，参数与save()相同"""
+        await asyncio.to_thread(self._write, self._snapshot(completed))
+
+    def _snapshot(self, completed=None):
+        """复制当前进度，之后的序列化和写入可以在其他线程中进行"""
+        if completed is not None:
+            self.completed = completed
+        self.updated_at = datetime.now().isoformat()
+        return {
+            'question_id': self.question_id,
+            'cursor': self.cursor,
+            'offset': self.offset,
+            'completed': self.completed,
+            'updated_at': self.updated_at,
+            'seen_ids': list(self.seen_ids)
+        }
+
+    def _write(self, data):
+        """序列化并原子地写入断点文件"""
+        data['seen_ids'].sort()
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        write_atomic(self.path, json.dumps(data, ensure_ascii=False))
+
+    def reset(self):
+        """清空进度，重新开始爬取"""
+        self.cursor = None
+        self.seen_ids = set()
+        self.offset = 0
+        self.completed = False
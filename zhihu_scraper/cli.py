@@ -6,6 +6,123 @@ import os
 import asyncio
 import argparse
 from zhihu_scraper import ZhihuBrowserScraper
+from zhihu_scraper.utils import get_timestamp, save_json
+from zhihu_scraper.workers import scrape_sharded
+from zhihu_scraper.frontier import JobQueue
+from zhihu_scraper.parser import reparse_snapshots
+from zhihu_scraper.columnar import ParquetSink
+from zhihu_scraper.convert import MarkdownConverter
+
+def scraper_options(args):
+    """从命令行参数中收集爬虫的构造参数（scrape和batch子命令共用）
+    
+    Args:
+        args: 命令行参数
+    
+    Returns:
+        dict: ZhihuBrowserScraper的关键字参数
+    """
+    return dict(
+        zhihu_cookie=args.cookie,
+        user_data_dir=args.user_data_dir,
+        intercept=args.intercept,
+        engine=args.engine,
+        lean=args.lean,
+        allow_patterns=args.allow,
+        target_answers=args.target_answers,
+        scroll_timeout=args.scroll_timeout,
+        stream=args.stream,
+        deep=args.deep,
+        max_answers=args.max_answers,
+        resume=args.resume,
+        incremental=args.incremental,
+        rate_limit=args.rate,
+        max_rate=args.max_rate,
+        retries=args.retries,
+        step_timeouts=parse_step_timeouts(args.step_timeout),
+        profile=args.profile,
+        headless=args.headless,
+        cache=args.cache,
+        from_cache=args.from_cache,
+        cache_dir=os.path.join(args.output, '.cache'),
+        cache_ttl=args.cache_ttl * 86400 if args.cache_ttl is not None else None,
+        cache_max_bytes=int(args.cache_size * 1024 * 1024) if args.cache_size is not None else None,
+        parquet_dir=args.parquet,
+        parquet_partition=args.parquet_partition,
+        comments=args.comments,
+        max_comments=args.max_comments,
+        max_replies=args.max_replies,
+        comment_concurrency=args.comment_concurrency,
+        comments_output=args.comments_output,
+        markdown=not args.raw_html,
+        markdown_workers=args.markdown_workers,
+        media=args.media,
+        media_dir=os.path.join(args.output, 'media'),
+        media_max_bytes=int(args.media_budget * 1024 * 1024) if args.media_budget else None,
+        media_per_host=args.media_per_host
+    )
+
+def parse_step_timeouts(items):
+    """解析--step-timeout参数
+    
+    Args:
+        items: STEP=SECONDS格式的字符串列表
+    
+    Returns:
+        dict: 步骤名称到超时时间（秒）的映射
+    """
+    timeouts = {}
+    for item in items or []:
+        step, sep, seconds = item.partition('=')
+        if not sep:
+            raise ValueError(f"无法解析步骤超时 '{item}'，格式应为STEP=SECONDS，例如navigate=60")
+        timeouts[step.strip()] = float(seconds)
+    return timeouts
+
+def add_crawl_arguments(parser):
+    """添加scrape和batch子命令共用的爬取参数
+    
+    Args:
+        parser: 子命令的参数解析器
+    """
+    parser.add_argument('--output', type=str, default='output', help='输出目录，默认为output')
+    parser.add_argument('--cookie', type=str, help='知乎Cookie（可选，用于获取登录后才能看到的内容）')
+    parser.add_argument('--user-data-dir', type=str, default=None, help='浏览器数据存储目录，默认为~/zhihu-browser-profile')
+    parser.add_argument('--intercept', action='store_true', help='网络拦截模式：从回答接口的JSON响应中获取回答，不遍历页面DOM')
+    parser.add_argument('--engine', choices=['browser', 'http'], default='browser', help='爬取引擎：browser使用浏览器，http直接请求接口（失败时回退到浏览器），默认browser')
+    parser.add_argument('--lean', action='store_true', help='拦截图片、字体、媒体和第三方脚本，减少流量并加快页面加载')
+    parser.add_argument('--allow', type=str, action='append', default=None, help='启用--lean时始终放行的URL通配符模式，可多次指定')
+    parser.add_argument('--target-answers', type=int, default=None, help='目标回答数量，页面加载到该数量后停止滚动，默认加载到底')
+    parser.add_argument('--scroll-timeout', type=float, default=60, help='单个问题滚动加载的最长时间（秒），默认60')
+    parser.add_argument('--stream', action='store_true', help='流式爬取：回答边加载边追加写入output/<问题ID>/answers.jsonl和answers.md')
+    parser.add_argument('--deep', action='store_true', help='深度爬取全部回答：流式写入磁盘，不限制滚动时间，HTTP引擎按游标分页')
+    parser.add_argument('--max-answers', type=int, default=None, help='每个问题最多获取的回答数量，默认不限制')
+    parser.add_argument('--resume', action='store_true', help='从上次中断的断点继续爬取（使用流式写入），已完成的问题直接跳过')
+    parser.add_argument('--incremental', action='store_true', help='增量爬取：只获取新增或更新过的回答，合并到上次的zhihu_question_<ID>.json中')
+    parser.add_argument('--rate', type=float, default=None, help='每个主机的初始请求速率（次/秒），之后根据限流和响应时间自动调整，默认2')
+    parser.add_argument('--max-rate', type=float, default=None, help='每个主机自动提速的上限（次/秒），默认10')
+    parser.add_argument('--profile', choices=['fast', 'balanced', 'cautious'], default='balanced', help='爬取配置档：fast跳过首页预热和人类行为模拟且不使用slow_mo，cautious每次访问首页并完整模拟，默认balanced')
+    headless_group = parser.add_mutually_exclusive_group()
+    headless_group.add_argument('--headless', dest='headless', action='store_true', default=None, help='使用无头模式启动浏览器（未设置DISPLAY时默认启用）')
+    headless_group.add_argument('--headed', dest='headless', action='store_false', help='显示浏览器窗口')
+    parser.add_argument('--cache', action='store_true', help='把原始页面HTML和回答接口JSON压缩保存到<输出目录>/.cache，用于离线重新解析')
+    parser.add_argument('--from-cache', action='store_true', help='只从页面缓存离线重建结果，不访问网络、不启动浏览器')
+    parser.add_argument('--cache-ttl', type=float, default=None, help='页面缓存的有效期（天），默认30')
+    parser.add_argument('--cache-size', type=float, default=None, help='页面缓存的大小上限（MB），超过后按最近最少使用淘汰，默认1024')
+    parser.add_argument('--parquet', type=str, default=None, help='把回答同时追加写入该目录下的Parquet数据集（需要pyarrow）')
+    parser.add_argument('--parquet-partition', choices=['date', 'question'], default='date', help='Parquet数据集的分区方式：date按爬取日期，question按问题ID，默认date')
+    parser.add_argument('--comments', action='store_true', help='同时爬取每个回答的根评论和子评论')
+    parser.add_argument('--max-comments', type=int, default=None, help='每个回答最多获取的根评论数量，默认不限制')
+    parser.add_argument('--max-replies', type=int, default=None, help='每条根评论最多获取的子评论数量，0表示只保留根评论附带的子评论，默认不限制')
+    parser.add_argument('--comment-concurrency', type=int, default=4, help='同时请求评论接口的数量，默认4')
+    parser.add_argument('--comments-output', choices=['attach', 'stream'], default='attach', help='评论输出方式：attach附加到回答的comment_list字段，stream写入<问题ID>/comments.jsonl，默认attach')
+    parser.add_argument('--raw-html', action='store_true', help='Markdown文件中保留回答的原始HTML，不转换为Markdown')
+    parser.add_argument('--markdown-workers', type=int, default=None, help='Markdown转换进程数，默认为CPU核数（最多4个）')
+    parser.add_argument('--media', action='store_true', help='下载回答中的图片和视频封面到<输出目录>/media（按内容哈希去重），Markdown中的链接改为本地路径')
+    parser.add_argument('--media-budget', type=float, default=None, help='媒体目录的总大小上限（MB），达到后不再下载新文件，默认不限制')
+    parser.add_argument('--media-per-host', type=int, default=4, help='每个主机同时进行的媒体下载数量，默认4')
+    parser.add_argument('--retries', type=int, default=3, help='导航、提取等单个步骤最多尝试的次数，默认3')
+    parser.add_argument('--step-timeout', type=str, action='append', default=None, help='单个步骤的超时时间，格式STEP=SECONDS（步骤: navigate、wait、extract、fetch），可多次指定')
 
 def scrape_command(args):
     """爬取问题的子命令"""
@@ -13,12 +130,130 @@ def scrape_command(args):
     scraper = ZhihuBrowserScraper(
         api_key=args.api_key,
         model_name=args.model,
-        zhihu_cookie=args.cookie,
-        user_data_dir=args.user_data_dir
+        **scraper_options(args)
     )
     
+    async def run():
+        # 爬取结束后关闭浏览器页面池
+        async with scraper:
+            return await scraper.scrape_question(args.question_id, args.output, args.manual)
+    
     # 运行爬虫
-    asyncio.run(scraper.scrape_question(args.question_id, args.output, args.manual))
+    asyncio.run(run())
+
+def read_question_ids(args):
+    """从命令行参数和ID文件中收集问题ID
+    
+    Args:
+        args: 命令行参数，包含question_ids和file
+    
+    Returns:
+        list: 问题ID或URL列表
+    """
+    question_ids = list(args.question_ids or [])
+    if args.file:
+        with open(args.file, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                # 跳过空行和注释
+                if line and not line.startswith('#'):
+                    question_ids.append(line)
+    return question_ids
+
+def batch_command(args):
+    """批量爬取问题的子命令"""
+    question_ids = read_question_ids(args)
+    if not question_ids:
+        print("未提供任何问题ID，请通过参数或--file指定")
+        return
+    
+    if args.workers > 1:
+        # 多进程模式：按进程分片，每个进程使用独立的浏览器配置目录副本
+        results = scrape_sharded(
+            question_ids, args.workers, args.output,
+            concurrency=args.concurrency,
+            scraper_options=scraper_options(args)
+        )
+    else:
+        scraper = ZhihuBrowserScraper(**scraper_options(args))
+        
+        async def run():
+            async with scraper:
+                return await scraper.scrape_questions(question_ids, args.output, concurrency=args.concurrency)
+        
+        results = asyncio.run(run())
+    
+    # 输出每个问题的结果
+    succeeded = sum(1 for r in results.values() if r["status"] == "ok")
+    print("=" * 60)
+    for question_id, r in results.items():
+        if r["status"] == "ok":
+            print(f"{question_id}: 成功，{r['answers']} 个回答，耗时 {r['elapsed']} 秒")
+        else:
+            print(f"{question_id}: 失败，{r.get('error')}")
+    print(f"完成: {succeeded}/{len(results)} 个问题爬取成功")
+    print("=" * 60)
+    
+    # 保存批量爬取报告
+    report_file = os.path.join(args.output, f"batch_report_{get_timestamp()}.json")
+    save_json(results, report_file)
+    print(f"批量爬取报告已保存到: {report_file}")
+
+def queue_path(args):
+    """队列数据库路径，未指定时使用输出目录下的queue.db"""
+    return args.queue or os.path.join(args.output, 'queue.db')
+
+def enqueue_command(args):
+    """把问题加入持久化队列的子命令"""
+    question_ids = read_question_ids(args)
+    job_queue = JobQueue(queue_path(args))
+    try:
+        count = job_queue.enqueue(question_ids, priority=args.priority, requeue=args.requeue)
+        print(f"已加入 {count} 个问题到队列 {job_queue.path}")
+        print(f"队列状态: {job_queue.stats()}")
+    finally:
+        job_queue.close()
+
+def worker_command(args):
+    """从持久化队列中取问题爬取的子命令"""
+    options = scraper_options(args)
+    # 多个工作进程可能同时运行，不能结束其他进程的浏览器
+    options["kill_existing_browsers"] = False
+    scraper = ZhihuBrowserScraper(**options)
+    job_queue = JobQueue(
+        queue_path(args),
+        visibility_timeout=args.visibility_timeout,
+        max_attempts=args.max_attempts
+    )
+    
+    async def run():
+        async with scraper:
+            return await scraper.drain_queue(
+                job_queue, args.output,
+                concurrency=args.concurrency,
+                wait=args.wait
+            )
+    
+    try:
+        asyncio.run(run())
+    finally:
+        job_queue.close()
+
+def reparse_command(args):
+    """从保存的快照离线重新解析的子命令"""
+    source = args.source or os.path.join(args.output, '.cache')
+    if not os.path.exists(source):
+        print(f"快照目录不存在: {source}")
+        return
+    sink = ParquetSink(args.parquet, partition_by=args.parquet_partition) if args.parquet else None
+    converter = None if args.raw_html else MarkdownConverter(
+        workers=args.workers, cache_dir=os.path.join(args.output, '.cache', 'markdown')
+    )
+    try:
+        reparse_snapshots(source, args.output, workers=args.workers, sink=sink, converter=converter)
+    finally:
+        if converter is not None:
+            converter.close()
 
 async def login_zhihu(timeout=300, user_data_dir=None):
     """手动登录知乎并保存登录状态
@@ -74,14 +309,51 @@ def main():
     # 爬取问题的子命令
     scrape_parser = subparsers.add_parser('scrape', help='爬取知乎问题及回答')
     scrape_parser.add_argument('question_id', type=str, help='知乎问题ID（例如：https://www.zhihu.com/question/12345中的12345）')
-    scrape_parser.add_argument('--output', type=str, default='output', help='输出目录，默认为output')
     scrape_parser.add_argument('--api-key', type=str, help='API密钥（用于AI代理模式，如不提供将尝试从环境变量加载）')
     scrape_parser.add_argument('--model', type=str, default='auto', help='AI模型名称，默认为auto（自动选择，会根据可用的API密钥选择模型）')
-    scrape_parser.add_argument('--cookie', type=str, help='知乎Cookie（可选，用于获取登录后才能看到的内容）')
     scrape_parser.add_argument('--manual', action='store_true', help='使用手动浏览器模式（更可靠但较慢）')
-    scrape_parser.add_argument('--user-data-dir', type=str, default=None, help='浏览器数据存储目录，默认为~/zhihu-browser-profile')
+    add_crawl_arguments(scrape_parser)
     scrape_parser.set_defaults(func=scrape_command)
     
+    # 批量爬取的子命令
+    batch_parser = subparsers.add_parser('batch', help='在同一个浏览器中并发爬取多个知乎问题')
+    batch_parser.add_argument('question_ids', type=str, nargs='*', help='知乎问题ID或URL，可提供多个')
+    batch_parser.add_argument('--file', type=str, default=None, help='问题ID文件，每行一个ID或URL，#开头的行会被忽略')
+    batch_parser.add_argument('--concurrency', type=int, default=3, help='同时爬取的问题数量，默认3')
+    batch_parser.add_argument('--workers', type=int, default=1, help='爬取进程数，大于1时把问题分片到多个进程，每个进程有独立的浏览器，默认1')
+    add_crawl_arguments(batch_parser)
+    batch_parser.set_defaults(func=batch_command)
+    
+    # 加入队列的子命令
+    enqueue_parser = subparsers.add_parser('enqueue', help='把问题加入持久化爬取队列')
+    enqueue_parser.add_argument('question_ids', type=str, nargs='*', help='知乎问题ID或URL，可提供多个')
+    enqueue_parser.add_argument('--file', type=str, default=None, help='问题ID文件，每行一个ID或URL，#开头的行会被忽略')
+    enqueue_parser.add_argument('--priority', type=int, default=0, help='优先级，数值越大越先爬取，默认0')
+    enqueue_parser.add_argument('--requeue', action='store_true', help='重新排队已完成或已失败的问题')
+    enqueue_parser.add_argument('--queue', type=str, default=None, help='队列数据库路径，默认为<输出目录>/queue.db')
+    enqueue_parser.add_argument('--output', type=str, default='output', help='输出目录，默认为output')
+    enqueue_parser.set_defaults(func=enqueue_command)
+    
+    # 消费队列的子命令
+    worker_parser = subparsers.add_parser('worker', help='从持久化队列中取出问题并爬取，可同时运行多个')
+    worker_parser.add_argument('--queue', type=str, default=None, help='队列数据库路径，默认为<输出目录>/queue.db')
+    worker_parser.add_argument('--concurrency', type=int, default=3, help='同时爬取的问题数量，默认3')
+    worker_parser.add_argument('--visibility-timeout', type=float, default=1800, help='任务租约时长（秒），进程崩溃后超时的任务会被重新分配，默认1800')
+    worker_parser.add_argument('--max-attempts', type=int, default=5, help='单个问题的最大尝试次数，默认5')
+    worker_parser.add_argument('--wait', action='store_true', help='队列为空时继续等待新任务，不退出')
+    add_crawl_arguments(worker_parser)
+    worker_parser.set_defaults(func=worker_command)
+    
+    # 离线重新解析的子命令
+    reparse_parser = subparsers.add_parser('reparse', help='从保存的页面HTML和接口JSON快照离线重新提取回答，不启动浏览器')
+    reparse_parser.add_argument('source', type=str, nargs='?', default=None, help='页面缓存目录、快照目录或单个快照文件，默认为<输出目录>/.cache')
+    reparse_parser.add_argument('--output', type=str, default='output', help='输出目录，默认为output')
+    reparse_parser.add_argument('--workers', type=int, default=None, help='解析进程数，默认为CPU核数')
+    reparse_parser.add_argument('--parquet', type=str, default=None, help='把回答同时追加写入该目录下的Parquet数据集（需要pyarrow）')
+    reparse_parser.add_argument('--parquet-partition', choices=['date', 'question'], default='date', help='Parquet数据集的分区方式，默认date')
+    reparse_parser.add_argument('--raw-html', action='store_true', help='Markdown文件中保留回答的原始HTML，不转换为Markdown')
+    reparse_parser.set_defaults(func=reparse_command)
+    
     # 登录的子命令
     login_parser = subparsers.add_parser('login', help='手动登录知乎并保存登录状态')
     login_parser.add_argument('--timeout', type=int, default=300, help='等待登录的最大时间（秒），默认5分钟')
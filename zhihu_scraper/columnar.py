@@ -0,0 +1,180 @@
+"""
+列式导出模块 - 把回答追加写入按日期或问题分区的Parquet数据集，便于分析时按列扫描和谓词下推
+"""
+
+import asyncio
+import os
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+# 分区方式：date按爬取日期（UTC）分区，question按问题ID分区
+PARTITIONS = {
+    "date": "crawl_date",
+    "question": "question_id",
+}
+
+# 缓冲区达到该行数时写出一个Parquet文件
+DEFAULT_FLUSH_ROWS = 5000
+
+# 取值重复率高的列使用字典编码，回答内容等长文本只压缩
+DICTIONARY_COLUMNS = ["question_id", "question_title", "author_name", "author_link"]
+
+def answer_schema():
+    """Parquet文件的列定义，作者名等高重复列在Arrow中同样使用字典类型"""
+    dictionary = pa.dictionary(pa.int32(), pa.string())
+    return pa.schema([
+        ("question_id", dictionary),
+        ("question_title", dictionary),
+        ("answer_id", pa.string()),
+        ("author_name", dictionary),
+        ("author_link", dictionary),
+        ("content", pa.large_string()),
+        ("upvotes", pa.int64()),
+        ("comments", pa.int64()),
+        ("created_time", pa.timestamp("s", tz="UTC")),
+        ("updated_time", pa.timestamp("s", tz="UTC")),
+        ("url", pa.string()),
+        ("crawl_time", pa.timestamp("s", tz="UTC")),
+        ("crawl_date", pa.string()),
+    ])
+
+def _to_timestamp(value):
+    """把接口中的Unix时间戳或页面中的ISO时间转换为UTC时间，无法识别时返回None"""
+    if value is None or value == "":
+        return None
+    if isinstance(value, (int, float)):
+        return datetime.fromtimestamp(value, tz=timezone.utc)
+    if isinstance(value, str):
+        if value.isdigit():
+            return datetime.fromtimestamp(int(value), tz=timezone.utc)
+        try:
+            parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        except ValueError:
+            return None
+        return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+    return None
+
+def _to_int(value):
+    try:
+        return int(value or 0)
+    except (TypeError, ValueError):
+        return 0
+
+class ParquetSink:
+    """回答的Parquet导出器
+
+    回答先缓存在内存中，达到flush_rows行或调用flush()时写出为数据集中的一个新文件
+    （Hive风格分区目录，如 crawl_date=2024-01-01/part-xxx.parquet）。每次写出都是新文件，
+    因此多个进程可以同时向同一个数据集追加，读取时用pyarrow.dataset或DuckDB按分区扫描。
+    """
+
+    def __init__(self, root, partition_by="date", compression="zstd", flush_rows=DEFAULT_FLUSH_ROWS):
+        """初始化导出器
+
+        Args:
+            root: 数据集目录
+            partition_by: 分区方式，date（按爬取日期）或question（按问题ID），默认date
+            compression: Parquet压缩算法，默认zstd
+            flush_rows: 缓冲区达到该行数时写出文件，默认5000
+        """
+        if pa is None:
+            raise ImportError("导出Parquet需要安装pyarrow: pip install pyarrow")
+        if partition_by not in PARTITIONS:
+            raise ValueError(f"不支持的分区方式: {partition_by}，可选: {', '.join(PARTITIONS)}")
+        self.root = root
+        self.partition_by = partition_by
+        self.compression = compression
+        self.flush_rows = flush_rows
+        self.schema = answer_schema()
+        self.rows = []
+        self.written = 0
+        self.files = 0
+        self._lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+
+    def add(self, answers, question_id, title=None, crawl_time=None):
+        """追加一个问题的回答，缓冲区满时在当前线程中写出
+
+        Args:
+            answers: 回答记录列表
+            question_id: 知乎问题ID
+            title: 可选的问题标题
+            crawl_time: 可选的爬取时间（ISO字符串或datetime），默认为当前时间
+        """
+        if self._buffer(answers, question_id, title, crawl_time):
+            self.flush()
+
+    async def aadd(self, answers, question_id, title=None, crawl_time=None):
+        """在事件循环中追加回答，缓冲区满时在线程池中写出，参数与add()相同"""
+        if self._buffer(answers, question_id, title, crawl_time):
+            await asyncio.to_thread(self.flush)
+
+    def _buffer(self, answers, question_id, title=None, crawl_time=None):
+        """把回答转换为行并放入缓冲区，返回缓冲区是否已满"""
+        crawl_time = _to_timestamp(crawl_time) or datetime.now(timezone.utc)
+        crawl_date = crawl_time.strftime("%Y-%m-%d")
+        rows = []
+        for answer in answers:
+            if not answer.get("content"):
+                continue
+            author = answer.get("author") or {}
+            rows.append({
+                "question_id": str(question_id),
+                "question_title": title,
+                "answer_id": str(answer["id"]) if answer.get("id") else None,
+                "author_name": author.get("name"),
+                "author_link": author.get("link"),
+                "content": answer["content"],
+                "upvotes": _to_int(answer.get("upvotes")),
+                "comments": _to_int(answer.get("comments")),
+                "created_time": _to_timestamp(answer.get("created_time")),
+                "updated_time": _to_timestamp(answer.get("updated_time")),
+                "url": answer.get("url"),
+                "crawl_time": crawl_time,
+                "crawl_date": crawl_date,
+            })
+        with self._lock:
+            self.rows.extend(rows)
+            return len(self.rows) >= self.flush_rows
+
+    def write_result(self, result, question_id):
+        """追加一个问题的爬取结果"""
+        meta = result.get("meta") or {}
+        self.add(result.get("answers") or [], question_id, result.get("title"), meta.get("crawl_time"))
+
+    def flush(self):
+        """把缓冲区中的回答写出为新的Parquet文件
+
+        Returns:
+            int: 写出的行数
+        """
+        with self._lock:
+            rows, self.rows = self.rows, []
+        if not rows:
+            return 0
+        table = pa.Table.from_pylist(rows, schema=self.schema)
+        pq.write_to_dataset(
+            table, self.root,
+            partition_cols=[PARTITIONS[self.partition_by]],
+            basename_template=f"part-{time.strftime('%Y%m%d%H%M%S')}-{uuid.uuid4().hex[:12]}-{{i}}.parquet",
+            existing_data_behavior="overwrite_or_ignore",
+            compression=self.compression,
+            use_dictionary=DICTIONARY_COLUMNS,
+        )
+        with self._lock:
+            self.written += len(rows)
+            self.files += 1
+        print(f"已写出 {len(rows)} 个回答到Parquet数据集: {self.root}")
+        return len(rows)
+
+    def close(self):
+        """写出缓冲区中剩余的回答"""
+        self.flush()
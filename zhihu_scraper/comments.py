@@ -0,0 +1,333 @@
+"""
+评论爬取模块 - 通过comment_v5接口并发获取每个回答的根评论和子评论
+"""
+
+import asyncio
+import inspect
+import json
+import os
+import threading
+from zhihu_scraper.ratelimit import get_rate_limiter
+from zhihu_scraper.retry import NAVIGATION, TIMEOUT, BlockedError, ParseError, RetryPolicy
+from zhihu_scraper.utils import _temp_path
+
+COMMENT_API_BASE = "https://www.zhihu.com/api/v4/comment_v5"
+
+# 评论的输出方式：attach附加到回答记录的comment_list字段，stream逐个回答写入<问题ID>/comments.jsonl
+COMMENT_OUTPUTS = ("attach", "stream")
+
+def comment_from_api(data):
+    """将接口中的评论对象转换为评论记录
+
+    Args:
+        data: root_comment或child_comment接口返回的评论对象
+
+    Returns:
+        dict: 评论记录，子评论在replies中
+    """
+    author = data.get('author') or {}
+    url_token = author.get('url_token')
+    author_record = {'name': author.get('name') or '匿名用户'}
+    if url_token:
+        author_record['link'] = f"https://www.zhihu.com/people/{url_token}"
+    reply_to = data.get('reply_to_author') or {}
+    return {
+        'id': str(data['id']) if data.get('id') is not None else None,
+        'author': author_record,
+        'content': data.get('content') or '',
+        'likes': data.get('like_count', data.get('vote_count', 0)) or 0,
+        'created_time': data.get('created_time'),
+        'reply_to': reply_to.get('name') if isinstance(reply_to, dict) else None,
+        'reply_count': data.get('child_comment_count', 0) or 0,
+        'replies': [comment_from_api(child) for child in data.get('child_comments') or []]
+    }
+
+class ContextJsonClient:
+    """通过浏览器上下文的APIRequestContext请求接口
+
+    与页面共享Cookie和登录状态，请求同样经过限速器和重试策略，
+    接口与HttpFetcher.get_json()相同，可以互相替换。
+    """
+
+    def __init__(self, request, rate_limiter=None, retry_policy=None):
+        """初始化客户端
+
+        Args:
+            request: playwright的APIRequestContext（context.request）
+            rate_limiter: 可选的RateLimiter，默认使用进程内共享的限速器
+            retry_policy: 可选的RetryPolicy，请求超时或连接失败时重试
+        """
+        self.request = request
+        self.rate_limiter = rate_limiter or get_rate_limiter()
+        self.retry_policy = retry_policy or RetryPolicy()
+
+    async def get_json(self, url, params=None):
+        """请求接口并解析JSON，超时和连接错误按重试策略重试"""
+        return await self.retry_policy.run(
+            "fetch", self._get_json, url, params, retry_on=(TIMEOUT, NAVIGATION), timeout=0
+        )
+
+    async def _get_json(self, url, params=None):
+        """发出一次请求并解析JSON，读取后立即释放响应体；等待限速名额的时间不计入fetch超时"""
+        async with self.rate_limiter.request(url) as slot:
+            async with self.retry_policy.limit("fetch"):
+                response = await self.request.get(url, params=params)
+            slot.record(response.status)
+        try:
+            if response.status in (401, 403, 429):
+                raise BlockedError(f"请求被拒绝（HTTP {response.status}）: {url}", response.status)
+            if response.status != 200:
+                raise ParseError(f"接口返回异常状态码 {response.status}: {url}")
+            try:
+                return json.loads(await response.body())
+            except ValueError:
+                raise ParseError(f"接口返回的不是JSON（可能触发了验证）: {url}")
+        finally:
+            await response.dispose()
+
+class CommentCrawler:
+    """回答评论的并发爬取器
+
+    所有回答的根评论分页和子评论分页都作为任务放入同一个队列，
+    由固定数量的协程消费，总并发数不随回答数量增长；请求经过共享的限速器。
+    """
+
+    def __init__(self, client, concurrency=4, max_comments=None, max_replies=None, page_size=20):
+        """初始化爬取器
+
+        Args:
+            client: 提供get_json(url, params)的接口客户端（HttpFetcher或ContextJsonClient）
+            concurrency: 同时请求的数量，默认4
+            max_comments: 每个回答最多获取的根评论数量，None表示不限制
+            max_replies: 每条根评论最多获取的子评论数量，0表示只使用根评论中附带的子评论，None表示不限制
+            page_size: 每页请求的评论数量，默认20
+        """
+        self.client = client
+        self.concurrency = max(1, concurrency)
+        self.max_comments = max_comments
+        self.max_replies = max_replies
+        self.page_size = page_size
+
+    async def iter_pages(self, url, params=None):
+        """按接口分页依次获取评论
+
+        Yields:
+            list: 本页的评论对象列表
+        """
+        while url:
+            payload = await self.client.get_json(url, params=params)
+            yield payload.get('data') or []
+            paging = payload.get('paging') or {}
+            if paging.get('is_end') or not paging.get('next'):
+                break
+            url, params = paging['next'], None
+
+    async def fetch_root_comments(self, answer_id):
+        """获取回答的根评论（包含接口附带的前几条子评论）"""
+        comments = []
+        url = f"{COMMENT_API_BASE}/answers/{answer_id}/root_comment"
+        params = {"order_by": "score", "limit": self.page_size, "offset": ""}
+        async for page in self.iter_pages(url, params):
+            comments.extend(comment_from_api(data) for data in page)
+            if self.max_comments and len(comments) >= self.max_comments:
+                return comments[:self.max_comments]
+        return comments
+
+    async def fetch_replies(self, comment_id):
+        """获取根评论下的全部子评论"""
+        replies = []
+        url = f"{COMMENT_API_BASE}/comment/{comment_id}/child_comment"
+        params = {"order_by": "ts", "limit": self.page_size, "offset": ""}
+        async for page in self.iter_pages(url, params):
+            replies.extend(comment_from_api(data) for data in page)
+            if self.max_replies and len(replies) >= self.max_replies:
+                return replies[:self.max_replies]
+        return replies
+
+    def _needs_replies(self, comment):
+        """根评论附带的子评论不完整时需要单独请求"""
+        if self.max_replies == 0:
+            return False
+        wanted = comment['reply_count'] if self.max_replies is None else min(comment['reply_count'], self.max_replies)
+        return len(comment['replies']) < wanted
+
+    async def crawl(self, answer_ids, on_answer=None):
+        """并发获取多个回答的评论
+
+        Args:
+            answer_ids: 回答ID列表
+            on_answer: 可选的回调函数（可以是协程函数），某个回答的评论全部获取完成后以(回答ID, 评论列表, 错误信息)调用
+
+        Returns:
+            dict: 回答ID到评论列表的映射；提供on_answer时不保留评论，返回空字典
+        """
+        jobs = asyncio.Queue()
+        state = {}
+        results = {}
+
+        async def finish(answer_id):
+            # 回答的根评论和全部子评论任务都已完成
+            entry = state.pop(answer_id)
+            if on_answer is not None:
+                written = on_answer(answer_id, entry['comments'], entry['error'])
+                if inspect.isawaitable(written):
+                    await written
+            else:
+                results[answer_id] = entry['comments']
+
+        for answer_id in dict.fromkeys(str(answer_id) for answer_id in answer_ids if answer_id):
+            state[answer_id] = {'comments': [], 'pending': 1, 'error': None}
+            jobs.put_nowait(('root', answer_id, None))
+
+        async def worker():
+            while True:
+                kind, answer_id, comment = await jobs.get()
+                entry = state[answer_id]
+                try:
+                    if kind == 'root':
+                        entry['comments'] = await self.fetch_root_comments(answer_id)
+                        for root in entry['comments']:
+                            if self._needs_replies(root):
+                                entry['pending'] += 1
+                                jobs.put_nowait(('replies', answer_id, root))
+                    else:
+                        comment['replies'] = await self.fetch_replies(comment['id'])
+                except Exception as e:
+                    # 单个回答的评论失败不影响其他回答，保留已获取的部分
+                    entry['error'] = str(e)
+                    print(f"获取回答 {answer_id} 的评论失败: {str(e)}")
+                finally:
+                    entry['pending'] -= 1
+                    if entry['pending'] == 0:
+                        try:
+                            await finish(answer_id)
+                        except Exception as e:
+                            print(f"保存回答 {answer_id} 的评论失败: {str(e)}")
+                    jobs.task_done()
+
+        if not state:
+            return results
+        total = len(state)
+        print(f"开始获取 {total} 个回答的评论，并发数: {self.concurrency}")
+        workers = [asyncio.create_task(worker()) for _ in range(min(self.concurrency, total))]
+        try:
+            await jobs.join()
+        finally:
+            for task in workers:
+                task.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+        return results
+
+class CommentStreamWriter:
+    """评论流写入器，每个回答的评论获取完成后追加一行到 output/<问题ID>/comments.jsonl"""
+
+    def __init__(self, question_id, output_dir='output', append=False):
+        """初始化写入器
+
+        Args:
+            question_id: 知乎问题ID
+            output_dir: 输出目录
+            append: 是否保留已有文件中完整获取的回答并在其后追加，默认False（覆盖上次的结果）
+        """
+        question_dir = os.path.join(output_dir, str(question_id))
+        os.makedirs(question_dir, exist_ok=True)
+        self.file_path = os.path.join(question_dir, "comments.jsonl")
+        self.count = 0
+        self.done = set()
+        # 多个评论协程可能同时在线程池中写入
+        self._lock = threading.Lock()
+        if append:
+            self._keep_completed()
+        self._file = open(self.file_path, 'a' if append else 'w', encoding='utf-8')
+
+    def _keep_completed(self):
+        """只保留已完整获取评论的回答，去掉出错的记录和中断时写了一半的最后一行"""
+        if not os.path.exists(self.file_path):
+            return
+        tmp_path = _temp_path(self.file_path)
+        with open(self.file_path, 'r', encoding='utf-8') as source, open(tmp_path, 'w', encoding='utf-8') as target:
+            for line in source:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                if record.get("error") or not record.get("answer_id") or record["answer_id"] in self.done:
+                    continue
+                self.done.add(record["answer_id"])
+                target.write(line if line.endswith("\n") else line + "\n")
+        os.replace(tmp_path, self.file_path)
+        self.count = len(self.done)
+
+    def write(self, answer_id, comments, error=None):
+        """写入一个回答的评论并立即刷新到磁盘"""
+        record = {"answer_id": answer_id, "comments": comments}
+        if error:
+            record["error"] = error
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        with self._lock:
+            self._file.write(line)
+            self._file.flush()
+            self.count += 1
+
+    async def awrite(self, answer_id, comments, error=None):
+        """在线程池中写入一个回答的评论，不阻塞事件循环，参数与write()相同"""
+        await asyncio.to_thread(self.write, answer_id, comments, error)
+
+    def close(self):
+        """关闭文件"""
+        self._file.close()
+
+def get_comment_client(self, page=None):
+    """选择评论接口的客户端
+
+    HTTP引擎或没有浏览器页面时使用HttpFetcher，否则通过页面所在浏览器上下文请求，
+    与页面共享登录状态。
+    """
+    if page is None or self.engine == 'http':
+        return self.get_http_fetcher()
+    return ContextJsonClient(page.context.request, self.rate_limiter, self.retry_policy)
+
+async def crawl_comments(self, question_id, answers, output_dir='output', page=None):
+    """爬取回答的评论
+
+    comments_output为attach时把评论附加到回答记录的comment_list字段（回答的comments仍为评论数），
+    为stream时逐个回答写入 output/<问题ID>/comments.jsonl，不占用内存；resume模式下
+    跳过文件中已完整获取的回答，只追加其余回答的评论。
+
+    Args:
+        question_id: 知乎问题ID
+        answers: 回答记录列表或回答ID列表
+        output_dir: 输出目录
+        page: 可选的playwright页面对象，提供时通过其浏览器上下文请求接口
+
+    Returns:
+        int: 获取到评论的回答数量
+    """
+    records = {str(answer['id']): answer for answer in answers if isinstance(answer, dict) and answer.get('id')}
+    answer_ids = list(records) if records else [answer_id for answer_id in answers if isinstance(answer_id, (str, int))]
+    crawler = CommentCrawler(
+        get_comment_client(self, page),
+        concurrency=self.comment_concurrency,
+        max_comments=self.max_comments,
+        max_replies=self.max_replies
+    )
+
+    if self.comments_output == 'stream' or not records:
+        writer = await asyncio.to_thread(
+            CommentStreamWriter, question_id, output_dir, append=getattr(self, 'resume', False)
+        )
+        if writer.done:
+            print(f"问题 {question_id}: {len(writer.done)} 个回答的评论已获取，从断点继续")
+        pending = [answer_id for answer_id in answer_ids if str(answer_id) not in writer.done]
+        try:
+            await crawler.crawl(pending, on_answer=writer.awrite)
+        finally:
+            await asyncio.to_thread(writer.close)
+        print(f"问题 {question_id} 的评论已写入: {writer.file_path}")
+        return writer.count
+
+    results = await crawler.crawl(answer_ids)
+    for answer_id, comments in results.items():
+        records[answer_id]['comment_list'] = comments
+    print(f"问题 {question_id}: 已获取 {len(results)} 个回答的评论")
+    return len(results)
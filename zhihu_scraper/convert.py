@@ -0,0 +1,276 @@
+"""
+Markdown转换模块 - 在进程池中把回答HTML转换为Markdown，按内容哈希缓存转换结果
+"""
+
+import asyncio
+import hashlib
+import multiprocessing
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import parse_qs, urlsplit
+from bs4 import BeautifulSoup
+from zhihu_scraper.utils import write_atomic
+
+try:
+    import html2text
+except ImportError:
+    html2text = None
+
+try:
+    import lxml  # noqa: F401
+    HTML_PARSER = "lxml"
+except ImportError:
+    HTML_PARSER = "html.parser"
+
+# 转换规则的版本，修改转换规则后递增，使旧的缓存失效
+CONVERTER_VERSION = "1"
+
+# 每个进程池任务转换的回答数量，回答很多的问题会拆成多个任务并行转换
+BATCH_SIZE = 50
+
+# 公式和代码块先替换为占位符，转换完成后再还原，避免被html2text转义或重排
+PLACEHOLDER = "ZHMDTOKEN{}ZHMD"
+PLACEHOLDER_PATTERN = re.compile(r"ZHMDTOKEN(\d+)ZHMD")
+
+# 知乎外链跳转地址
+LINK_REDIRECT_HOST = "link.zhihu.com"
+
+def _unwrap_link(href):
+    """把知乎外链跳转地址还原为目标地址"""
+    parts = urlsplit(href)
+    if parts.hostname == LINK_REDIRECT_HOST:
+        target = parse_qs(parts.query).get("target")
+        if target:
+            return target[0]
+    if href.startswith("//"):
+        return "https:" + href
+    return href
+
+def _image_source(img):
+    """图片的真实地址：知乎懒加载图片的src是占位图，原图在data-original或data-actualsrc中"""
+    for attr in ("data-original", "data-actualsrc", "data-default-watermark-src", "src"):
+        src = img.get(attr)
+        if src and not src.startswith("data:"):
+            return "https:" + src if src.startswith("//") else src
+    return None
+
+def _prepare_html(html, tokens):
+    """处理知乎特有的HTML结构：公式图片、懒加载图片、代码块和外链跳转
+
+    Args:
+        html: 回答HTML
+        tokens: 占位符内容列表，公式和代码块的Markdown会追加到这里
+
+    Returns:
+        str: 处理后的HTML
+    """
+    soup = BeautifulSoup(html, HTML_PARSER)
+
+    # noscript中是同一张图片的副本
+    for noscript in soup.find_all("noscript"):
+        noscript.decompose()
+
+    for img in soup.find_all("img"):
+        if img.get("eeimg") or "equation?tex=" in (img.get("src") or ""):
+            # 公式图片：alt中是LaTeX源码，单独成段时为块级公式
+            latex = (img.get("alt") or "").strip()
+            parent = img.parent
+            block = parent is not None and parent.name == "p" and len(parent.get_text(strip=True)) == 0 \
+                and len(parent.find_all("img")) == 1
+            tokens.append(f"$${latex}$$" if block else f"${latex}$")
+            img.replace_with(PLACEHOLDER.format(len(tokens) - 1))
+            continue
+        src = _image_source(img)
+        if src is None:
+            img.decompose()
+            continue
+        img.attrs = {"src": src, "alt": img.get("alt") or ""}
+
+    for pre in soup.find_all("pre"):
+        code = pre.find("code")
+        language = ""
+        for cls in (code.get("class") if code is not None else None) or []:
+            if cls.startswith("language-"):
+                language = cls[len("language-"):]
+        text = (code or pre).get_text().rstrip("\n")
+        fence = "````" if "```" in text else "```"
+        tokens.append(f"{fence}{language}\n{text}\n{fence}")
+        paragraph = soup.new_tag("p")
+        paragraph.string = PLACEHOLDER.format(len(tokens) - 1)
+        pre.replace_with(paragraph)
+
+    # 图片说明单独成段
+    for caption in soup.find_all("figcaption"):
+        caption.name = "p"
+
+    for link in soup.find_all("a", href=True):
+        link["href"] = _unwrap_link(link["href"])
+
+    return str(soup)
+
+def html_to_markdown(html):
+    """把一个回答的HTML转换为Markdown
+
+    没有安装html2text时原样返回HTML（Markdown中可以直接嵌入HTML）。
+
+    Args:
+        html: 回答HTML
+
+    Returns:
+        str: Markdown文本
+    """
+    if not html or html2text is None:
+        return html or ""
+    tokens = []
+    prepared = _prepare_html(html, tokens)
+
+    converter = html2text.HTML2Text()
+    converter.body_width = 0
+    converter.unicode_snob = True
+    converter.ignore_images = False
+    converter.ignore_links = False
+    converter.single_line_break = False
+    markdown = converter.handle(prepared)
+
+    markdown = PLACEHOLDER_PATTERN.sub(lambda match: tokens[int(match.group(1))], markdown)
+    return re.sub(r"\n{3,}", "\n\n", markdown).strip()
+
+def convert_batch(htmls):
+    """进程池任务：转换一批回答HTML，单个回答出错时保留原始HTML"""
+    results = []
+    for html in htmls:
+        try:
+            results.append(html_to_markdown(html))
+        except Exception:
+            results.append(html or "")
+    return results
+
+def content_hash(html):
+    """回答HTML的缓存键，包含转换规则版本"""
+    return hashlib.sha256(f"{CONVERTER_VERSION}\0{html}".encode("utf-8")).hexdigest()
+
+class MarkdownCache:
+    """按内容哈希保存的Markdown转换结果，相同的回答内容只转换一次"""
+
+    def __init__(self, root):
+        self.root = root
+
+    def _path(self, digest):
+        return os.path.join(self.root, digest[:2], digest + ".md")
+
+    def get(self, digest):
+        """读取转换结果，未缓存时返回None"""
+        try:
+            with open(self._path(digest), "r", encoding="utf-8") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def put(self, digest, markdown):
+        """保存转换结果"""
+        path = self._path(digest)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        write_atomic(path, markdown)
+
+class MarkdownConverter:
+    """回答HTML到Markdown的转换器
+
+    转换在独立的进程池中进行，不占用事件循环所在的进程；每个问题的回答按BATCH_SIZE
+    分批提交，已缓存的内容直接读取，不再转换。
+    """
+
+    def __init__(self, workers=None, cache_dir=None):
+        """初始化转换器，进程池在第一次转换时创建
+
+        Args:
+            workers: 转换进程数，默认为CPU核数（最多4个）
+            cache_dir: 可选的转换结果缓存目录，None表示不缓存
+        """
+        self.workers = workers or min(4, os.cpu_count() or 1)
+        self.cache = MarkdownCache(cache_dir) if cache_dir else None
+        self._executor = None
+        if html2text is None:
+            # 未转换的HTML不写入缓存，安装html2text后重新转换
+            self.cache = None
+            print("未安装html2text，Markdown中保留回答的原始HTML（pip install html2text）")
+
+    @property
+    def executor(self):
+        """延迟创建的进程池，使用spawn避免子进程继承事件循环和浏览器连接"""
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._executor
+
+    def _lookup(self, htmls):
+        """读取缓存，返回(结果列表, 未命中的序号列表, 内容哈希列表)"""
+        digests = [content_hash(html) for html in htmls]
+        results = [None] * len(htmls)
+        missing = []
+        for index, (html, digest) in enumerate(zip(htmls, digests)):
+            cached = self.cache.get(digest) if self.cache is not None and html else None
+            if cached is not None:
+                results[index] = cached
+            elif html:
+                missing.append(index)
+            else:
+                results[index] = ""
+        return results, missing, digests
+
+    def _store(self, results, missing, digests, converted):
+        """填入转换结果并写入缓存"""
+        for index, markdown in zip(missing, converted):
+            results[index] = markdown
+            if self.cache is not None:
+                self.cache.put(digests[index], markdown)
+        return results
+
+    def _batches(self, htmls, missing):
+        return [
+            [htmls[index] for index in missing[start:start + BATCH_SIZE]]
+            for start in range(0, len(missing), BATCH_SIZE)
+        ]
+
+    async def convert(self, htmls):
+        """异步转换一组回答HTML
+
+        Args:
+            htmls: 回答HTML列表
+
+        Returns:
+            list: 与输入顺序相同的Markdown列表
+        """
+        htmls = list(htmls)
+        results, missing, digests = await asyncio.to_thread(self._lookup, htmls)
+        if not missing:
+            return results
+        loop = asyncio.get_running_loop()
+        batches = await asyncio.gather(*(
+            loop.run_in_executor(self.executor, convert_batch, batch)
+            for batch in self._batches(htmls, missing)
+        ))
+        converted = [markdown for batch in batches for markdown in batch]
+        return await asyncio.to_thread(self._store, results, missing, digests, converted)
+
+    def convert_sync(self, htmls):
+        """同步转换一组回答HTML，用于不在事件循环中的调用方（如离线解析）"""
+        htmls = list(htmls)
+        results, missing, digests = self._lookup(htmls)
+        if not missing:
+            return results
+        batches = self.executor.map(convert_batch, self._batches(htmls, missing))
+        converted = [markdown for batch in batches for markdown in batch]
+        return self._store(results, missing, digests, converted)
+
+    async def convert_answers(self, answers):
+        """转换回答记录的content字段，返回Markdown列表"""
+        return await self.convert([answer.get('content') or answer.get('answer_content') or '' for answer in answers])
+
+    def close(self):
+        """关闭进程池"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
@@ -4,12 +4,18 @@
 
 import asyncio
 import os
-import time
 import random
-import platform
 import json
-from datetime import datetime
-from playwright.async_api import async_playwright
+from datetime import datetime, timezone
+from zhihu_scraper.api import AnswerInterceptor, parse_initial_data
+from zhihu_scraper.cache import HTML
+from zhihu_scraper.dedup import dedupe_answers
+from zhihu_scraper.extract import EXPAND_AND_EXTRACT_JS, EXPAND_SETTLE_MS, EXPAND_TIMEOUT_MS
+from zhihu_scraper.media import localize_media
+from zhihu_scraper.loader import ANSWER_SELECTOR, scroll_until_stable
+from zhihu_scraper.profiles import get_profile, pick_slow_mo
+from zhihu_scraper.retry import NAVIGATION, TIMEOUT, ParseError, RetryPolicy, navigate
+from zhihu_scraper.utils import headless_launch_options, kill_browser_processes, link_file, write_atomic
 
 try:
     from browser_use import Agent, Browser, BrowserConfig, BrowserContext
@@ -17,76 +23,113 @@ try:
 except ImportError:
     browser_use_available = False
 
-async def scrape_question(self, question_id, output_dir='output', manual_mode=False):
-    """使用Playwright爬取知乎问题数据
+# 反检测脚本，注入到每个页面中
+ANTI_DETECTION_JS = """
+
+    // 覆盖navigator.webdriver
+    Object.defineProperty(navigator, 'webdriver', {
+        get: () => false,
+        configurable: true
+    });
     
-    Args:
-        question_id: 知乎问题ID
-        output_dir: 输出目录
-        manual_mode: 是否强制使用手动浏览器模式
+    // 添加Chromium浏览器特有的属性
+    window.chrome = {
+        runtime: {},
+        loadTimes: function() {},
+        csi: function() {},
+        app: {}
+    };
     
-    Returns:
-        成功爬取的答案数量
-    """
+    // 覆盖Permissions API
+    const originalQuery = window.navigator.permissions.query;
+    window.navigator.permissions.query = (parameters) => (
+        parameters.name === 'notifications' ?
+        Promise.resolve({state: Notification.permission}) :
+        originalQuery(parameters)
+    );
     
-    # 如果未启用AI代理模式或强制使用手动模式，则使用手动浏览器模式
-    if manual_mode or not hasattr(self, 'llm') or self.llm is None:
-        return await self._launch_browser_manually(question_id, output_dir)
+    // 修改WebGL指纹
+    const getParameter = WebGLRenderingContext.prototype.getParameter;
+    WebGLRenderingContext.prototype.getParameter = function(parameter) {
+        if (parameter === 37445) {
+            return 'Intel Inc.';
+        }
+        if (parameter === 37446) {
+            return 'Intel Iris Pro Graphics';
+        }
+        return getParameter.apply(this, [parameter]);
+    };
     
-    print("启动AI控制浏览器模式...")
-    question_url = f"https://www.zhihu.com/question/{question_id}"
-    output_file = os.path.join(output_dir, f"zhihu_question_{question_id}.json")
-    output_md_file = os.path.join(output_dir, f"zhihu_question_{question_id}.md")
+    // 随机化canvas指纹
+    const origToDataURL = HTMLCanvasElement.prototype.toDataURL;
+    HTMLCanvasElement.prototype.toDataURL = function(type) {
+        if (type === 'image/png' && this.width === 16 && this.height === 16) {
+            const canvas = document.createElement('canvas');
+            canvas.width = this.width;
+            canvas.height = this.height;
+            const ctx = canvas.getContext('2d');
+            ctx.drawImage(this, 0, 0);
+            const imageData = ctx.getImageData(0, 0, canvas.width, canvas.height);
+            const data = imageData.data;
+            for (let i = 0; i < data.length; i += 4) {
+                data[i] = data[i] + Math.floor(Math.random() * 10) - 5;
+                data[i+1] = data[i+1] + Math.floor(Math.random() * 10) - 5;
+                data[i+2] = data[i+2] + Math.floor(Math.random() * 10) - 5;
+            }
+            ctx.putImageData(imageData, 0, 0);
+            return origToDataURL.apply(canvas, arguments);
+        }
+        return origToDataURL.apply(this, arguments);
+    };
     
-    # 确保输出目录存在
-    os.makedirs(output_dir, exist_ok=True)
+    // 修改AudioContext指纹
+    const audioContext = window.AudioContext || window.webkitAudioContext;
+    if (audioContext) {
+        const origGetChannelData = AudioBuffer.prototype.getChannelData;
+        AudioBuffer.prototype.getChannelData = function() {
+            const channelData = origGetChannelData.apply(this, arguments);
+            if (channelData.length > 20) {
+                const noise = 0.0001;
+                for (let i = 0; i < Math.min(channelData.length, 500); i++) {
+                    channelData[i] = channelData[i] + (Math.random() * noise * 2 - noise);
+                }
+            }
+            return channelData;
+        };
+    }
     
-    # 为当前问题创建专属文件夹
-    question_dir = os.path.join(output_dir, str(question_id))
-    if not os.path.exists(question_dir):
-        os.makedirs(question_dir)
-    
-    # 准备爬虫任务描述
-    task = f"""你是一位资深的网页数据爬虫专家，现在需要你帮我访问并从知乎问题页面提取数据。
-   
-    5. 然后再访问问题页面: {question_url}
-    
-    在问题页面上执行以下操作:
-    1. 等待页面完全加载（包括问题详情和所有初始可见的回答）
-    2. 向下滚动页面至少5次，等待新内容加载
-    3. 提取以下信息:
-       - 问题标题
-       - 问题描述（如果有）
-       - 至少前10个回答（包括作者信息、回答内容、点赞数等）
-    4. 点击任何需要展开的"阅读全文"按钮
-    
-    将所提取数据以结构化的JSON格式返回，包含问题信息和回答列表。
-    返回结果必须是有效的JSON格式。
-    """
+    // 随机化硬件并发数
+    Object.defineProperty(navigator, 'hardwareConcurrency', {
+        get: () => 8 + Math.floor(Math.random() * 4),
+        configurable: true
+    });
     
-    # 清除之前可能存在的Chromium进程
-    if platform.system() == "Windows":
-        try:
-            os.system("taskkill /f /im chromium.exe")
-            time.sleep(2)
-        except:
-            pass
-    elif platform.system() == "Darwin":  # macOS
-        try:
-            os.system("pkill -f Chromium")
-            time.sleep(2)
-        except:
-            pass
-    elif platform.system() == "Linux":
-        try:
-            os.system("pkill -f chromium")
-            time.sleep(2)
-        except:
-            pass
+    // 随机化设备内存大小
+    Object.defineProperty(navigator, 'deviceMemory', {
+        get: () => 8,
+        configurable: true
+    });
+"""
+
+USER_AGENT = "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/110.0.0.0 Safari/537.36"
+
+async def _launch_context(self, p):
+    """启动使用持久化配置目录的浏览器上下文
+    
+    Args:
+        p: async_playwright实例
+    
+    Returns:
+        已注入反检测脚本的浏览器上下文
+    """
+    # 清除之前可能存在的Chromium进程（持久化目录同一时间只能被一个浏览器占用）
+    # 多进程爬取时各进程使用独立的目录副本，不能结束其他进程的浏览器
+    if self.kill_existing_browsers:
+        kill_browser_processes()
     
     # 获取用户数据目录
     user_data_dir = self.user_data_dir
-    print(f"使用持久化配置目录: {user_data_dir}")
+    print(f"启动Playwright持久化上下文，用户数据目录: {user_data_dir}")
     
     # 随机化窗口大小
     width = 1920 + random.randint(-100, 100)
@@ -101,274 +144,365 @@ async def scrape_question(self, question_id, output_dir='output', manual_mode=Fa
         "--disable-site-isolation-trials",
         f"--window-size={width},{height}"
     ]
+    
+    # 使用持久化目录启动浏览器
+    browser_context = await p.chromium.launch_persistent_context(
+        user_data_dir,
+        slow_mo=pick_slow_mo(getattr(self, 'profile', None) or get_profile()),
+        **headless_launch_options(getattr(self, 'headless', False), browser_args),
+        viewport={"width": width, "height": height},
+        user_agent=USER_AGENT,
+        locale="zh-CN",
+        timezone_id="Asia/Shanghai"
+    )
+    
+    # 注入反检测脚本（对上下文中的所有页面生效）
+    await browser_context.add_init_script(ANTI_DETECTION_JS)
+    
+    # 拦截不需要的资源请求
+    if getattr(self, 'resource_filter', None) is not None:
+        await self.resource_filter.install(browser_context)
+    
+    # 页面自身的接口请求被限流时同样降低请求速率
+    browser_context.on("response", self.rate_limiter.observe_response)
+    
+    return browser_context
 
-    # 使用Playwright的持久化上下文
-    async with async_playwright() as p:
-        # 创建反检测脚本
-        init_js_code = """
-        // 覆盖navigator.webdriver
-        Object.defineProperty(navigator, 'webdriver', {
-            get: () => false,
-            configurable: true
-        });
-        
-        // 添加Chromium浏览器特有的属性
-        window.chrome = {
-            runtime: {},
-            loadTimes: function() {},
-            csi: function() {},
-            app: {}
-        };
-        
-        // 覆盖Permissions API
-        const originalQuery = window.navigator.permissions.query;
-        window.navigator.permissions.query = (parameters) => (
-            parameters.name === 'notifications' ?
-            Promise.resolve({state: Notification.permission}) :
-            originalQuery(parameters)
-        );
-        
-        // 修改WebGL指纹
-        const getParameter = WebGLRenderingContext.prototype.getParameter;
-        WebGLRenderingContext.prototype.getParameter = function(parameter) {
-            if (parameter === 37445) {
-                return 'Intel Inc.';
-            }
-            if (parameter === 37446) {
-                return 'Intel Iris Pro Graphics';
-            }
-            return getParameter.apply(this, [parameter]);
-        };
-        
-        // 随机化canvas指纹
-        const origToDataURL = HTMLCanvasElement.prototype.toDataURL;
-        HTMLCanvasElement.prototype.toDataURL = function(type) {
-            if (type === 'image/png' && this.width === 16 && this.height === 16) {
-                const canvas = document.createElement('canvas');
-                canvas.width = this.width;
-                canvas.height = this.height;
-                const ctx = canvas.getContext('2d');
-                ctx.drawImage(this, 0, 0);
-                const imageData = ctx.getImageData(0, 0, canvas.width, canvas.height);
-                const data = imageData.data;
-                for (let i = 0; i < data.length; i += 4) {
-                    data[i] = data[i] + Math.floor(Math.random() * 10) - 5;
-                    data[i+1] = data[i+1] + Math.floor(Math.random() * 10) - 5;
-                    data[i+2] = data[i+2] + Math.floor(Math.random() * 10) - 5;
-                }
-                ctx.putImageData(imageData, 0, 0);
-                return origToDataURL.apply(canvas, arguments);
-            }
-            return origToDataURL.apply(this, arguments);
-        };
-        
-        // 修改AudioContext指纹
-        const audioContext = window.AudioContext || window.webkitAudioContext;
-        if (audioContext) {
-            const origGetChannelData = AudioBuffer.prototype.getChannelData;
-            AudioBuffer.prototype.getChannelData = function() {
-                const channelData = origGetChannelData.apply(this, arguments);
-                if (channelData.length > 20) {
-                    const noise = 0.0001;
-                    for (let i = 0; i < Math.min(channelData.length, 500); i++) {
-                        channelData[i] = channelData[i] + (Math.random() * noise * 2 - noise);
-                    }
-                }
-                return channelData;
-            };
+async def _scrape_page(self, page, question_id, output_dir='output'):
+    """在给定页面中爬取单个知乎问题并保存结果
+    
+    Args:
+        page: playwright页面对象
+        question_id: 知乎问题ID
+        output_dir: 输出目录
+    
+    Returns:
+        dict: 爬取结果，包含问题标题、描述和回答列表
+    """
+    # 网络拦截模式：从回答接口的JSON响应中直接获取回答，不再遍历DOM
+    # 启用页面缓存时同样监听接口响应，把原始JSON写入缓存
+    intercept = getattr(self, 'intercept', False)
+    cache = self.get_page_cache()
+    interceptor = None
+    if intercept or cache is not None:
+        interceptor = AnswerInterceptor(question_id, cache=cache)
+        interceptor.attach(page)
+    if cache is not None:
+        cache.begin(question_id)
+    
+    try:
+        result = await _load_question(
+            page, question_id, interceptor if intercept else None,
+            target_count=getattr(self, 'target_answers', None) or getattr(self, 'max_answers', None),
+            max_time=getattr(self, 'scroll_timeout', 60),
+            rate_limiter=getattr(self, 'rate_limiter', None),
+            retry_policy=getattr(self, 'retry_policy', None)
+        )
+        if cache is not None:
+            # 保存加载完成后的页面HTML，供离线重新解析
+            await interceptor.wait_pending()
+            await cache.aput(f"https://www.zhihu.com/question/{question_id}", await page.content(), HTML, question_id)
+    finally:
+        if interceptor is not None:
+            interceptor.detach(page)
+    
+    # 按回答ID去重（.List-item和.AnswerCard可能匹配到同一个回答）
+    result['answers'] = dedupe_answers(result['answers'])
+    
+    # 限制回答数量
+    max_answers = getattr(self, 'max_answers', None)
+    if max_answers:
+        result['answers'] = result['answers'][:max_answers]
+    
+    # 通过页面所在的浏览器上下文并发获取评论
+    if getattr(self, 'comments', False):
+        await self.crawl_comments(question_id, result['answers'], output_dir, page=page)
+    
+    # 保存结果
+    await _asave_result(
+        result, question_id, output_dir,
+        sink=getattr(self, 'sink', None), converter=getattr(self, 'markdown_converter', None),
+        media=getattr(self, 'media_downloader', None)
+    )
+    
+    return result
+
+async def _load_question(page, question_id, interceptor=None, target_count=None, max_time=60, rate_limiter=None,
+                         retry_policy=None):
+    """打开问题页面，加载回答并提取数据
+    
+    Args:
+        page: playwright页面对象
+        question_id: 知乎问题ID
+        interceptor: 可选的AnswerInterceptor，提供时从接口响应中提取回答
+        target_count: 目标回答数量，加载到该数量后停止滚动，None表示加载到底
+        max_time: 滚动加载的最长时间（秒）
+        rate_limiter: 可选的RateLimiter，默认使用进程内共享的限速器
+        retry_policy: 可选的RetryPolicy，导航和提取失败时按策略重试
+    
+    Returns:
+        dict: 爬取结果
+    """
+    question_url = f"https://www.zhihu.com/question/{question_id}"
+    retry_policy = retry_policy or RetryPolicy()
+    
+    # 访问问题页面（由限速器控制请求节奏，失败时重试）
+    await navigate(page, question_url, rate_limiter, retry_policy, wait_until="domcontentloaded")
+    print(f"已打开问题页面: {question_url}")
+    
+    # 等待问题标题或首个回答出现
+    try:
+        await page.wait_for_selector(
+            f".QuestionHeader-title, {ANSWER_SELECTOR}",
+            timeout=retry_policy.timeout("wait") * 1000
+        )
+    except Exception:
+        print("等待问题内容超时，继续尝试加载回答")
+    
+    # 滚动加载回答，直到不再有新回答出现
+    await scroll_until_stable(page, target_count=target_count, max_time=max_time)
+    
+    # 接口数据中已包含完整回答内容，无需展开和遍历DOM
+    if interceptor is not None:
+        return await _extract_intercepted(page, interceptor, question_id, retry_policy)
+    
+    # 在一次页面调用中展开全部回答、等待内容稳定并提取
+    return await expand_and_extract(page, retry_policy)
+
+async def expand_and_extract(page, retry_policy=None):
+    """展开页面中全部被折叠的回答并提取回答记录
+    
+    展开、等待DOM稳定和提取都在同一次page.evaluate中完成，
+    不逐个定位和点击按钮，也不持有任何ElementHandle。
+    
+    Args:
+        page: playwright页面对象
+        retry_policy: 可选的RetryPolicy，提取失败时按策略重试
+    
+    Returns:
+        dict: 爬取结果，包含问题标题、描述、回答列表和展开的回答数量
+    """
+    retry_policy = retry_policy or RetryPolicy()
+    result = await retry_policy.run(
+        "extract", _evaluate_result, page, EXPAND_AND_EXTRACT_JS,
+        {"settle": EXPAND_SETTLE_MS, "timeout": EXPAND_TIMEOUT_MS}
+    )
+    if result.get('expanded'):
+        print(f"已展开 {result['expanded']} 个折叠的回答")
+    return result
+
+async def _evaluate_result(page, script, arg=None):
+    """执行提取脚本并检查返回的数据结构"""
+    result = await page.evaluate(script, arg)
+    if not isinstance(result, dict) or not isinstance(result.get('answers'), list):
+        raise ParseError("页面提取脚本没有返回回答列表")
+    return result
+
+async def _extract_intercepted(page, interceptor, question_id, retry_policy=None):
+    """合并页面初始数据和拦截到的接口响应，生成爬取结果
+    
+    Args:
+        page: playwright页面对象
+        interceptor: 已挂载到页面上的AnswerInterceptor
+        question_id: 知乎问题ID
+        retry_policy: 可选的RetryPolicy，读取页面数据失败时重试
+    
+    Returns:
+        dict: 与DOM提取结果结构相同的爬取结果
+    """
+    await interceptor.wait_pending()
+    retry_policy = retry_policy or RetryPolicy()
+    
+    # 只读取问题信息和服务端渲染的首屏数据，不遍历回答节点
+    page_data = await retry_policy.run("extract", page.evaluate, """() => ({
+        title: document.querySelector('.QuestionHeader-title')?.textContent.trim(),
+        description: document.querySelector('.QuestionRichText')?.innerText.trim(),
+        initial_data: document.getElementById('js-initialData')?.textContent || null,
+        url: window.location.href
+    })""")
+    
+    question_info = {}
+    initial_answers = []
+    if page_data.get('initial_data'):
+        try:
+            question_info, initial_answers = parse_initial_data(page_data['initial_data'], question_id)
+        except Exception as e:
+            print(f"解析页面初始数据失败: {str(e)}")
+    
+    # 首屏回答在前，接口加载的回答在后，按回答ID去重（接口中的记录更完整，覆盖首屏记录）
+    answers = dedupe_answers(initial_answers + interceptor.get_answers(), keep='last')
+    
+    print(f"从接口数据中获取到 {len(answers)} 个回答（拦截响应 {interceptor.responses} 次）")
+    
+    return {
+        "title": page_data.get('title') or question_info.get('title'),
+        "description": page_data.get('description') or question_info.get('description', ''),
+        "answers": [answer for answer in answers if answer.get('content')],
+        "meta": {
+            "crawl_time": datetime.now(timezone.utc).isoformat(),
+            "question_id": str(question_id),
+            "url": page_data.get('url'),
+            "source": "api"
         }
+    }
+
+async def _scrape_http(self, question_id, output_dir='output'):
+    """使用HTTP引擎爬取单个知乎问题并保存结果
+    
+    Args:
+        question_id: 知乎问题ID
+        output_dir: 输出目录
+    
+    Returns:
+        dict: 爬取结果
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    fetcher = self.get_http_fetcher()
+    if fetcher.cache is not None:
+        fetcher.cache.begin(question_id)
+    result = await fetcher.fetch_question(question_id, max_answers=getattr(self, 'max_answers', None))
+    if getattr(self, 'comments', False):
+        await self.crawl_comments(question_id, result['answers'], output_dir)
+    await _asave_result(
+        result, question_id, output_dir,
+        sink=getattr(self, 'sink', None), converter=getattr(self, 'markdown_converter', None),
+        media=getattr(self, 'media_downloader', None)
+    )
+    return result
+
+def _save_result(result, question_id, output_dir='output', sink=None, markdown_contents=None):
+    """将爬取结果保存为JSON和Markdown文件
+    
+    每个文件先写入临时文件再替换；问题专属目录中的question.md是Markdown文件的硬链接
+    （文件系统不支持时复制），Markdown只生成和写入一次。
+    
+    Args:
+        result: 爬取结果
+        question_id: 知乎问题ID
+        output_dir: 输出目录
+        sink: 可选的ParquetSink，提供时把回答同时追加到Parquet数据集
+        markdown_contents: 可选的回答Markdown列表（与result['answers']顺序相同），默认使用回答的原始HTML
+    """
+    output_file = os.path.join(output_dir, f"zhihu_question_{question_id}.json")
+    output_md_file = os.path.join(output_dir, f"zhihu_question_{question_id}.md")
+    
+    # 为当前问题创建专属文件夹
+    question_dir = os.path.join(output_dir, str(question_id))
+    os.makedirs(question_dir, exist_ok=True)
+    
+    try:
+        # 保存为JSON文件
+        write_atomic(output_file, json.dumps(result, ensure_ascii=False, indent=2))
+        print(f"结果已保存到JSON文件: {output_file}")
         
-        // 随机化硬件并发数
-        Object.defineProperty(navigator, 'hardwareConcurrency', {
-            get: () => 8 + Math.floor(Math.random() * 4),
-            configurable: true
-        });
+        # 转换为Markdown格式并保存
+        write_atomic(output_md_file, _convert_to_markdown(result, question_id, markdown_contents))
+        print(f"结果已保存到Markdown文件: {output_md_file}")
         
-        // 随机化设备内存大小
-        Object.defineProperty(navigator, 'deviceMemory', {
-            get: () => 8,
-            configurable: true
-        });
-        """
+        # 问题专属目录中的同一份Markdown
+        link_file(output_md_file, os.path.join(question_dir, "question.md"))
         
-        print(f"启动Playwright持久化上下文，用户数据目录: {user_data_dir}")
+        if sink is not None:
+            sink.write_result(result, question_id)
         
+    except Exception as e:
+        print(f"保存结果时出错: {str(e)}")
+
+async def _asave_result(result, question_id, output_dir='output', sink=None, converter=None, media=None):
+    """在线程池中序列化并保存爬取结果，磁盘写入不阻塞同一事件循环中的其他页面
+    
+    提供converter（MarkdownConverter）时，回答HTML先在进程池中批量转换为Markdown；
+    提供media（MediaDownloader）时，保存后下载回答中的图片并把Markdown中的链接改为本地路径。
+    其余参数与_save_result()相同。
+    """
+    markdown_contents = None
+    if converter is not None:
+        markdown_contents = await converter.convert_answers(result.get('answers') or [])
+    await asyncio.to_thread(_save_result, result, question_id, output_dir, sink, markdown_contents)
+    if media is not None:
+        await localize_media(media, question_id, result.get('answers') or [], output_dir)
+
+async def scrape_question(self, question_id, output_dir='output', manual_mode=False):
+    """使用Playwright爬取知乎问题数据
+    
+    Args:
+        question_id: 知乎问题ID
+        output_dir: 输出目录
+        manual_mode: 是否强制使用手动浏览器模式
+    
+    Returns:
+        成功爬取的答案数量
+    
+    浏览器由页面池管理，使用完毕后需调用close_browser()或使用async with释放
+    """
+    
+    # 缓存回放：只从页面缓存重建结果，不访问网络
+    if getattr(self, 'from_cache', False):
+        return await self.replay_question(question_id, output_dir)
+    
+    # 增量模式：只获取新增或更新过的回答并合并到上次的结果（iter_answers按爬取引擎获取回答）
+    if getattr(self, 'incremental', False):
+        return await self.incremental_update(question_id, output_dir)
+    
+    # 流式模式、深度爬取和断点续爬模式：回答边加载边写入磁盘（iter_answers按爬取引擎获取回答，
+    # HTTP引擎按接口游标分页并从断点中保存的游标继续）
+    if getattr(self, 'stream', False) or getattr(self, 'deep', False) or getattr(self, 'resume', False):
+        return await self.stream_question(question_id, output_dir)
+    
+    # HTTP引擎：直接请求接口，失败时回退到浏览器模式
+    if getattr(self, 'engine', 'browser') == 'http':
         try:
-            # 使用持久化目录启动浏览器
-            browser_context = await p.chromium.launch_persistent_context(
-                user_data_dir,
-                headless=False,
-                slow_mo=50,
-                args=browser_args,
-                viewport={"width": width, "height": height},
-                user_agent="Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/110.0.0.0 Safari/537.36",
-                locale="zh-CN",
-                timezone_id="Asia/Shanghai"
-            )
-            
-            # 创建页面
-            page = await browser_context.new_page()
-            
-            # 注入反检测脚本
-            await page.add_init_script(init_js_code)
-            
-            # 访问问题页面
-            await page.goto(question_url, wait_until="domcontentloaded")
-            print(f"已打开问题页面: {question_url}")
-            
-            # 等待页面加载
-            await asyncio.sleep(5)
-            
-            # 模拟人类行为 - 向下滚动页面
-            for i in range(8):  # 多滚动几次以加载更多内容
-                # 随机滚动距离
-                scroll_distance = random.randint(800, 1200)
-                await page.evaluate(f"window.scrollBy(0, {scroll_distance})")
-                # 随机等待时间
-                await asyncio.sleep(1 + random.random() * 2)
-            
-            # 点击所有"阅读全文"按钮
-            read_more_selectors = await page.evaluate("""
-                () => {
-                    // 查找所有按钮
-                    const buttons = Array.from(document.querySelectorAll('button'));
-                    // 过滤出包含"阅读全文"文本的按钮
-                    const readMoreButtons = buttons.filter(btn => 
-                        btn.textContent && btn.textContent.trim().includes('阅读全文')
-                    );
-                    
-                    // 返回这些按钮的XPath，以便后续点击
-                    return readMoreButtons.map(btn => {
-                        // 为每个按钮生成一个唯一的数据标记
-                        const id = 'click-' + Math.random().toString(36).substring(2, 10);
-                        btn.setAttribute('data-clickid', id);
-                        return id;
-                    });
-                }
-            """)
-            
-            # 点击每个被标记的按钮
-            for click_id in read_more_selectors:
-                try:
-                    # 使用data-clickid属性定位按钮
-                    button = await page.query_selector(f'button[data-clickid="{click_id}"]')
-                    if button:
-                        await button.click()
-                        await asyncio.sleep(0.5 + random.random() * 0.5)
-                except Exception as e:
-                    print(f"点击阅读全文按钮时出错: {str(e)}")
-                    pass
-            
-            # 再次向下滚动，确保内容完全加载
-            for i in range(3):
-                await page.evaluate(f"window.scrollBy(0, {random.randint(500, 800)})")
-                await asyncio.sleep(1 + random.random())
-            
-            # 提取数据
-            result = await page.evaluate("""() => {
-                function extractText(element) {
-                    return element ? element.textContent.trim() : '';
-                }
-                
-                // 获取问题标题
-                const title = document.querySelector('.QuestionHeader-title')?.textContent.trim();
-                
-                // 获取问题描述
-                const description = document.querySelector('.QuestionRichText')?.innerText.trim();
-                
-                // 获取回答列表
-                const answerItems = document.querySelectorAll('.List-item, .AnswerCard');
-                const answers = Array.from(answerItems).slice(0, 30).map(item => {
-                    // 作者信息
-                    const authorElement = item.querySelector('.AuthorInfo-name');
-                    const author = authorElement ? {
-                        name: authorElement.textContent.trim(),
-                        link: authorElement.querySelector('a')?.href
-                    } : { name: '匿名用户' };
-                    
-                    // 回答内容
-                    const contentElement = item.querySelector('.RichText');
-                    const content = contentElement ? contentElement.innerHTML : '';
-                    
-                    // 点赞数
-                    const upvoteElement = item.querySelector('button[aria-label="赞同"]');
-                    const upvoteText = upvoteElement?.textContent.trim().replace(/[^0-9]/g, '');
-                    const upvotes = upvoteText ? parseInt(upvoteText) || 0 : 0;
-                    
-                    // 评论数 - 使用标准的DOM API查找包含"评论"文本的按钮
-                    let commentCount = 0;
-                    const buttons = item.querySelectorAll('.Button--withIcon.Button--withLabel');
-                    for (const btn of buttons) {
-                        if (btn.textContent && btn.textContent.includes('评论')) {
-                            const commentText = btn.textContent.trim();
-                            const match = commentText.match(/\\d+/);
-                            if (match) {
-                                commentCount = parseInt(match[0]);
-                            }
-                            break;
-                        }
-                    }
-                    
-                    return {
-                        author,
-                        content,
-                        upvotes,
-                        comments: commentCount
-                    };
-                }).filter(answer => answer.content); // 过滤掉没有内容的回答
-                
-                return {
-                    title,
-                    description,
-                    answers,
-                    meta: {
-                        crawl_time: new Date().toISOString(),
-                        question_id: window.location.href.match(/question\\/(\\d+)/)?.[1],
-                        url: window.location.href
-                    }
-                };
-            }""")
-            
-            # 保存JSON结果
-            try:
-                # 保存为JSON文件
-                with open(output_file, 'w', encoding='utf-8') as f:
-                    json.dump(result, f, ensure_ascii=False, indent=2)
-                print(f"结果已保存到JSON文件: {output_file}")
-                
-                # 转换为Markdown格式并保存
-                md_content = _convert_to_markdown(result, question_id)
-                with open(output_md_file, 'w', encoding='utf-8') as f:
-                    f.write(md_content)
-                print(f"结果已保存到Markdown文件: {output_md_file}")
-                
-                # 同时在问题专属目录中保存一份
-                question_md_file = os.path.join(question_dir, "question.md")
-                with open(question_md_file, 'w', encoding='utf-8') as f:
-                    f.write(md_content)
-                
-            except Exception as e:
-                print(f"保存结果时出错: {str(e)}")
-            
-            # 关闭浏览器上下文
-            await browser_context.close()
-            
-            return result
+            return await _scrape_http(self, question_id, output_dir)
         except Exception as e:
-            print(f"爬取过程中出错: {str(e)}")
-            # 如果出错，尝试关闭浏览器上下文
-            try:
-                await browser_context.close()
-            except:
-                pass
-            raise e
+            print(f"HTTP引擎爬取失败，回退到浏览器模式: {str(e)}")
+    
+    # 强制使用手动模式时每次启动独立的浏览器
+    if manual_mode:
+        return await self._launch_browser_manually(question_id, output_dir)
+    
+    if getattr(self, 'llm', None) is None:
+        print("AI代理模式不可用，使用浏览器页面池爬取...")
+    else:
+        print("启动AI控制浏览器模式...")
+    
+    # 确保输出目录存在
+    os.makedirs(output_dir, exist_ok=True)
+    
+    # 从页面池借用页面，浏览器在多次调用之间保持运行
+    try:
+        return await _scrape_pooled(self, question_id, output_dir)
+    except Exception as e:
+        print(f"爬取过程中出错: {str(e)}")
+        raise e
 
-def _convert_to_markdown(data, question_id):
+async def _scrape_pooled(self, question_id, output_dir='output'):
+    """从页面池借用页面爬取问题
+    
+    页面崩溃、导航失败或超时时丢弃该页面，换一个新页面重新爬取整个问题。
+    
+    Args:
+        question_id: 知乎问题ID
+        output_dir: 输出目录
+    
+    Returns:
+        dict: 爬取结果
+    """
+    pool = await self.get_browser_pool()
+    
+    async def attempt():
+        async with pool.page() as page:
+            return await _scrape_page(self, page, question_id, output_dir)
+    
+    retry_policy = getattr(self, 'retry_policy', None) or RetryPolicy()
+    return await retry_policy.run("question", attempt, retry_on=(TIMEOUT, NAVIGATION), attempts=2)
+
+def _convert_to_markdown(data, question_id, markdown_contents=None):
     """将知乎问题数据转换为Markdown格式
     
     Args:
         data: 知乎问题数据(JSON格式)
         question_id: 知乎问题ID
+        markdown_contents: 可选的回答Markdown列表，与回答顺序相同，默认使用回答的原始HTML
         
     Returns:
         Markdown格式的字符串
@@ -416,32 +550,50 @@ def _convert_to_markdown(data, question_id):
         
         # 遍历回答
         for i, answer in enumerate(answers, 1):
-            # 获取作者信息
-            author = answer.get('author', {})
-            if isinstance(author, str):
-                author_name = author
-            else:
-                author_name = author.get('name', '匿名用户')
-            
-            # 获取回答内容
-            content = answer.get('content', '')
-            if not content:
-                content = answer.get('answer_content', '')
-            
-            # 获取赞同数
-            upvotes = answer.get('upvotes', answer.get('like_count', '未知'))
-            
-            # 添加回答标题
-            md.append(f"### 回答 {i} - {author_name}")
-            md.append("")
-            md.append(f"👍 点赞数: {upvotes}")
-            md.append("")
-            md.append(content)
-            md.append("")
-            md.append("---")
-            md.append("")
+            content = markdown_contents[i - 1] if markdown_contents else None
+            md.append(_answer_to_markdown(answer, i, content))
         
         return "\n".join(md)
     
     except Exception as e:
-        return f"# 生成Markdown时出错\n\n错误信息: {str(e)}\n\n原始数据:\n\n```\n{str(data)[:1000]}...\n```" 
\ No newline at end of file
+        return f"# 生成Markdown时出错\n\n错误信息: {str(e)}\n\n原始数据:\n\n```\n{str(data)[:1000]}...\n```" 
+
+def _answer_to_markdown(answer, index, content=None):
+    """将单个回答转换为Markdown片段
+    
+    Args:
+        answer: 回答记录
+        index: 回答序号（从1开始）
+        content: 可选的已转换为Markdown的回答内容，默认使用回答的原始HTML
+        
+    Returns:
+        Markdown格式的字符串，以分隔线结尾
+    """
+    # 获取作者信息
+    author = answer.get('author', {})
+    if isinstance(author, str):
+        author_name = author
+    else:
+        author_name = author.get('name', '匿名用户')
+    
+    # 获取回答内容
+    if content is None:
+        content = answer.get('content', '')
+    if not content:
+        content = answer.get('answer_content', '')
+    
+    # 获取赞同数
+    upvotes = answer.get('upvotes', answer.get('like_count', '未知'))
+    
+    # 添加回答标题
+    md = [
+        f"### 回答 {index} - {author_name}",
+        "",
+        f"👍 点赞数: {upvotes}",
+        "",
+        content,
+        "",
+        "---",
+        ""
+    ]
+    return "\n".join(md)
@@ -0,0 +1,88 @@
+"""
+回答去重 - 以知乎回答ID为键的哈希集合去重，多次提取和多次运行之间共享
+"""
+
+import hashlib
+
+def answer_key(answer):
+    """回答记录的稳定去重键
+
+    优先使用知乎回答ID（来自data-zop、itemid属性或接口数据），
+    没有ID时使用完整回答内容的哈希值。
+
+    Args:
+        answer: 回答记录
+
+    Returns:
+        str: 去重键，既没有ID也没有内容时返回None
+    """
+    answer_id = answer.get('id')
+    if answer_id:
+        return str(answer_id)
+    content = answer.get('content')
+    if not content:
+        return None
+    return "sha1:" + hashlib.sha1(content.encode('utf-8')).hexdigest()
+
+class SeenSet:
+    """已处理回答的去重集合
+
+    每次判断和插入都是O(1)，长时间爬取的总耗时与回答数量成线性关系。
+    传入已有的set时直接在其上修改，因此可以和Checkpoint.seen_ids共享，
+    使去重状态在HTTP引擎和浏览器的多次提取之间、以及断点续爬的多次运行之间保持一致。
+    """
+
+    def __init__(self, keys=None):
+        """初始化去重集合
+
+        Args:
+            keys: 可选的已处理去重键集合，传入set时共享同一个对象
+        """
+        self.keys = keys if isinstance(keys, set) else set(keys or ())
+
+    def __len__(self):
+        return len(self.keys)
+
+    def __contains__(self, answer):
+        return answer_key(answer) in self.keys
+
+    def add(self, answer):
+        """记录一个回答
+
+        Returns:
+            bool: 回答是第一次出现时返回True，重复或无法生成去重键时返回False
+        """
+        key = answer_key(answer)
+        if key is None or key in self.keys:
+            return False
+        self.keys.add(key)
+        return True
+
+    def filter(self, answers):
+        """过滤掉已经出现过的回答，并记录新回答
+
+        Yields:
+            dict: 第一次出现的回答记录
+        """
+        for answer in answers:
+            if self.add(answer):
+                yield answer
+
+def dedupe_answers(answers, keep='first'):
+    """按去重键去除重复的回答，保持原有顺序
+
+    Args:
+        answers: 回答记录列表
+        keep: "first"保留第一次出现的记录，"last"用后出现的记录替换之前的记录（位置不变）
+
+    Returns:
+        list: 去重后的回答列表，没有内容的回答会被丢弃
+    """
+    unique = {}
+    for answer in answers:
+        key = answer_key(answer)
+        if key is None:
+            continue
+        if keep == 'last' or key not in unique:
+            unique[key] = answer
+    return list(unique.values())
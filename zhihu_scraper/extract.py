@@ -0,0 +1,205 @@
+"""
+页面提取脚本 - 在浏览器中执行的回答提取JS代码
+"""
+
+# 从单个回答节点中提取回答记录，定义为可复用的函数
+EXTRACT_ANSWER_FN = """
+function extractAnswer(item) {
+    // 回答ID - 优先读取data-zop中的itemId，其次是name、itemid属性和回答链接
+    const contentItem = item.matches('.ContentItem') ? item : item.querySelector('.ContentItem');
+    let id = null;
+    if (contentItem) {
+        try {
+            const zop = JSON.parse(contentItem.getAttribute('data-zop') || '{}');
+            if (zop.itemId) {
+                id = String(zop.itemId);
+            }
+        } catch (e) {}
+        if (!id && contentItem.getAttribute('name')) {
+            id = contentItem.getAttribute('name');
+        }
+        if (!id && contentItem.getAttribute('itemid')) {
+            const itemIdMatch = contentItem.getAttribute('itemid').match(/(\\d+)\\/?$/);
+            id = itemIdMatch ? itemIdMatch[1] : null;
+        }
+    }
+    if (!id) {
+        const url = item.querySelector('meta[itemprop="url"]')?.content || '';
+        const idMatch = url.match(/answer\\/(\\d+)/);
+        id = idMatch ? idMatch[1] : null;
+    }
+
+    // 作者信息
+    const authorElement = item.querySelector('.AuthorInfo-name');
+    const author = authorElement ? {
+        name: authorElement.textContent.trim(),
+        link: authorElement.querySelector('a')?.href
+    } : { name: '匿名用户' };
+
+    // 回答内容
+    const contentElement = item.querySelector('.RichText');
+    const content = contentElement ? contentElement.innerHTML : '';
+
+    // 点赞数
+    const upvoteElement = item.querySelector('button[aria-label="赞同"]');
+    const upvoteText = upvoteElement?.textContent.trim().replace(/[^0-9]/g, '');
+    const upvotes = upvoteText ? parseInt(upvoteText) || 0 : 0;
+
+    // 评论数 - 使用标准的DOM API查找包含"评论"文本的按钮
+    let commentCount = 0;
+    const buttons = item.querySelectorAll('.Button--withIcon.Button--withLabel');
+    for (const btn of buttons) {
+        if (btn.textContent && btn.textContent.includes('评论')) {
+            const commentText = btn.textContent.trim();
+            const match = commentText.match(/\\d+/);
+            if (match) {
+                commentCount = parseInt(match[0]);
+            }
+            break;
+        }
+    }
+
+    // 创建和最后编辑时间
+    const createdTime = item.querySelector('meta[itemprop="dateCreated"]')?.content || null;
+    const updatedTime = item.querySelector('meta[itemprop="dateModified"]')?.content || null;
+
+    return {
+        id,
+        author,
+        content,
+        upvotes,
+        comments: commentCount,
+        created_time: createdTime,
+        updated_time: updatedTime
+    };
+}
+"""
+
+# 提取问题信息和页面中的全部回答
+EXTRACT_PAGE_JS = """() => {
+    """ + EXTRACT_ANSWER_FN + """
+    // 获取问题标题
+    const title = document.querySelector('.QuestionHeader-title')?.textContent.trim();
+
+    // 获取问题描述
+    const description = document.querySelector('.QuestionRichText')?.innerText.trim();
+
+    // 获取回答列表，.List-item和.AnswerCard可能匹配到同一个回答，按回答ID去重
+    const answerItems = document.querySelectorAll('.List-item, .AnswerCard');
+    const seen = new Set();
+    const answers = [];
+    for (const item of answerItems) {
+        const answer = extractAnswer(item);
+        if (!answer.content) {
+            continue; // 过滤掉没有内容的回答
+        }
+        const key = answer.id || answer.content;
+        if (seen.has(key)) {
+            continue;
+        }
+        seen.add(key);
+        answers.push(answer);
+    }
+
+    return {
+        title,
+        description,
+        answers,
+        meta: {
+            crawl_time: new Date().toISOString(),
+            question_id: window.location.href.match(/question\\/(\\d+)/)?.[1],
+            url: window.location.href
+        }
+    };
+}"""
+
+# 只提取上次调用之后新出现的回答，已提取的节点通过data-zs-extracted标记
+# 被折叠的回答在本次调用中只点击展开（通过data-zs-expanded标记），全文渲染后由下次调用提取，
+# 返回值中的expanding为本次展开的回答数量
+# virtualize为true时删除已提取的回答节点（保留最后几个作为滚动锚点），避免页面内存无限增长
+EXTRACT_NEW_ANSWERS_JS = """({virtualize, keep}) => {
+    """ + EXTRACT_ANSWER_FN + """
+    const items = document.querySelectorAll('.List-item:not([data-zs-extracted]), .AnswerCard:not([data-zs-extracted])');
+    const answers = [];
+    let expanding = 0;
+    for (const item of items) {
+        // 展开被折叠的回答：点击后内容不会立即替换为全文，此时提取只能得到截断的内容
+        const expandButton = item.querySelector('button.ContentItem-expandButton');
+        if (expandButton && !item.hasAttribute('data-zs-expanded') && !expandButton.textContent.includes('收起')) {
+            expandButton.click();
+            item.setAttribute('data-zs-expanded', '1');
+            expanding++;
+            continue;
+        }
+        const answer = extractAnswer(item);
+        if (!answer.content) {
+            // 内容尚未渲染，留到下次提取
+            continue;
+        }
+        item.setAttribute('data-zs-extracted', '1');
+        answers.push(answer);
+    }
+
+    let removed = 0;
+    if (virtualize) {
+        const extracted = document.querySelectorAll('.List-item[data-zs-extracted]');
+        for (let i = 0; i < extracted.length - keep; i++) {
+            extracted[i].remove();
+            removed++;
+        }
+    }
+
+    return {
+        title: document.querySelector('.QuestionHeader-title')?.textContent.trim(),
+        description: document.querySelector('.QuestionRichText')?.innerText.trim(),
+        answers,
+        expanding,
+        removed
+    };
+}"""
+
+# 展开回答后DOM连续无变化多久（毫秒）视为内容稳定，以及最长等待时间（毫秒）
+EXPAND_SETTLE_MS = 500
+EXPAND_TIMEOUT_MS = 5000
+
+# 在一次页面调用中展开全部被折叠的回答，等待DOM稳定后提取全部回答
+# 只返回可序列化的回答记录，不创建ElementHandle，调用次数与回答数量无关
+# settle: DOM在该时长（毫秒）内没有变化时视为展开完成；timeout: 最长等待时间（毫秒）
+EXPAND_AND_EXTRACT_JS = """async ({settle, timeout}) => {
+    // 点击"阅读全文"和折叠回答的展开按钮，已展开回答的"收起"按钮不点击
+    let expanded = 0;
+    for (const button of document.querySelectorAll('button')) {
+        const text = button.textContent ? button.textContent.trim() : '';
+        if (text.includes('收起')) {
+            continue;
+        }
+        if (text.includes('阅读全文') || button.classList.contains('ContentItem-expandButton')) {
+            button.click();
+            expanded++;
+        }
+    }
+
+    // 等待一次：DOM连续settle毫秒没有变化，或超过timeout毫秒
+    if (expanded > 0) {
+        await new Promise(resolve => {
+            let idleTimer = null;
+            const finish = () => {
+                observer.disconnect();
+                clearTimeout(idleTimer);
+                clearTimeout(hardTimer);
+                resolve();
+            };
+            const observer = new MutationObserver(() => {
+                clearTimeout(idleTimer);
+                idleTimer = setTimeout(finish, settle);
+            });
+            observer.observe(document.body, {childList: true, subtree: true, characterData: true});
+            idleTimer = setTimeout(finish, settle);
+            const hardTimer = setTimeout(finish, timeout);
+        });
+    }
+
+    const result = (""" + EXTRACT_PAGE_JS + """)();
+    result.expanded = expanded;
+    return result;
+}"""
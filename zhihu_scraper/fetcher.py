@@ -0,0 +1,214 @@
+"""
+HTTP爬取后端 - 不启动浏览器，直接通过知乎接口分页获取回答
+"""
+
+from datetime import datetime, timezone
+from zhihu_scraper.api import parse_answers_payload
+from zhihu_scraper.cache import cache_kind, question_id_from_url
+from zhihu_scraper.dedup import answer_key
+from zhihu_scraper.ratelimit import get_rate_limiter
+from zhihu_scraper.retry import NAVIGATION, TIMEOUT, RetryPolicy
+from zhihu_scraper.utils import parse_cookie_string
+
+try:
+    import httpx
+    httpx_available = True
+except ImportError:
+    httpx_available = False
+
+try:
+    import h2  # noqa: F401  httpx的HTTP/2支持依赖h2
+    http2_available = True
+except ImportError:
+    http2_available = False
+
+API_BASE = "https://www.zhihu.com/api/v4"
+
+# 回答接口需要显式声明返回的字段，否则不包含正文
+ANSWER_INCLUDE = (
+    "data[*].is_normal,content,voteup_count,comment_count,"
+    "created_time,updated_time,question,excerpt;data[*].author.follower_count"
+)
+
+DEFAULT_HEADERS = {
+    "user-agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/110.0.0.0 Safari/537.36",
+    "accept": "application/json, text/plain, */*",
+    "accept-language": "zh-CN,zh;q=0.9,en;q=0.8",
+    "referer": "https://www.zhihu.com/",
+    "x-requested-with": "fetch",
+}
+
+class HttpFetchError(Exception):
+    """HTTP后端无法获取数据（被拦截、需要登录或接口返回异常）"""
+
+    def __init__(self, message, status=None):
+        super().__init__(message)
+        self.status = status
+
+class HttpFetcher:
+    """基于httpx的知乎接口客户端
+
+    复用一个带连接池的AsyncClient（可用时启用HTTP/2长连接），
+    在多个问题之间共享连接，适合大批量爬取。
+    """
+
+    def __init__(self, cookie=None, max_connections=20, timeout=15, page_size=20, rate_limiter=None,
+                 retry_policy=None, cache=None):
+        """初始化HTTP客户端
+
+        Args:
+            cookie: 知乎Cookie字符串，格式与ZhihuBrowserScraper.zhihu_cookie相同
+            max_connections: 连接池最大连接数，默认20
+            timeout: 单次请求超时时间（秒），默认15秒
+            page_size: 每页请求的回答数量，默认20
+            rate_limiter: 可选的RateLimiter，默认使用进程内共享的限速器
+            retry_policy: 可选的RetryPolicy，请求超时或连接失败时重试
+            cache: 可选的PageCache，提供时把接口响应的原始内容写入缓存
+        """
+        if not httpx_available:
+            raise ImportError("HTTP引擎需要httpx库，请安装: pip install httpx[http2]")
+        self.cookies = parse_cookie_string(cookie)
+        self.max_connections = max_connections
+        self.timeout = timeout
+        self.page_size = page_size
+        self.rate_limiter = rate_limiter or get_rate_limiter()
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.cache = cache
+        self._client = None
+
+    @property
+    def client(self):
+        """延迟创建的httpx.AsyncClient"""
+        if self._client is None:
+            headers = dict(DEFAULT_HEADERS)
+            if "_xsrf" in self.cookies:
+                headers["x-xsrftoken"] = self.cookies["_xsrf"]
+            self._client = httpx.AsyncClient(
+                http2=http2_available,
+                headers=headers,
+                cookies=self.cookies,
+                timeout=self.timeout,
+                follow_redirects=True,
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections
+                )
+            )
+        return self._client
+
+    async def get_json(self, url, params=None):
+        """请求接口并解析JSON，超时和连接错误按重试策略重试
+
+        Args:
+            url: 接口地址
+            params: 可选的查询参数
+
+        Returns:
+            dict: 接口返回的JSON对象
+        """
+        # 被拦截时不在HTTP引擎中反复重试，交给调用方回退到浏览器
+        return await self.retry_policy.run(
+            "fetch", self._get_json, url, params, retry_on=(TIMEOUT, NAVIGATION), timeout=0
+        )
+
+    async def _get_json(self, url, params=None):
+        """发出一次请求并解析JSON，等待限速名额的时间不计入fetch超时"""
+        async with self.rate_limiter.request(url) as slot:
+            async with self.retry_policy.limit("fetch"):
+                response = await self.client.get(url, params=params)
+            slot.record(response.status_code)
+        if response.status_code == 429:
+            raise HttpFetchError(f"请求过于频繁（HTTP 429）: {url}", response.status_code)
+        if response.status_code in (401, 403):
+            raise HttpFetchError(f"请求被拒绝（HTTP {response.status_code}）: {url}", response.status_code)
+        if response.status_code != 200:
+            raise HttpFetchError(f"接口返回异常状态码 {response.status_code}: {url}", response.status_code)
+        try:
+            data = response.json()
+        except ValueError:
+            raise HttpFetchError(f"接口返回的不是JSON（可能触发了验证）: {url}")
+        if self.cache is not None:
+            request_url = str(response.url)
+            await self.cache.aput(request_url, response.content, cache_kind(request_url), question_id_from_url(request_url))
+        return data
+
+    async def fetch_question_info(self, question_id):
+        """获取问题标题和描述
+
+        Returns:
+            dict: 包含title和description的字典
+        """
+        data = await self.get_json(f"{API_BASE}/questions/{question_id}", params={"include": "detail,answer_count"})
+        return {
+            "title": data.get("title"),
+            "description": data.get("detail") or "",
+            "answer_count": data.get("answer_count")
+        }
+
+    async def iter_answer_pages(self, question_id, cursor=None, order="default"):
+        """按接口分页依次获取回答
+
+        Args:
+            question_id: 知乎问题ID
+            cursor: 可选的分页游标（上一页返回的paging.next），用于从断点继续
+            order: 排序方式，"default"为默认排序，"updated"为按时间排序
+
+        Yields:
+            tuple: (本页回答记录列表, 分页信息字典)
+        """
+        if cursor:
+            url, params = cursor, None
+        else:
+            url = f"{API_BASE}/questions/{question_id}/feeds"
+            params = {"include": ANSWER_INCLUDE, "limit": self.page_size, "offset": 0, "order": order, "platform": "desktop"}
+        while url:
+            payload = await self.get_json(url, params=params)
+            answers, paging = parse_answers_payload(payload)
+            yield answers, paging
+            if paging.get("is_end") or not paging.get("next"):
+                break
+            # 后续页直接使用接口返回的next链接（已包含游标参数）
+            url = paging["next"]
+            params = None
+
+    async def fetch_question(self, question_id, max_answers=None):
+        """获取问题及其回答
+
+        Args:
+            question_id: 知乎问题ID
+            max_answers: 最多获取的回答数量，None表示不限制
+
+        Returns:
+            dict: 与浏览器模式结构相同的爬取结果
+        """
+        info = await self.fetch_question_info(question_id)
+        answers = {}
+        async for page_answers, paging in self.iter_answer_pages(question_id):
+            for answer in page_answers:
+                key = answer_key(answer)
+                if key is not None:
+                    answers[key] = answer
+            print(f"HTTP引擎: 问题 {question_id} 已获取 {len(answers)} 个回答")
+            if max_answers and len(answers) >= max_answers:
+                break
+
+        answer_list = list(answers.values())
+        if max_answers:
+            answer_list = answer_list[:max_answers]
+        return {
+            "title": info["title"],
+            "description": info["description"],
+            "answers": answer_list,
+            "meta": {
+                "crawl_time": datetime.now(timezone.utc).isoformat(),
+                "question_id": str(question_id),
+                "url": f"https://www.zhihu.com/question/{question_id}",
+                "source": "http"
+            }
+        }
+
+    async def close(self):
+        """关闭连接池"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
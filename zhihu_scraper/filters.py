@@ -0,0 +1,88 @@
+"""
+资源过滤模块 - 爬取时拦截图片、字体、媒体和第三方脚本等无关请求
+"""
+
+import fnmatch
+from urllib.parse import urlparse
+
+# 默认拦截的资源类型（只保留文本内容时不需要）
+BLOCKED_RESOURCE_TYPES = {"image", "media", "font"}
+
+# 默认拦截的URL模式（统计、广告和监控服务）
+BLOCKED_URL_PATTERNS = [
+    "*hm.baidu.com*",
+    "*google-analytics.com*",
+    "*googletagmanager.com*",
+    "*doubleclick.net*",
+    "*datarangers.com*",
+    "*zhihu-web-analytics*",
+    "*/sc-profiler*",
+    "*/za-js-sdk*",
+]
+
+# 知乎自身的域名，这些域名下的脚本不会被当作第三方脚本拦截
+FIRST_PARTY_DOMAINS = ("zhihu.com", "zhimg.com")
+
+class ResourceFilter:
+    """基于context.route()的请求过滤器
+
+    按资源类型或URL模式中止请求，允许名单中的URL始终放行。
+    """
+
+    def __init__(self, block_types=None, block_patterns=None, allow_patterns=None, block_third_party_scripts=True):
+        """初始化过滤器
+
+        Args:
+            block_types: 要拦截的资源类型集合，默认为图片、媒体和字体
+            block_patterns: 要拦截的URL通配符模式列表，默认为常见统计服务
+            allow_patterns: 始终放行的URL通配符模式列表，优先级最高
+            block_third_party_scripts: 是否拦截非知乎域名的脚本，默认True
+        """
+        self.block_types = set(BLOCKED_RESOURCE_TYPES if block_types is None else block_types)
+        self.block_patterns = list(BLOCKED_URL_PATTERNS if block_patterns is None else block_patterns)
+        self.allow_patterns = list(allow_patterns or [])
+        self.block_third_party_scripts = block_third_party_scripts
+        self.blocked = 0
+        self.allowed = 0
+
+    def should_block(self, url, resource_type):
+        """判断请求是否需要拦截
+
+        Args:
+            url: 请求地址
+            resource_type: Playwright的资源类型，如image、script、xhr
+
+        Returns:
+            bool: 需要拦截时返回True
+        """
+        if any(fnmatch.fnmatch(url, pattern) for pattern in self.allow_patterns):
+            return False
+        if resource_type in self.block_types:
+            return True
+        if any(fnmatch.fnmatch(url, pattern) for pattern in self.block_patterns):
+            return True
+        if self.block_third_party_scripts and resource_type == "script":
+            host = urlparse(url).hostname or ""
+            if not any(host == domain or host.endswith("." + domain) for domain in FIRST_PARTY_DOMAINS):
+                return True
+        return False
+
+    async def handle(self, route):
+        """路由处理函数，拦截或放行请求"""
+        request = route.request
+        if self.should_block(request.url, request.resource_type):
+            self.blocked += 1
+            await route.abort()
+        else:
+            self.allowed += 1
+            # 交给其他路由处理函数或直接发出请求
+            await route.fallback()
+
+    async def install(self, context):
+        """在浏览器上下文上安装过滤器
+
+        Args:
+            context: playwright浏览器上下文
+        """
+        await context.route("**/*", self.handle)
+        print(f"已启用资源过滤，拦截类型: {', '.join(sorted(self.block_types))}")
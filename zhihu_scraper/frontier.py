@@ -0,0 +1,353 @@
+"""
+持久化任务队列 - 基于SQLite（WAL模式）的问题爬取队列，支持多个工作进程同时消费
+"""
+
+import asyncio
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from zhihu_scraper.utils import parse_question_id
+
+# 任务状态
+PENDING = "pending"
+LEASED = "leased"
+DONE = "done"
+FAILED = "failed"
+
+# 批量入队时每个事务写入的任务数量
+ENQUEUE_CHUNK_SIZE = 10000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    question_id TEXT PRIMARY KEY,
+    priority INTEGER NOT NULL DEFAULT 0,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    available_at REAL NOT NULL DEFAULT 0,
+    lease_token TEXT,
+    leased_by TEXT,
+    last_error TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_ready ON jobs (status, priority DESC, available_at, created_at);
+"""
+
+class JobQueue:
+    """问题爬取队列
+
+    任务以问题ID为主键，重复入队不会产生重复任务。取出任务（lease）时在
+    同一个写事务中把任务标记为leased并设置可见性超时，多个进程同时取任务
+    也不会拿到同一个问题；工作进程崩溃后，超时的任务会重新变为可取。
+    任务完成后调用ack()，失败后调用retry()按指数退避重新排队，
+    超过最大尝试次数的任务标记为failed。
+    """
+
+    def __init__(self, path='output/queue.db', visibility_timeout=1800, max_attempts=5,
+                 retry_delay=60, busy_timeout=30):
+        """打开（必要时创建）队列数据库
+
+        Args:
+            path: SQLite数据库文件路径，默认output/queue.db
+            visibility_timeout: 任务被取出后的租约时长（秒），超时未确认的任务会被重新分配，默认1800秒
+            max_attempts: 单个任务的最大尝试次数，默认5
+            retry_delay: 失败重试的基础延迟（秒），每次失败后翻倍，默认60秒
+            busy_timeout: 等待其他进程释放写锁的最长时间（秒），默认30秒
+        """
+        self.path = path
+        self.visibility_timeout = visibility_timeout
+        self.max_attempts = max(1, max_attempts)
+        self.retry_delay = retry_delay
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # 手动管理事务（isolation_level=None），取任务时使用BEGIN IMMEDIATE提前获取写锁
+        # 工作进程在线程池中访问数据库（等待写锁时不阻塞事件循环），同一连接上的操作由_lock串行化
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, timeout=busy_timeout, isolation_level=None, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+
+    def _transaction(self):
+        """开始一个立即获取写锁的事务"""
+        self.conn.execute("BEGIN IMMEDIATE")
+
+    def enqueue(self, question_ids, priority=0, requeue=False):
+        """把问题加入队列
+
+        已存在的任务只会提高优先级；requeue为True时已完成或失败的任务也会重新排队。
+
+        Args:
+            question_ids: 知乎问题ID或URL的可迭代对象
+            priority: 优先级，数值越大越先被取出，默认0
+            requeue: 是否重新排队已完成或失败的任务，默认False
+
+        Returns:
+            int: 成功解析并写入的问题数量（包括已存在的问题）
+        """
+        if requeue:
+            conflict = (
+                "UPDATE SET priority = MAX(jobs.priority, excluded.priority), "
+                "status = CASE WHEN jobs.status = 'leased' THEN jobs.status ELSE 'pending' END, "
+                "attempts = CASE WHEN jobs.status = 'leased' THEN jobs.attempts ELSE 0 END, "
+                "available_at = excluded.available_at, updated_at = excluded.updated_at"
+            )
+        else:
+            conflict = "UPDATE SET priority = MAX(jobs.priority, excluded.priority)"
+        sql = (
+            "INSERT INTO jobs (question_id, priority, status, available_at, created_at, updated_at) "
+            f"VALUES (?, ?, 'pending', ?, ?, ?) ON CONFLICT(question_id) DO {conflict}"
+        )
+
+        count = 0
+        invalid = 0
+        chunk = []
+
+        def flush():
+            now = time.time()
+            with self._lock:
+                self._transaction()
+                try:
+                    self.conn.executemany(sql, [(question_id, priority, now, now, now) for question_id in chunk])
+                    self.conn.execute("COMMIT")
+                except BaseException:
+                    self.conn.execute("ROLLBACK")
+                    raise
+            chunk.clear()
+
+        for item in question_ids:
+            try:
+                chunk.append(parse_question_id(str(item).strip()))
+            except ValueError:
+                invalid += 1
+                continue
+            count += 1
+            if len(chunk) >= ENQUEUE_CHUNK_SIZE:
+                flush()
+        if chunk:
+            flush()
+        if invalid:
+            print(f"跳过 {invalid} 个无法识别的问题ID")
+        return count
+
+    def lease(self, limit=1, worker=None):
+        """取出最多limit个可执行的任务
+
+        按优先级从高到低、入队时间从早到晚取出待执行的任务，以及租约已过期的任务；
+        租约过期且已达到最大尝试次数的任务标记为failed，不再取出。
+
+        Args:
+            limit: 最多取出的任务数量，默认1
+            worker: 可选的工作进程标识，记录在任务中便于排查
+
+        Returns:
+            list: 任务字典列表，包含question_id、priority、attempts和lease_token
+        """
+        with self._lock:
+            now = time.time()
+            self._transaction()
+            try:
+                # 租约过期说明持有者没有确认也没有调用retry()（通常是工作进程崩溃），
+                # 已达到最大尝试次数的任务不再分配，否则每次都会崩溃的问题会被无限重试
+                expired = self.conn.execute(
+                    "UPDATE jobs SET status = 'failed', lease_token = NULL, last_error = ?, updated_at = ? "
+                    "WHERE status = 'leased' AND available_at <= ? AND attempts >= ?",
+                    ("租约过期且已达到最大尝试次数", now, now, self.max_attempts)
+                ).rowcount
+                # 待执行任务和租约过期的任务分别查询，都能按索引顺序读取，只扫描limit行
+                rows = []
+                for status in (PENDING, LEASED):
+                    rows.extend(self.conn.execute(
+                        "SELECT question_id, priority, attempts, available_at, created_at FROM jobs "
+                        "WHERE status = ? AND available_at <= ? "
+                        "ORDER BY priority DESC, available_at, created_at LIMIT ?",
+                        (status, now, limit)
+                    ).fetchall())
+                rows.sort(key=lambda row: (-row["priority"], row["available_at"], row["created_at"]))
+                rows = rows[:limit]
+                jobs = []
+                for row in rows:
+                    token = uuid.uuid4().hex
+                    self.conn.execute(
+                        "UPDATE jobs SET status = 'leased', attempts = attempts + 1, available_at = ?, "
+                        "lease_token = ?, leased_by = ?, updated_at = ? WHERE question_id = ?",
+                        (now + self.visibility_timeout, token, worker, now, row["question_id"])
+                    )
+                    jobs.append({
+                        "question_id": row["question_id"],
+                        "priority": row["priority"],
+                        "attempts": row["attempts"] + 1,
+                        "lease_token": token
+                    })
+                self.conn.execute("COMMIT")
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+        if expired:
+            print(f"{expired} 个任务租约过期且已达到最大尝试次数 {self.max_attempts}，标记为失败")
+        return jobs
+
+    def _update_leased(self, job, sql, params):
+        """只在租约仍属于当前持有者时更新任务，返回是否更新成功"""
+        with self._lock:
+            cursor = self.conn.execute(
+                f"UPDATE jobs SET {sql}, updated_at = ? WHERE question_id = ? AND lease_token = ? AND status = 'leased'",
+                (*params, time.time(), job["question_id"], job["lease_token"])
+            )
+            return cursor.rowcount > 0
+
+    def extend(self, job, timeout=None):
+        """延长任务的租约，用于耗时较长的爬取
+
+        Returns:
+            bool: 租约仍属于当前持有者时返回True
+        """
+        timeout = timeout or self.visibility_timeout
+        return self._update_leased(job, "available_at = ?", (time.time() + timeout,))
+
+    def ack(self, job):
+        """确认任务已完成
+
+        Returns:
+            bool: 租约仍属于当前持有者时返回True（租约过期后被重新分配的任务返回False）
+        """
+        return self._update_leased(job, "status = 'done', lease_token = NULL, last_error = NULL", ())
+
+    def retry(self, job, error=None, delay=None):
+        """任务失败后重新排队，超过最大尝试次数时标记为失败
+
+        Args:
+            job: lease()返回的任务
+            error: 错误信息
+            delay: 可选的重试延迟（秒），默认按retry_delay指数退避
+
+        Returns:
+            str: 任务的新状态（pending或failed），租约已失效时返回None
+        """
+        if job["attempts"] >= self.max_attempts:
+            updated = self._update_leased(
+                job, "status = 'failed', lease_token = NULL, last_error = ?", (error,)
+            )
+            return FAILED if updated else None
+        if delay is None:
+            delay = self.retry_delay * (2 ** (job["attempts"] - 1))
+        updated = self._update_leased(
+            job, "status = 'pending', lease_token = NULL, last_error = ?, available_at = ?",
+            (error, time.time() + delay)
+        )
+        return PENDING if updated else None
+
+    def next_available_in(self):
+        """距离下一个任务可以被取出还有多少秒，没有未完成的任务时返回None"""
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT MIN(available_at) FROM jobs WHERE status IN ('pending', 'leased')"
+            ).fetchone()
+        if row[0] is None:
+            return None
+        return max(0.0, row[0] - time.time())
+
+    def stats(self):
+        """统计各状态的任务数量
+
+        Returns:
+            dict: 状态到任务数量的映射
+        """
+        counts = {PENDING: 0, LEASED: 0, DONE: 0, FAILED: 0}
+        with self._lock:
+            for row in self.conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status"):
+                counts[row[0]] = row[1]
+        return counts
+
+    def close(self):
+        """关闭数据库连接"""
+        self.conn.close()
+
+async def drain_queue(self, job_queue, output_dir='output', concurrency=3, wait=False, poll_interval=5):
+    """持续从队列中取出问题并爬取，直到队列为空
+
+    每个问题爬取期间定期延长租约；成功后确认任务，失败后按退避策略重新排队。
+    多个进程可以同时消费同一个队列，队列操作在线程池中执行，等待其他进程的写锁时
+    不会阻塞正在爬取的页面。
+
+    Args:
+        job_queue: JobQueue实例
+        output_dir: 输出目录
+        concurrency: 同时爬取的问题数量，默认3
+        wait: 队列为空时是否继续等待新任务，默认False（所有任务完成后返回）
+        poll_interval: 没有可取任务时的轮询间隔（秒），默认5秒
+
+    Returns:
+        dict: 本进程的统计信息，包含done、retried和failed
+    """
+    from zhihu_scraper.batch import _scrape_one
+
+    os.makedirs(output_dir, exist_ok=True)
+    concurrency = max(1, concurrency)
+    if self.browser is None:
+        self.pool_size = max(self.pool_size, concurrency)
+    worker = f"{socket.gethostname()}:{os.getpid()}"
+    stats = {"done": 0, "retried": 0, "failed": 0}
+    running = set()
+    print(f"工作进程 {worker} 开始消费队列 {job_queue.path}，并发数: {concurrency}")
+
+    async def heartbeat(job):
+        # 每隔三分之一个租约时长续租一次
+        interval = max(1, job_queue.visibility_timeout / 3)
+        while True:
+            await asyncio.sleep(interval)
+            if not await asyncio.to_thread(job_queue.extend, job):
+                print(f"问题 {job['question_id']} 的租约已失效")
+                return
+
+    async def run_job(job):
+        question_id = job["question_id"]
+        keepalive = asyncio.create_task(heartbeat(job))
+        start = time.time()
+        try:
+            await _scrape_one(self, question_id, output_dir)
+        except Exception as e:
+            status = await asyncio.to_thread(job_queue.retry, job, str(e))
+            if status == FAILED:
+                stats["failed"] += 1
+                print(f"问题 {question_id} 第{job['attempts']}次爬取失败，已放弃: {str(e)}")
+            else:
+                stats["retried"] += 1
+                print(f"问题 {question_id} 第{job['attempts']}次爬取失败，稍后重试: {str(e)}")
+        else:
+            await asyncio.to_thread(job_queue.ack, job)
+            stats["done"] += 1
+            print(f"问题 {question_id} 爬取完成，耗时 {round(time.time() - start, 2)} 秒")
+        finally:
+            keepalive.cancel()
+
+    try:
+        while True:
+            free = concurrency - len(running)
+            jobs = await asyncio.to_thread(job_queue.lease, free, worker) if free > 0 else []
+            for job in jobs:
+                running.add(asyncio.create_task(run_job(job)))
+
+            if running:
+                # 有任务完成或到达轮询间隔时再尝试取新任务
+                done, _ = await asyncio.wait(running, timeout=poll_interval, return_when=asyncio.FIRST_COMPLETED)
+                running -= done
+                continue
+
+            next_in = await asyncio.to_thread(job_queue.next_available_in)
+            if next_in is None and not wait:
+                break
+            await asyncio.sleep(min(poll_interval, next_in) if next_in is not None else poll_interval)
+    finally:
+        if running:
+            await asyncio.gather(*running, return_exceptions=True)
+
+    counts = await asyncio.to_thread(job_queue.stats)
+    print(f"队列已清空: 本进程完成 {stats['done']} 个，重试 {stats['retried']} 个，放弃 {stats['failed']} 个")
+    print(f"队列状态: {counts}")
+    return stats
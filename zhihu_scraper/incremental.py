@@ -0,0 +1,169 @@
+"""
+增量爬取模块 - 只获取新增或更新过的回答，并合并到上次的爬取结果中
+"""
+
+import os
+from datetime import datetime, timezone
+from zhihu_scraper.columnar import _to_timestamp
+from zhihu_scraper.crawler import _asave_result
+from zhihu_scraper.dedup import answer_key
+from zhihu_scraper.utils import load_json
+
+# 连续遇到这么多个已知且未更新的回答后停止翻页（约为接口一页的数量）
+UNCHANGED_STOP_COUNT = 20
+
+def index_answers(result):
+    """按回答的去重键建立索引
+
+    Args:
+        result: 爬取结果
+
+    Returns:
+        dict: 去重键（回答ID，没有ID时为内容哈希）到回答记录的映射
+    """
+    index = {}
+    for answer in (result or {}).get('answers', []):
+        key = answer_key(answer)
+        if key is not None:
+            index[key] = answer
+    return index
+
+def _updated_epoch(answer):
+    """回答的最后编辑时间（Unix时间戳，秒）
+
+    页面提取得到ISO时间字符串，接口和页面初始数据得到Unix时间戳，统一后才能比较。
+    """
+    parsed = _to_timestamp(answer.get('updated_time'))
+    return int(parsed.timestamp()) if parsed is not None else None
+
+def is_unchanged(answer, known):
+    """判断回答是否已存在且没有更新
+
+    优先比较最后编辑时间（统一为Unix时间戳，与来源是页面还是接口无关），
+    两边都没有编辑时间时比较回答内容。
+
+    Args:
+        answer: 新获取的回答记录
+        known: index_answers()返回的已知回答索引
+
+    Returns:
+        bool: 回答已知且未更新时返回True
+    """
+    previous = known.get(answer_key(answer))
+    if previous is None:
+        return False
+    if answer.get('updated_time') is not None or previous.get('updated_time') is not None:
+        return _updated_epoch(answer) == _updated_epoch(previous)
+    return answer.get('content') == previous.get('content')
+
+def merge_answers(previous, delta, question_info=None):
+    """将新增和更新的回答合并到上次的结果中
+
+    已有回答原位更新，新回答排在最前面（按获取顺序，即最新的在前）。
+
+    Args:
+        previous: 上次的爬取结果
+        delta: 新增或更新过的回答列表
+        question_info: 可选的最新问题信息（title、description）
+
+    Returns:
+        tuple: (合并后的爬取结果, 统计信息字典)
+    """
+    previous = previous or {}
+    delta_by_id = {}
+    new_answers = []
+    for answer in delta:
+        if answer.get('id'):
+            delta_by_id[answer['id']] = answer
+        else:
+            new_answers.append(answer)
+
+    merged = []
+    updated = 0
+    for answer in previous.get('answers', []):
+        replacement = delta_by_id.pop(answer.get('id'), None) if answer.get('id') else None
+        if replacement is not None:
+            updated += 1
+            merged.append(replacement)
+        else:
+            merged.append(answer)
+
+    # 没有ID的回答按内容去重
+    known_contents = {answer.get('content') for answer in merged}
+    new_answers = [answer for answer in new_answers if answer.get('content') not in known_contents]
+    added = list(delta_by_id.values()) + new_answers
+
+    stats = {
+        'added': len(added),
+        'updated': updated,
+        'unchanged': len(merged) - updated,
+        'crawl_time': datetime.now(timezone.utc).isoformat()
+    }
+
+    question_info = question_info or {}
+    meta = dict(previous.get('meta') or {})
+    meta['incremental'] = stats
+    result = {
+        'title': question_info.get('title') or previous.get('title'),
+        'description': question_info.get('description') or previous.get('description', ''),
+        'answers': added + merged,
+        'meta': meta
+    }
+    return result, stats
+
+async def incremental_update(self, question_id, output_dir='output'):
+    """增量爬取问题
+
+    读取上次保存的 zhihu_question_<问题ID>.json，按时间顺序获取回答，
+    连续遇到一页已知且未更新的回答后停止翻页，然后合并并保存结果。
+    没有上次结果时等同于完整爬取。
+
+    Args:
+        question_id: 知乎问题ID
+        output_dir: 输出目录
+
+    Returns:
+        dict: 合并后的爬取结果
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    output_file = os.path.join(output_dir, f"zhihu_question_{question_id}.json")
+    previous = load_json(output_file)
+    known = index_answers(previous)
+    if previous:
+        print(f"增量爬取问题 {question_id}，上次结果中有 {len(known)} 个回答")
+    else:
+        print(f"未找到问题 {question_id} 的上次结果，执行完整爬取")
+
+    question_info = {}
+    delta = []
+    unchanged_run = 0
+    scanned = 0
+    answers = self.iter_answers(question_id, question_info, order='updated')
+    try:
+        async for answer in answers:
+            scanned += 1
+            if is_unchanged(answer, known):
+                unchanged_run += 1
+                if unchanged_run >= UNCHANGED_STOP_COUNT:
+                    break
+            else:
+                unchanged_run = 0
+                delta.append(answer)
+    finally:
+        await answers.aclose()
+
+    result, stats = merge_answers(previous, delta, question_info)
+    if not result.get('meta', {}).get('question_id'):
+        result['meta'].update({
+            'question_id': str(question_id),
+            'url': f"https://www.zhihu.com/question/{question_id}"
+        })
+    print(f"增量爬取完成: 扫描 {scanned} 个回答，新增 {stats['added']} 个，更新 {stats['updated']} 个")
+    await _asave_result(
+        result, question_id, output_dir,
+        converter=getattr(self, 'markdown_converter', None), media=getattr(self, 'media_downloader', None)
+    )
+    # Parquet数据集只追加新增和更新的回答，读取时按answer_id取crawl_time最新的一行
+    if getattr(self, 'sink', None) is not None:
+        await self.sink.aadd(delta, question_id, result.get('title'))
+    return result
@@ -0,0 +1,98 @@
+"""
+增量加载模块 - 滚动页面直到回答数量不再增长
+"""
+
+import asyncio
+
+# 页面中单个回答对应的元素
+ANSWER_SELECTOR = ".AnswerItem"
+
+# 读取当前回答数量和页面高度
+PAGE_STATE_JS = """(selector) => ({
+    count: document.querySelectorAll(selector).length,
+    height: document.documentElement.scrollHeight
+})"""
+
+# 滚动到底部后通过MutationObserver等待页面增长，超时返回false
+WAIT_FOR_GROWTH_JS = """({selector, count, height, timeout}) => new Promise(resolve => {
+    const grown = () => document.querySelectorAll(selector).length > count
+        || document.documentElement.scrollHeight > height;
+    window.scrollTo(0, document.documentElement.scrollHeight);
+    if (grown()) {
+        resolve(true);
+        return;
+    }
+    const observer = new MutationObserver(() => {
+        if (grown()) {
+            observer.disconnect();
+            clearTimeout(timer);
+            resolve(true);
+        }
+    });
+    observer.observe(document.body, {childList: true, subtree: true});
+    const timer = setTimeout(() => {
+        observer.disconnect();
+        resolve(grown());
+    }, timeout);
+})"""
+
+async def get_page_state(page, selector=ANSWER_SELECTOR):
+    """读取页面中的回答数量和页面高度
+
+    Returns:
+        dict: 包含count和height的字典
+    """
+    return await page.evaluate(PAGE_STATE_JS, selector)
+
+async def wait_for_growth(page, state, timeout, selector=ANSWER_SELECTOR):
+    """滚动到底部并等待页面增长
+
+    Args:
+        page: playwright页面对象
+        state: get_page_state()返回的上一次页面状态
+        timeout: 最长等待时间（秒）
+        selector: 用于计数的回答元素选择器
+
+    Returns:
+        bool: 在超时前回答数量或页面高度发生变化时返回True
+    """
+    return await page.evaluate(WAIT_FOR_GROWTH_JS, {
+        "selector": selector,
+        "count": state["count"],
+        "height": state["height"],
+        "timeout": int(timeout * 1000)
+    })
+
+async def scroll_until_stable(page, target_count=None, max_time=60, idle_timeout=4, selector=ANSWER_SELECTOR):
+    """滚动页面加载回答，页面不再增长时立即停止
+
+    每次滚动到底部后等待回答数量或页面高度变化，而不是固定休眠；
+    在idle_timeout内没有新内容、达到目标数量或超过最长时间时结束。
+
+    Args:
+        page: playwright页面对象
+        target_count: 目标回答数量，达到后停止，None表示加载到底
+        max_time: 最长加载时间（秒），默认60秒
+        idle_timeout: 等待新内容的最长时间（秒），默认4秒
+        selector: 用于计数的回答元素选择器
+
+    Returns:
+        int: 加载完成后页面中的回答数量
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + max_time
+    state = await get_page_state(page, selector)
+    start_count = state["count"]
+
+    while not (target_count and state["count"] >= target_count):
+        remaining = deadline - loop.time()
+        if remaining <= 0:
+            print(f"加载超过最长时间 {max_time} 秒，停止滚动")
+            break
+
+        if not await wait_for_growth(page, state, min(idle_timeout, remaining), selector):
+            break
+        state = await get_page_state(page, selector)
+
+    print(f"滚动加载完成，回答数量: {start_count} -> {state['count']}")
+    return state["count"]
@@ -0,0 +1,370 @@
+"""
+媒体下载模块 - 并发下载回答中的图片和视频封面，按内容哈希保存并把Markdown中的链接改为本地路径
+"""
+
+import asyncio
+import hashlib
+import html
+import json
+import mimetypes
+import os
+import re
+import sqlite3
+import threading
+import time
+from urllib.parse import urlsplit
+from zhihu_scraper.fetcher import DEFAULT_HEADERS
+from zhihu_scraper.retry import NAVIGATION, TIMEOUT, RetryPolicy
+from zhihu_scraper.utils import write_atomic
+
+try:
+    import httpx
+    httpx_available = True
+except ImportError:
+    httpx_available = False
+
+# 下载状态
+DONE = "done"
+FAILED = "failed"
+
+# 回答HTML中的图片和视频标签，以及标签中可能保存媒体地址的属性（按优先级排列）
+MEDIA_TAG_PATTERN = re.compile(r"<(?:img|video)\b[^>]*>", re.I)
+ATTRIBUTE_PATTERN = re.compile(r'([\w-]+)\s*=\s*"([^"]*)"')
+MEDIA_ATTRIBUTES = ("data-original", "data-actualsrc", "data-default-watermark-src", "src", "poster", "data-poster")
+
+# Content-Type无法识别时使用的扩展名
+DEFAULT_EXTENSION = ".bin"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS media (
+    url TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    digest TEXT,
+    path TEXT,
+    size INTEGER,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    fetched_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS media_digest ON media (digest);
+"""
+
+class BudgetExceeded(Exception):
+    """媒体总大小达到上限，不再下载新文件"""
+
+def _normalize_url(url):
+    """补全协议相对地址，丢弃内联的data:地址"""
+    url = html.unescape(url or "").strip()
+    if not url or url.startswith("data:"):
+        return None
+    if url.startswith("//"):
+        return "https:" + url
+    return url if url.startswith(("http://", "https://")) else None
+
+def collect_media_urls(content):
+    """收集回答HTML中的图片和视频封面地址
+
+    每个标签取优先级最高的真实地址（懒加载图片的src是占位图），跳过公式图片。
+
+    Args:
+        content: 回答HTML
+
+    Returns:
+        list: 去重后的媒体地址，保持出现顺序
+    """
+    urls = {}
+    for tag in MEDIA_TAG_PATTERN.findall(content or ""):
+        attributes = dict(ATTRIBUTE_PATTERN.findall(tag))
+        if attributes.get("eeimg") or "equation?tex=" in attributes.get("src", ""):
+            continue
+        for name in MEDIA_ATTRIBUTES:
+            url = _normalize_url(attributes.get(name))
+            if url:
+                urls[url] = None
+                break
+    return list(urls)
+
+def _extension(url, content_type):
+    """根据Content-Type或URL确定文件扩展名"""
+    mime = (content_type or "").split(";")[0].strip().lower()
+    if mime == "image/jpeg":
+        return ".jpg"
+    extension = mimetypes.guess_extension(mime) if mime else None
+    if extension:
+        return extension
+    suffix = os.path.splitext(urlsplit(url).path)[1].lower()
+    return suffix if 1 < len(suffix) <= 6 else DEFAULT_EXTENSION
+
+class MediaDownloader:
+    """按内容寻址的媒体下载器
+
+    文件保存在 <root>/<摘要前两位>/<SHA-256><扩展名>，不同回答和问题中的相同图片只保存一份。
+    <root>/index.db记录每个地址的下载结果，再次运行时跳过已下载的地址、重试失败的地址。
+    所有下载共用一个httpx连接池，同一主机同时进行的下载数量受per_host限制，
+    媒体总大小达到max_bytes后不再下载新文件。
+    """
+
+    def __init__(self, root='output/media', max_bytes=None, per_host=4, concurrency=16, timeout=30,
+                 max_file_bytes=50 * 1024 * 1024, retry_policy=None):
+        """初始化下载器
+
+        Args:
+            root: 媒体目录，默认output/media
+            max_bytes: 媒体目录的总大小上限（字节），None表示不限制
+            per_host: 每个主机同时进行的下载数量，默认4
+            concurrency: 同时进行的下载总数，默认16
+            timeout: 单次下载的超时时间（秒），默认30秒
+            max_file_bytes: 单个文件的大小上限（字节），默认50MB
+            retry_policy: 可选的RetryPolicy，超时或连接失败时重试
+        """
+        if not httpx_available:
+            raise ImportError("下载媒体需要httpx库，请安装: pip install httpx[http2]")
+        self.root = root
+        self.max_bytes = max_bytes
+        self.per_host = per_host
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.max_file_bytes = max_file_bytes
+        self.retry_policy = retry_policy or RetryPolicy()
+        os.makedirs(root, exist_ok=True)
+        # 索引在线程池中读写（不阻塞事件循环），同一连接上的操作由_lock串行化
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(
+            os.path.join(root, "index.db"), timeout=30, isolation_level=None, check_same_thread=False
+        )
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+        # 已占用的空间：相同内容只计算一次
+        self.used = self.conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM (SELECT MAX(size) AS size FROM media WHERE status = ? GROUP BY digest)",
+            (DONE,)
+        ).fetchone()[0]
+        self.downloaded = 0
+        # 本次运行已保存的内容摘要到相对路径，并发下载相同内容时只计算和写入一次
+        self._stored = {}
+        self._client = None
+        self._hosts = {}
+        self._semaphore = None
+
+    @property
+    def client(self):
+        """延迟创建的httpx.AsyncClient"""
+        if self._client is None:
+            headers = dict(DEFAULT_HEADERS)
+            headers["accept"] = "image/avif,image/webp,image/*,*/*;q=0.8"
+            self._client = httpx.AsyncClient(
+                headers=headers,
+                timeout=self.timeout,
+                follow_redirects=True,
+                limits=httpx.Limits(max_connections=self.concurrency, max_keepalive_connections=self.concurrency)
+            )
+        return self._client
+
+    @property
+    def semaphore(self):
+        """延迟创建的全局并发信号量（需在事件循环中创建）"""
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+        return self._semaphore
+
+    def _host_semaphore(self, url):
+        host = urlsplit(url).hostname or url
+        if host not in self._hosts:
+            self._hosts[host] = asyncio.Semaphore(self.per_host)
+        return self._hosts[host]
+
+    def _budget_left(self):
+        return None if self.max_bytes is None else self.max_bytes - self.used
+
+    def lookup(self, url):
+        """已下载的地址对应的相对路径，未下载或文件丢失时返回None"""
+        with self._lock:
+            row = self.conn.execute("SELECT path FROM media WHERE url = ? AND status = ?", (url, DONE)).fetchone()
+        if row and os.path.exists(os.path.join(self.root, row[0])):
+            return row[0]
+        return None
+
+    def _lookup_digest(self, digest):
+        """已保存的相同内容对应的相对路径，没有或文件丢失时返回None"""
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT path FROM media WHERE digest = ? AND status = ? LIMIT 1", (digest, DONE)
+            ).fetchone()
+        if row and os.path.exists(os.path.join(self.root, row[0])):
+            return row[0]
+        return None
+
+    def _record(self, url, status, digest=None, path=None, size=None, error=None):
+        with self._lock:
+            self.conn.execute(
+                "INSERT INTO media (url, status, digest, path, size, attempts, error, fetched_at) "
+                "VALUES (?, ?, ?, ?, ?, 1, ?, ?) ON CONFLICT(url) DO UPDATE SET status = excluded.status, "
+                "digest = excluded.digest, path = excluded.path, size = excluded.size, "
+                "attempts = media.attempts + 1, error = excluded.error, fetched_at = excluded.fetched_at",
+                (url, status, digest, path, size, error, time.time())
+            )
+
+    async def _fetch(self, url):
+        """下载一个地址的完整内容，超过单文件上限或剩余空间时中止"""
+        async with self.client.stream("GET", url) as response:
+            if response.status_code != 200:
+                raise httpx.HTTPStatusError(
+                    f"HTTP {response.status_code}: {url}", request=response.request, response=response
+                )
+            limit = self.max_file_bytes
+            left = self._budget_left()
+            declared = int(response.headers.get("content-length") or 0)
+            if left is not None and declared > left:
+                raise BudgetExceeded(f"剩余空间不足（{declared} > {left} 字节）: {url}")
+            body = bytearray()
+            async for chunk in response.aiter_bytes():
+                body.extend(chunk)
+                if limit and len(body) > limit:
+                    raise ValueError(f"文件超过单文件上限 {limit} 字节: {url}")
+            return bytes(body), response.headers.get("content-type")
+
+    async def download(self, url):
+        """下载一个地址并按内容哈希保存
+
+        Returns:
+            str: 相对于媒体目录的文件路径，失败或超出总大小上限时返回None
+        """
+        path = await asyncio.to_thread(self.lookup, url)
+        if path is not None:
+            return path
+        async with self.semaphore, self._host_semaphore(url):
+            left = self._budget_left()
+            if left is not None and left <= 0:
+                return None
+            try:
+                body, content_type = await self.retry_policy.run(
+                    "fetch", self._fetch, url, retry_on=(TIMEOUT, NAVIGATION)
+                )
+            except BudgetExceeded:
+                # 未记录为失败，提高上限后再次运行时重新下载
+                return None
+            except Exception as e:
+                print(f"下载媒体失败 {url}: {str(e)}")
+                await asyncio.to_thread(self._record, url, FAILED, error=str(e))
+                return None
+
+        digest = hashlib.sha256(body).hexdigest()
+        stored = None if digest in self._stored else await asyncio.to_thread(self._lookup_digest, digest)
+        # 查询索引期间其他下载可能已保存了相同内容，在同一步中重新检查_stored
+        if digest in self._stored:
+            path = self._stored[digest]
+        elif stored is not None:
+            # 相同内容已经保存过，不占用新的空间
+            path = stored
+        else:
+            left = self._budget_left()
+            if left is not None and len(body) > left:
+                return None
+            # 写入前先计入已用空间，并发的下载不会同时占用同一份剩余空间
+            self.used += len(body)
+            self.downloaded += len(body)
+            path = os.path.join(digest[:2], digest + _extension(url, content_type))
+            self._stored[digest] = path
+            full_path = os.path.join(self.root, path)
+            os.makedirs(os.path.dirname(full_path), exist_ok=True)
+            await asyncio.to_thread(write_atomic, full_path, body)
+        await asyncio.to_thread(self._record, url, DONE, digest, path, len(body))
+        return path
+
+    async def download_all(self, urls):
+        """并发下载一组地址
+
+        Args:
+            urls: 媒体地址列表
+
+        Returns:
+            dict: 下载成功的地址到相对路径（相对于媒体目录）的映射
+        """
+        urls = list(dict.fromkeys(urls))
+        paths = await asyncio.gather(*(self.download(url) for url in urls))
+        return {url: path for url, path in zip(urls, paths) if path is not None}
+
+    async def close(self):
+        """关闭连接池，下次下载时重新创建；索引数据库为自动提交模式，保持打开以便继续使用"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+        self._hosts = {}
+        self._semaphore = None
+
+def rewrite_links(text, mapping, media_root, base_dir):
+    """把文本中的媒体地址替换为相对于base_dir的本地路径
+
+    Args:
+        text: Markdown文本
+        mapping: 媒体地址到相对路径（相对于media_root）的映射
+        media_root: 媒体目录
+        base_dir: Markdown文件所在目录
+
+    Returns:
+        str: 替换后的文本
+    """
+    # 先替换较长的地址，避免一个地址是另一个地址的前缀时被部分替换
+    for url in sorted(mapping, key=len, reverse=True):
+        local = os.path.relpath(os.path.join(media_root, mapping[url]), base_dir).replace(os.sep, "/")
+        text = text.replace(url, local)
+        if url.startswith("https:"):
+            # 保留原始HTML时页面中是协议相对地址
+            text = text.replace(url[len("https:"):], local)
+    return text
+
+def _localize_files(files, mapping, media_root):
+    """改写Markdown文件中的媒体地址，每个文件按自己所在目录计算相对路径"""
+    for file_path in files:
+        if not os.path.exists(file_path):
+            continue
+        with open(file_path, 'r', encoding='utf-8') as f:
+            text = f.read()
+        rewritten = rewrite_links(text, mapping, media_root, os.path.dirname(file_path))
+        if rewritten != text:
+            # 原子替换会断开与其他文件的硬链接，两个文件的相对路径不同，需要各自保存
+            write_atomic(file_path, rewritten)
+
+async def localize_media(downloader, question_id, answers, output_dir='output', markdown_files=None):
+    """下载回答中的媒体并把Markdown中的链接改为本地路径
+
+    地址与本地文件的对应关系保存在 output/<问题ID>/media.json。
+
+    Args:
+        downloader: MediaDownloader实例
+        question_id: 知乎问题ID
+        answers: 回答记录列表，或已收集的媒体地址列表
+        output_dir: 输出目录
+        markdown_files: 需要改写的Markdown文件，默认为问题的.md文件和<问题ID>/question.md
+
+    Returns:
+        dict: 媒体地址到相对路径（相对于媒体目录）的映射
+    """
+    urls = []
+    for item in answers:
+        if isinstance(item, dict):
+            urls.extend(collect_media_urls(item.get('content')))
+        else:
+            urls.append(item)
+    urls = list(dict.fromkeys(urls))
+    if not urls:
+        return {}
+
+    mapping = await downloader.download_all(urls)
+    print(f"问题 {question_id}: 已保存 {len(mapping)}/{len(urls)} 个媒体文件到 {downloader.root}")
+    if markdown_files is None:
+        markdown_files = [
+            os.path.join(output_dir, f"zhihu_question_{question_id}.md"),
+            os.path.join(output_dir, str(question_id), "question.md")
+        ]
+    await asyncio.to_thread(_localize_files, markdown_files, mapping, downloader.root)
+
+    question_dir = os.path.join(output_dir, str(question_id))
+    os.makedirs(question_dir, exist_ok=True)
+    record = {
+        url: os.path.relpath(os.path.join(downloader.root, path), question_dir).replace(os.sep, "/")
+        for url, path in mapping.items()
+    }
+    await asyncio.to_thread(write_atomic, os.path.join(question_dir, "media.json"),
+                            json.dumps(record, ensure_ascii=False, indent=2))
+    return mapping
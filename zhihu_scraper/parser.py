@@ -0,0 +1,335 @@
+"""
+离线解析模块 - 从保存的页面HTML和接口JSON快照中重新提取回答，不需要浏览器
+"""
+
+import gzip
+import json
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from urllib.parse import urljoin
+from bs4 import BeautifulSoup
+from zhihu_scraper.api import parse_answers_payload, parse_initial_data
+from zhihu_scraper.cache import ANSWERS, HTML, PageCache, extract_initial_data, question_id_from_url
+from zhihu_scraper.dedup import dedupe_answers
+
+try:
+    import lxml  # noqa: F401
+    HTML_PARSER = "lxml"
+except ImportError:
+    HTML_PARSER = "html.parser"
+
+ZHIHU_URL = "https://www.zhihu.com"
+
+# 快照文件扩展名，.gz压缩的文件会先解压
+HTML_EXTENSIONS = (".html", ".htm")
+JSON_EXTENSIONS = (".json",)
+
+# 从快照文件名中推断问题ID
+FILENAME_ID_PATTERN = re.compile(r"(\d{5,})")
+
+def _number(text):
+    """与页面提取脚本一致：去掉非数字字符后转换为整数"""
+    digits = re.sub(r"[^0-9]", "", text or "")
+    return int(digits) if digits else 0
+
+def parse_answer_item(item):
+    """从单个回答节点中提取回答记录，与EXTRACT_ANSWER_FN的规则相同
+
+    Args:
+        item: BeautifulSoup的回答节点（.List-item或.AnswerCard）
+
+    Returns:
+        dict: 回答记录
+    """
+    # 回答ID - 优先读取data-zop中的itemId，其次是name、itemid属性和回答链接
+    classes = item.get("class") or []
+    content_item = item if "ContentItem" in classes else item.select_one(".ContentItem")
+    answer_id = None
+    if content_item is not None:
+        try:
+            zop = json.loads(content_item.get("data-zop") or "{}")
+            if zop.get("itemId"):
+                answer_id = str(zop["itemId"])
+        except (ValueError, AttributeError):
+            pass
+        if not answer_id and content_item.get("name"):
+            answer_id = content_item.get("name")
+        if not answer_id and content_item.get("itemid"):
+            match = re.search(r"(\d+)/?$", content_item.get("itemid"))
+            answer_id = match.group(1) if match else None
+    if not answer_id:
+        url_meta = item.select_one('meta[itemprop="url"]')
+        match = re.search(r"answer/(\d+)", url_meta.get("content", "") if url_meta else "")
+        answer_id = match.group(1) if match else None
+
+    # 作者信息
+    author_element = item.select_one(".AuthorInfo-name")
+    if author_element is not None:
+        link = author_element.select_one("a[href]")
+        author = {
+            "name": author_element.get_text().strip(),
+            "link": urljoin(ZHIHU_URL, link["href"]) if link else None
+        }
+    else:
+        author = {"name": "匿名用户"}
+
+    # 回答内容
+    content_element = item.select_one(".RichText")
+    content = content_element.decode_contents() if content_element is not None else ""
+
+    # 点赞数
+    upvote_element = item.select_one('button[aria-label="赞同"]')
+    upvotes = _number(upvote_element.get_text().strip()) if upvote_element is not None else 0
+
+    # 评论数 - 第一个包含"评论"文本的按钮
+    comments = 0
+    for button in item.select(".Button--withIcon.Button--withLabel"):
+        text = button.get_text()
+        if "评论" in text:
+            match = re.search(r"\d+", text)
+            if match:
+                comments = int(match.group(0))
+            break
+
+    # 创建和最后编辑时间
+    created = item.select_one('meta[itemprop="dateCreated"]')
+    updated = item.select_one('meta[itemprop="dateModified"]')
+
+    return {
+        "id": answer_id,
+        "author": author,
+        "content": content,
+        "upvotes": upvotes,
+        "comments": comments,
+        "created_time": created.get("content") if created is not None else None,
+        "updated_time": updated.get("content") if updated is not None else None
+    }
+
+def parse_question_html(html, question_id=None):
+    """解析问题页面的HTML
+
+    DOM中的回答按页面提取脚本的规则提取，js-initialData中服务端渲染的回答
+    补充DOM中缺少的回答（没有执行脚本的原始HTML只有这部分数据）。
+
+    Args:
+        html: 页面HTML
+        question_id: 可选的问题ID，未提供时从页面的canonical链接中读取
+
+    Returns:
+        dict: 包含question_id、title、description和answers的解析结果
+    """
+    soup = BeautifulSoup(html, HTML_PARSER)
+    if question_id is None:
+        canonical = soup.select_one('link[rel="canonical"], meta[property="og:url"]')
+        if canonical is not None:
+            question_id = question_id_from_url(canonical.get("href") or canonical.get("content"))
+
+    title = soup.select_one(".QuestionHeader-title")
+    description = soup.select_one(".QuestionRichText")
+    answers = []
+    for item in soup.select(".List-item, .AnswerCard"):
+        answer = parse_answer_item(item)
+        if answer["content"]:
+            answers.append(answer)
+
+    parsed = {
+        "question_id": question_id,
+        "title": title.get_text().strip() if title is not None else None,
+        "description": description.get_text().strip() if description is not None else "",
+        "answers": answers
+    }
+
+    initial_data = extract_initial_data(html)
+    if initial_data and question_id is None:
+        # 没有canonical链接时，初始数据中只有一个问题即为页面对应的问题
+        questions = json.loads(initial_data).get("initialState", {}).get("entities", {}).get("questions") or {}
+        if len(questions) == 1:
+            question_id = parsed["question_id"] = next(iter(questions))
+    if initial_data and question_id:
+        info, initial_answers = parse_initial_data(initial_data, question_id)
+        parsed["title"] = parsed["title"] or info["title"]
+        parsed["description"] = parsed["description"] or info["description"]
+        parsed["answers"] = dedupe_answers(answers + initial_answers)
+    return parsed
+
+def parse_json_snapshot(data, question_id=None):
+    """解析接口JSON快照：回答列表接口、问题信息接口或页面初始数据
+
+    Returns:
+        dict: 解析结果，无法识别的JSON返回None
+    """
+    if not isinstance(data, dict):
+        return None
+    if "initialState" in data:
+        if question_id is None:
+            return None
+        info, answers = parse_initial_data(data, question_id)
+        return {"question_id": question_id, **info, "answers": answers}
+    if isinstance(data.get("data"), list):
+        answers, paging = parse_answers_payload(data)
+        if question_id is None:
+            urls = [paging.get("next"), paging.get("previous")] + [answer.get("url") for answer in answers]
+            question_id = next(filter(None, map(question_id_from_url, filter(None, urls))), None)
+        return {"question_id": question_id, "title": None, "description": "", "answers": answers}
+    if data.get("type") == "question" or ("title" in data and "detail" in data):
+        return {
+            "question_id": question_id or (str(data["id"]) if data.get("id") else None),
+            "title": data.get("title"),
+            "description": data.get("detail") or "",
+            "answers": []
+        }
+    return None
+
+def read_snapshot(path):
+    """读取快照文件，.gz文件会先解压"""
+    with open(path, "rb") as f:
+        body = f.read()
+    if path.endswith(".gz"):
+        body = gzip.decompress(body)
+    return body.decode("utf-8", errors="replace")
+
+def snapshot_kind(path):
+    """根据文件扩展名判断快照类型，不是快照文件时返回None"""
+    name = path[:-3] if path.endswith(".gz") else path
+    if name.endswith(HTML_EXTENSIONS):
+        return HTML
+    if name.endswith(JSON_EXTENSIONS):
+        return ANSWERS
+    return None
+
+def parse_snapshot(path, kind=None, question_id=None):
+    """解析一个快照文件
+
+    Args:
+        path: 快照文件路径（.html、.json，可以是.gz压缩文件）
+        kind: 可选的快照类型（html、answers、info），默认按扩展名判断
+        question_id: 可选的问题ID，默认从内容或文件名中推断
+
+    Returns:
+        dict: 包含question_id、title、description和answers的解析结果，无法识别时返回None
+    """
+    kind = kind or snapshot_kind(path)
+    text = read_snapshot(path)
+    if kind == HTML:
+        parsed = parse_question_html(text, question_id)
+    else:
+        parsed = parse_json_snapshot(json.loads(text), question_id)
+    if parsed is not None and not parsed["question_id"]:
+        match = FILENAME_ID_PATTERN.search(os.path.basename(path))
+        parsed["question_id"] = match.group(1) if match else None
+    return parsed
+
+def _parse_task(task):
+    """进程池任务：解析快照，出错时返回错误信息而不是中断整批"""
+    path, kind, question_id = task
+    try:
+        return path, parse_snapshot(path, kind, question_id), None
+    except Exception as e:
+        return path, None, f"{type(e).__name__}: {e}"
+
+def collect_snapshots(source):
+    """收集需要解析的快照
+
+    Args:
+        source: 页面缓存目录（包含index.db）、快照目录或单个快照文件
+
+    Returns:
+        list: (文件路径, 快照类型, 问题ID)元组列表，类型和问题ID未知时为None
+    """
+    if os.path.isfile(source):
+        return [(source, None, None)]
+    if os.path.exists(os.path.join(source, "index.db")):
+        cache = PageCache(source, ttl=None, max_bytes=None)
+        try:
+            return [
+                (path, kind, question_id)
+                for question_id in cache.questions()
+                for _, kind, path in cache.snapshot_files(question_id)
+            ]
+        finally:
+            cache.close()
+
+    tasks = []
+    for root, dirs, files in os.walk(source):
+        dirs.sort()
+        for name in sorted(files):
+            path = os.path.join(root, name)
+            if snapshot_kind(path) is not None:
+                tasks.append((path, None, None))
+    return tasks
+
+def merge_snapshots(parts):
+    """把同一问题的多个快照解析结果合并为爬取结果
+
+    问题信息取第一个非空值，回答按ID去重，后出现的记录（接口数据）覆盖先出现的记录。
+    """
+    question_id = parts[0]["question_id"]
+    title = next((part["title"] for part in parts if part.get("title")), None)
+    description = next((part["description"] for part in parts if part.get("description")), "")
+    answers = [answer for part in parts for answer in part["answers"]]
+    return {
+        "title": title,
+        "description": description,
+        "answers": [answer for answer in dedupe_answers(answers, keep='last') if answer.get("content")],
+        "meta": {
+            "crawl_time": datetime.now(timezone.utc).isoformat(),
+            "question_id": str(question_id),
+            "url": f"https://www.zhihu.com/question/{question_id}",
+            "source": "snapshot"
+        }
+    }
+
+def reparse_snapshots(source, output_dir='output', workers=None, save=True, sink=None, converter=None):
+    """在进程池中重新解析一批快照，并按问题导出结果
+
+    Args:
+        source: 页面缓存目录（包含index.db）、快照目录或单个快照文件
+        output_dir: 输出目录
+        workers: 解析进程数，默认为CPU核数
+        save: 是否保存JSON和Markdown文件，默认True
+        sink: 可选的ParquetSink，提供时把回答同时追加到Parquet数据集
+        converter: 可选的MarkdownConverter，提供时把回答HTML转换为Markdown后写入.md文件
+
+    Returns:
+        dict: 问题ID到爬取结果的映射，按快照顺序排列
+    """
+    from zhihu_scraper.crawler import _save_result
+
+    tasks = collect_snapshots(source)
+    if not tasks:
+        print(f"{source} 中没有可解析的快照")
+        return {}
+    workers = max(1, workers or os.cpu_count() or 1)
+    print(f"开始离线解析 {len(tasks)} 个快照，进程数: {workers}")
+
+    parts = {}
+    failed = 0
+    chunksize = max(1, min(64, len(tasks) // (workers * 4)))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for path, parsed, error in executor.map(_parse_task, tasks, chunksize=chunksize):
+            if error:
+                failed += 1
+                print(f"解析快照失败 {path}: {error}")
+            elif parsed is None or not parsed["question_id"]:
+                print(f"跳过无法识别的快照: {path}")
+            else:
+                parts.setdefault(str(parsed["question_id"]), []).append(parsed)
+
+    results = {}
+    for question_id, question_parts in parts.items():
+        result = merge_snapshots(question_parts)
+        results[question_id] = result
+        if save:
+            os.makedirs(output_dir, exist_ok=True)
+            markdown_contents = converter.convert_sync(
+                answer['content'] for answer in result['answers']
+            ) if converter is not None else None
+            _save_result(result, question_id, output_dir, sink=sink, markdown_contents=markdown_contents)
+        elif sink is not None:
+            sink.write_result(result, question_id)
+    if sink is not None:
+        sink.flush()
+    print(f"离线解析完成: {len(results)} 个问题，{failed} 个快照解析失败")
+    return results
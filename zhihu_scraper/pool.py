@@ -0,0 +1,164 @@
+"""
+浏览器页面池 - 在多次爬取之间复用同一个浏览器和页面
+"""
+
+import asyncio
+from contextlib import asynccontextmanager
+from playwright.async_api import async_playwright
+
+class BrowserPool:
+    """浏览器页面池
+
+    首次使用时才启动浏览器，之后所有爬取共用这一个浏览器上下文。
+    空闲页面会被复用，取出前进行健康检查，导航次数达到上限后回收重建，
+    浏览器意外关闭时会在下次取用时自动重启。
+    """
+
+    def __init__(self, launch_context, size=3, max_uses=50, health_timeout=5):
+        """初始化页面池
+
+        Args:
+            launch_context: 启动浏览器上下文的协程函数，参数为async_playwright实例
+            size: 同时借出的页面数量上限，默认3
+            max_uses: 单个页面最多使用的次数，超过后关闭并重建，默认50
+            health_timeout: 健康检查的超时时间（秒），默认5秒
+        """
+        self.launch_context = launch_context
+        self.size = max(1, size)
+        self.max_uses = max(1, max_uses)
+        self.health_timeout = health_timeout
+        self.context = None
+        self.launches = 0
+        self._playwright = None
+        self._idle = []
+        self._uses = {}
+        self._semaphore = asyncio.Semaphore(self.size)
+        self._lock = asyncio.Lock()
+
+    @property
+    def started(self):
+        """浏览器是否已启动"""
+        return self.context is not None
+
+    async def start(self):
+        """启动浏览器（已启动时直接返回）
+
+        Returns:
+            浏览器上下文
+        """
+        async with self._lock:
+            if self.context is None:
+                if self._playwright is None:
+                    self._playwright = await async_playwright().start()
+                context = await self.launch_context(self._playwright)
+                context.on("close", lambda *args: self._on_context_close(context))
+                self.context = context
+                self.launches += 1
+                print(f"浏览器页面池已启动（第{self.launches}次），页面上限: {self.size}")
+            return self.context
+
+    def _on_context_close(self, context):
+        """浏览器上下文被关闭（包括崩溃）时清空池中的页面"""
+        if self.context is context:
+            self.context = None
+            self._idle.clear()
+            self._uses.clear()
+
+    async def _is_healthy(self, page):
+        """检查页面是否仍然可用"""
+        if page.is_closed():
+            return False
+        try:
+            await asyncio.wait_for(page.evaluate("1"), self.health_timeout)
+            return True
+        except Exception:
+            return False
+
+    async def _discard(self, page):
+        """关闭并移除页面"""
+        self._uses.pop(page, None)
+        try:
+            if not page.is_closed():
+                await page.close()
+        except Exception:
+            pass
+
+    async def acquire(self):
+        """从池中借出一个健康的页面，池满时等待
+
+        Returns:
+            playwright页面对象
+        """
+        await self._semaphore.acquire()
+        try:
+            context = await self.start()
+            while self._idle:
+                page = self._idle.pop()
+                if await self._is_healthy(page):
+                    return page
+                await self._discard(page)
+            page = await context.new_page()
+            self._uses[page] = 0
+            return page
+        except BaseException:
+            self._semaphore.release()
+            raise
+
+    async def release(self, page, healthy=True):
+        """归还页面，达到使用上限或不健康的页面会被关闭
+
+        Args:
+            page: 借出的页面
+            healthy: 页面是否处于可复用状态
+        """
+        try:
+            uses = self._uses.get(page, 0) + 1
+            if not healthy or self.context is None or page.is_closed() or uses >= self.max_uses:
+                await self._discard(page)
+            else:
+                self._uses[page] = uses
+                self._idle.append(page)
+        finally:
+            self._semaphore.release()
+
+    @asynccontextmanager
+    async def page(self):
+        """以上下文管理器的方式借用页面
+
+        用法:
+            async with pool.page() as page:
+                await page.goto(url)
+        """
+        page = await self.acquire()
+        healthy = True
+        try:
+            yield page
+        except GeneratorExit:
+            # 使用页面的异步生成器被提前关闭，页面本身仍然可用
+            raise
+        except BaseException:
+            # 出错的页面可能停留在异常状态，直接丢弃
+            healthy = False
+            raise
+        finally:
+            await self.release(page, healthy)
+
+    async def close(self):
+        """关闭所有页面、浏览器上下文和Playwright"""
+        async with self._lock:
+            for page in list(self._idle):
+                await self._discard(page)
+            self._idle.clear()
+            if self.context is not None:
+                context = self.context
+                self.context = None
+                try:
+                    await context.close()
+                except Exception:
+                    pass
+            if self._playwright is not None:
+                try:
+                    await self._playwright.stop()
+                except Exception:
+                    pass
+                self._playwright = None
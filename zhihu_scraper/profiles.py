@@ -0,0 +1,71 @@
+"""
+爬取配置档 - 把首页预热、模拟人类行为和slow_mo等延迟作为一个整体开关
+"""
+
+import random
+
+# 知乎登录状态的Cookie名称
+LOGIN_COOKIE = "z_c0"
+
+# warm_up: "always"每次都先访问首页，"auto"只在浏览器上下文未登录时访问首页
+# human_behavior: 模拟人类行为的次数，0不模拟，1只在问题页面模拟，2在首页和问题页面都模拟
+# slow_mo: 每个Playwright操作之间的延迟范围（毫秒）
+PROFILES = {
+    "fast": {
+        "warm_up": "auto",
+        "human_behavior": 0,
+        "slow_mo": (0, 0),
+    },
+    "balanced": {
+        "warm_up": "auto",
+        "human_behavior": 1,
+        "slow_mo": (50, 50),
+    },
+    "cautious": {
+        "warm_up": "always",
+        "human_behavior": 2,
+        "slow_mo": (100, 250),
+    },
+}
+
+DEFAULT_PROFILE = "balanced"
+
+def get_profile(name=None):
+    """获取配置档
+
+    Args:
+        name: 配置档名称（fast、balanced、cautious），默认为balanced
+
+    Returns:
+        dict: 配置档的设置（副本，包含name）
+    """
+    name = name or DEFAULT_PROFILE
+    if name not in PROFILES:
+        raise ValueError(f"不支持的配置档: {name}，可选: {', '.join(PROFILES)}")
+    profile = dict(PROFILES[name])
+    profile["name"] = name
+    return profile
+
+def pick_slow_mo(profile):
+    """按配置档随机选择slow_mo（毫秒）"""
+    low, high = profile["slow_mo"]
+    return random.randint(low, high)
+
+async def needs_warm_up(profile, context):
+    """判断打开问题页面前是否需要先访问首页
+
+    Args:
+        profile: get_profile()返回的配置档
+        context: playwright浏览器上下文
+
+    Returns:
+        bool: 需要先访问首页时返回True
+    """
+    if profile["warm_up"] == "always":
+        return True
+    # 已有登录状态的上下文直接访问问题页面
+    try:
+        cookies = await context.cookies("https://www.zhihu.com")
+    except Exception:
+        return True
+    return not any(cookie.get("name") == LOGIN_COOKIE for cookie in cookies)
@@ -0,0 +1,248 @@
+"""
+限速模块 - 按主机的令牌桶限速和AIMD自适应并发控制，进程内所有页面和请求共用
+"""
+
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from urllib.parse import urlsplit
+
+# 表示被限流或拦截的HTTP状态码
+THROTTLE_STATUS_CODES = (403, 429)
+
+class HostLimiter:
+    """单个主机的限速状态
+
+    令牌桶控制每秒发出的请求数，并发上限控制同时进行的请求数，两者都按AIMD调整：
+    请求成功且响应及时时缓慢增加（加法），被限流（403/429）或响应过慢时减半（乘法），
+    被限流时还会暂停该主机的所有请求一段时间。
+    """
+
+    def __init__(self, host, rate=2.0, min_rate=0.2, max_rate=10.0, concurrency=4,
+                 min_concurrency=1, max_concurrency=16, slow_threshold=10.0, cooldown=30.0):
+        """初始化限速状态
+
+        Args:
+            host: 主机名
+            rate: 初始速率（每秒请求数）
+            min_rate: 速率下限
+            max_rate: 速率上限
+            concurrency: 初始并发上限
+            min_concurrency: 并发下限
+            max_concurrency: 并发上限的最大值
+            slow_threshold: 响应时间超过该值（秒）视为过慢
+            cooldown: 被限流后暂停请求的基础时长（秒），连续被限流时翻倍
+        """
+        self.host = host
+        self.rate = rate
+        self.min_rate = min_rate
+        self.max_rate = max(max_rate, rate)
+        self.concurrency = float(concurrency)
+        self.min_concurrency = min_concurrency
+        self.max_concurrency = max(max_concurrency, concurrency)
+        self.slow_threshold = slow_threshold
+        self.cooldown = cooldown
+        # 令牌桶容量为1秒的请求量，允许短时间的突发
+        self.tokens = 1.0
+        self.updated_at = time.monotonic()
+        self.in_flight = 0
+        self.paused_until = 0.0
+        self.throttled = 0
+        self.requests = 0
+
+    @property
+    def burst(self):
+        """令牌桶容量"""
+        return max(1.0, self.rate)
+
+    def _refill(self, now):
+        """按经过的时间补充令牌"""
+        self.tokens = min(self.burst, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def _wait_time(self, now):
+        """距离可以发出下一个请求还需要等待的时间（秒），0表示可以立即发出"""
+        if now < self.paused_until:
+            return self.paused_until - now
+        self._refill(now)
+        if self.in_flight >= int(self.concurrency):
+            # 等待其他请求完成，完成时间未知，短暂轮询
+            return 0.05
+        if self.tokens < 1:
+            return (1 - self.tokens) / self.rate
+        return 0
+
+    async def acquire(self):
+        """等待令牌和并发名额"""
+        while True:
+            wait = self._wait_time(time.monotonic())
+            if wait <= 0:
+                self.tokens -= 1
+                self.in_flight += 1
+                self.requests += 1
+                return
+            await asyncio.sleep(wait)
+
+    def release(self):
+        """归还并发名额"""
+        self.in_flight = max(0, self.in_flight - 1)
+
+    def on_success(self, latency=None):
+        """请求成功：响应及时时加法增加速率和并发，过慢时乘法减小"""
+        if latency is not None and latency > self.slow_threshold:
+            self._decrease()
+            return
+        self.throttled = 0
+        self.rate = min(self.max_rate, self.rate + 0.1)
+        # 每个"窗口"（约等于当前并发数个请求）并发上限加1
+        self.concurrency = min(self.max_concurrency, self.concurrency + 1 / self.concurrency)
+
+    def on_throttle(self, status=None):
+        """请求被限流或拦截：乘法减小速率和并发，并暂停该主机的请求"""
+        if time.monotonic() < self.paused_until:
+            # 暂停期间陆续返回的限流响应属于同一次限流，不重复降速
+            return
+        self.throttled += 1
+        self._decrease()
+        pause = self.cooldown * (2 ** min(self.throttled - 1, 5))
+        self.paused_until = max(self.paused_until, time.monotonic() + pause)
+        print(f"{self.host} 返回 {status}，降低速率到 {self.rate:.2f}/秒、并发到 {int(self.concurrency)}，暂停 {pause:.0f} 秒")
+
+    def _decrease(self):
+        """乘法减小速率和并发"""
+        self.rate = max(self.min_rate, self.rate / 2)
+        self.concurrency = max(self.min_concurrency, self.concurrency / 2)
+        self.tokens = min(self.tokens, 0.0)
+
+    def snapshot(self):
+        """当前限速状态，用于日志和报告"""
+        return {
+            "rate": round(self.rate, 2),
+            "concurrency": int(self.concurrency),
+            "in_flight": self.in_flight,
+            "requests": self.requests,
+            "paused": max(0.0, round(self.paused_until - time.monotonic(), 1))
+        }
+
+class RequestSlot:
+    """一次受限请求，用于上报响应状态"""
+
+    def __init__(self, limiter):
+        self.limiter = limiter
+        self.status = None
+
+    def record(self, status):
+        """记录响应状态码"""
+        self.status = status
+
+class RateLimiter:
+    """按主机划分的限速器
+
+    不使用asyncio的锁和条件变量，只保存数值状态，因此可以在同一进程内的
+    多个事件循环（例如多次asyncio.run）之间共享。
+    """
+
+    def __init__(self, **options):
+        """初始化限速器
+
+        Args:
+            **options: 新主机的HostLimiter参数（rate、max_rate、concurrency等）
+        """
+        self.options = options
+        self.hosts = {}
+
+    def configure(self, **options):
+        """更新限速参数，值为None的参数会被忽略，已有主机的速率也会被重置"""
+        options = {key: value for key, value in options.items() if value is not None}
+        self.options.update(options)
+        for limiter in self.hosts.values():
+            for key, value in options.items():
+                setattr(limiter, key, value)
+            limiter.max_rate = max(limiter.max_rate, limiter.rate)
+            limiter.max_concurrency = max(limiter.max_concurrency, limiter.concurrency)
+
+    def host(self, url):
+        """获取URL所属主机的限速状态"""
+        host = urlsplit(url).hostname or url
+        limiter = self.hosts.get(host)
+        if limiter is None:
+            limiter = self.hosts[host] = HostLimiter(host, **self.options)
+        return limiter
+
+    @asynccontextmanager
+    async def request(self, url):
+        """在限速下发出一个请求
+
+        用法:
+            async with limiter.request(url) as slot:
+                response = await client.get(url)
+                slot.record(response.status_code)
+
+        未记录状态码且没有抛出异常时视为成功；抛出异常时只归还并发名额。
+        """
+        limiter = self.host(url)
+        await limiter.acquire()
+        slot = RequestSlot(limiter)
+        start = time.monotonic()
+        try:
+            yield slot
+        except BaseException:
+            limiter.release()
+            raise
+        limiter.release()
+        self.report(url, slot.status, time.monotonic() - start)
+
+    def report(self, url, status=None, latency=None):
+        """上报一次响应，被限流时降速，否则视为成功"""
+        limiter = self.host(url)
+        if status in THROTTLE_STATUS_CODES:
+            limiter.on_throttle(status)
+        else:
+            limiter.on_success(latency)
+
+    def observe_response(self, response):
+        """浏览器上下文的response事件回调
+
+        页面自身发出的接口请求（滚动加载回答等）不经过限速器，
+        但被限流时同样需要降速，这里只处理403/429。
+        """
+        try:
+            if response.status in THROTTLE_STATUS_CODES and response.request.resource_type in ("xhr", "fetch", "document"):
+                self.host(response.url).on_throttle(response.status)
+        except Exception:
+            pass
+
+    async def goto(self, page, url, **kwargs):
+        """在限速下打开页面
+
+        Args:
+            page: playwright页面对象
+            url: 页面地址
+            **kwargs: 传给page.goto的参数
+
+        Returns:
+            page.goto返回的响应对象
+        """
+        async with self.request(url) as slot:
+            response = await page.goto(url, **kwargs)
+            if response is not None:
+                slot.record(response.status)
+            return response
+
+_rate_limiter = None
+
+def get_rate_limiter(**options):
+    """获取进程内共享的限速器，首次调用时创建
+
+    Args:
+        **options: 可选的限速参数，会更新共享限速器的配置
+
+    Returns:
+        RateLimiter: 进程内共享的限速器
+    """
+    global _rate_limiter
+    if _rate_limiter is None:
+        _rate_limiter = RateLimiter()
+    if options:
+        _rate_limiter.configure(**options)
+    return _rate_limiter
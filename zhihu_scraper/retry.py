@@ -0,0 +1,209 @@
+"""
+重试模块 - 对导航、提取等单个步骤按错误类型重试，带指数退避、随机抖动和单步超时
+"""
+
+import asyncio
+import json
+import random
+from zhihu_scraper.ratelimit import THROTTLE_STATUS_CODES, get_rate_limiter
+
+try:
+    from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+    from playwright.async_api import Error as PlaywrightError
+except ImportError:
+    PlaywrightTimeoutError = PlaywrightError = None
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+# 错误类型
+TIMEOUT = "timeout"
+NAVIGATION = "navigation"
+BLOCKED = "blocked"
+PARSE = "parse"
+OTHER = "other"
+
+# 各步骤的默认超时时间（秒）
+DEFAULT_STEP_TIMEOUTS = {
+    "navigate": 45,
+    "wait": 15,
+    "extract": 30,
+    "fetch": 30,
+}
+
+class BlockedError(Exception):
+    """请求被拦截或限流（HTTP 403/429、验证页面等）"""
+
+    def __init__(self, message, status=None):
+        super().__init__(message)
+        self.status = status
+
+class ParseError(ValueError):
+    """页面或接口返回的数据无法解析"""
+
+class StepError(Exception):
+    """步骤在重试后仍然失败
+
+    Attributes:
+        step: 步骤名称
+        kind: 错误类型（timeout、navigation、blocked、parse、other）
+        attempts: 已尝试的次数
+    """
+
+    def __init__(self, step, kind, attempts, cause):
+        super().__init__(f"{step}步骤失败（{kind}，已尝试{attempts}次）: {cause}")
+        self.step = step
+        self.kind = kind
+        self.attempts = attempts
+        self.cause = cause
+
+def classify_error(error):
+    """判断异常所属的错误类型
+
+    Args:
+        error: 异常对象
+
+    Returns:
+        str: timeout、navigation、blocked、parse或other
+    """
+    if isinstance(error, StepError):
+        return error.kind
+    if isinstance(error, BlockedError):
+        return BLOCKED
+    status = getattr(error, 'status', None)
+    if status in THROTTLE_STATUS_CODES or status == 401:
+        return BLOCKED
+    if isinstance(error, (asyncio.TimeoutError, TimeoutError)):
+        return TIMEOUT
+    if PlaywrightTimeoutError is not None and isinstance(error, PlaywrightTimeoutError):
+        return TIMEOUT
+    if httpx is not None:
+        if isinstance(error, httpx.TimeoutException):
+            return TIMEOUT
+        if isinstance(error, httpx.TransportError):
+            return NAVIGATION
+    if isinstance(error, (ParseError, json.JSONDecodeError, KeyError)):
+        return PARSE
+    message = str(error)
+    if PlaywrightError is not None and isinstance(error, PlaywrightError):
+        # 网络错误、页面崩溃或导航被中断
+        if "net::ERR_" in message or "Navigation" in message or "crashed" in message or "closed" in message:
+            return NAVIGATION
+    if "net::ERR_" in message:
+        return NAVIGATION
+    return OTHER
+
+class RetryPolicy:
+    """步骤重试策略
+
+    每个步骤使用独立的超时时间；失败后按错误类型决定是否重试，
+    重试间隔按指数增长并加入随机抖动，被拦截时间隔更长。
+    """
+
+    def __init__(self, attempts=3, base_delay=1.0, max_delay=30.0, jitter=0.5,
+                 timeouts=None, retry_on=(TIMEOUT, NAVIGATION, BLOCKED, PARSE), blocked_factor=4):
+        """初始化重试策略
+
+        Args:
+            attempts: 每个步骤最多尝试的次数（包括第一次），默认3
+            base_delay: 第一次重试前的等待时间（秒），之后每次翻倍，默认1秒
+            max_delay: 重试等待时间的上限（秒），默认30秒
+            jitter: 随机抖动比例，实际等待时间在[1-jitter, 1+jitter]倍之间，默认0.5
+            timeouts: 步骤名称到超时时间（秒）的映射，覆盖DEFAULT_STEP_TIMEOUTS中的默认值
+            retry_on: 需要重试的错误类型
+            blocked_factor: 被拦截时等待时间的放大倍数，默认4
+        """
+        self.attempts = max(1, attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.jitter = jitter
+        self.timeouts = dict(DEFAULT_STEP_TIMEOUTS)
+        self.timeouts.update(timeouts or {})
+        self.retry_on = tuple(retry_on)
+        self.blocked_factor = blocked_factor
+
+    def timeout(self, step):
+        """步骤的超时时间（秒），None表示不限制"""
+        return self.timeouts.get(step)
+
+    def limit(self, step):
+        """只限制其中代码的步骤超时上下文管理器
+
+        请求先在限速器中排队（被限流时可能暂停数十秒），排队不应计入步骤超时，
+        这类步骤以run(..., timeout=0)执行，在取得限速名额后用limit()限制真正的请求。
+        """
+        return asyncio.timeout(self.timeout(step))
+
+    def delay(self, attempt, kind=None):
+        """第attempt次失败后的等待时间（秒）"""
+        delay = self.base_delay * (2 ** (attempt - 1))
+        if kind == BLOCKED:
+            delay *= self.blocked_factor
+        delay = min(self.max_delay, delay)
+        return delay * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+    async def run(self, step, func, *args, retry_on=None, attempts=None, timeout=None, **kwargs):
+        """执行一个步骤，失败时按策略重试
+
+        Args:
+            step: 步骤名称，用于选择超时时间和输出日志
+            func: 返回协程的函数，每次尝试都会重新调用
+            *args: 传给func的位置参数
+            retry_on: 可选，覆盖需要重试的错误类型
+            attempts: 可选，覆盖最多尝试的次数
+            timeout: 可选，覆盖步骤的超时时间（秒），0表示不在这里限制（由func通过limit()自行限制）
+            **kwargs: 传给func的关键字参数
+
+        Returns:
+            func的返回值
+        """
+        retry_on = self.retry_on if retry_on is None else tuple(retry_on)
+        attempts = attempts or self.attempts
+        timeout = self.timeout(step) if timeout is None else timeout
+        for attempt in range(1, attempts + 1):
+            try:
+                if timeout:
+                    return await asyncio.wait_for(func(*args, **kwargs), timeout)
+                return await func(*args, **kwargs)
+            except Exception as e:
+                kind = classify_error(e)
+                if kind not in retry_on or attempt >= attempts:
+                    if isinstance(e, StepError):
+                        raise
+                    raise StepError(step, kind, attempt, e) from e
+                delay = self.delay(attempt, kind)
+                print(f"{step}步骤失败（{kind}），{delay:.1f} 秒后第{attempt + 1}次尝试: {str(e) or type(e).__name__}")
+                await asyncio.sleep(delay)
+
+async def navigate(page, url, rate_limiter=None, retry_policy=None, **kwargs):
+    """在限速和重试策略下打开页面
+
+    页面返回403/429时视为被拦截，等待更长时间后重试。navigate超时只计算page.goto本身，
+    不包括在限速器中排队和被限流后暂停的时间。
+
+    Args:
+        page: playwright页面对象
+        url: 页面地址
+        rate_limiter: 可选的RateLimiter，默认使用进程内共享的限速器
+        retry_policy: 可选的RetryPolicy，默认使用RetryPolicy()
+        **kwargs: 传给page.goto的参数
+
+    Returns:
+        page.goto返回的响应对象
+    """
+    rate_limiter = rate_limiter or get_rate_limiter()
+    retry_policy = retry_policy or RetryPolicy()
+
+    async def goto():
+        async with rate_limiter.request(url) as slot:
+            async with retry_policy.limit("navigate"):
+                response = await page.goto(url, **kwargs)
+            if response is not None:
+                slot.record(response.status)
+        if response is not None and response.status in THROTTLE_STATUS_CODES:
+            raise BlockedError(f"页面返回 HTTP {response.status}: {url}", response.status)
+        return response
+
+    return await retry_policy.run("navigate", goto, timeout=0)
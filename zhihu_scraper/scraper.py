@@ -11,7 +11,18 @@ import platform
 from datetime import datetime
 from bs4 import BeautifulSoup
 from playwright.async_api import async_playwright
-import aiofiles
+from zhihu_scraper.pool import BrowserPool
+from zhihu_scraper.fetcher import HttpFetcher
+from zhihu_scraper.cache import PageCache
+from zhihu_scraper.columnar import ParquetSink
+from zhihu_scraper.comments import COMMENT_OUTPUTS
+from zhihu_scraper.convert import MarkdownConverter
+from zhihu_scraper.filters import ResourceFilter
+from zhihu_scraper.media import MediaDownloader
+from zhihu_scraper.ratelimit import get_rate_limiter
+from zhihu_scraper.retry import RetryPolicy
+from zhihu_scraper.profiles import get_profile
+from zhihu_scraper.utils import has_display, headless_launch_options, resolve_headless
 
 try:
     from browser_use import Agent, Browser, BrowserConfig
@@ -29,24 +40,138 @@ class ZhihuBrowserScraper:
     1. AI代理模式: 使用browser-use包通过AI控制浏览器，支持手动登录并保存状态
     2. 手动浏览器模式: 直接使用Playwright控制浏览器"""
     
-    def __init__(self, api_key=None, model_name="gpt-4o", zhihu_cookie=None, user_data_dir=None):
+    def __init__(self, api_key=None, model_name="gpt-4o", zhihu_cookie=None, user_data_dir=None,
+                 pool_size=3, max_page_uses=50, intercept=False, engine="browser",
+                 lean=False, allow_patterns=None, target_answers=None, scroll_timeout=60,
+                 stream=False, deep=False, max_answers=None, resume=False, incremental=False,
+                 kill_existing_browsers=True, rate_limit=None, max_rate=None, retries=3, step_timeouts=None,
+                 profile=None, headless=None, cache=False, cache_dir=None, cache_ttl=None,
+                 cache_max_bytes=None, from_cache=False, parquet_dir=None, parquet_partition="date",
+                 comments=False, max_comments=None, max_replies=None, comment_concurrency=4,
+                 comments_output="attach", markdown=True, markdown_workers=None, media=False,
+                 media_dir=None, media_max_bytes=None, media_per_host=4):
         """初始化爬虫
         Args:
             api_key: API密钥 (AI代理模式需要)，如不提供将尝试从环境变量加载
             model_name: 使用的语言模型，默认gpt-4o
             zhihu_cookie: 可选的知乎cookie用于登录状态
             user_data_dir: 浏览器数据存储目录，用于保存登录状态，默认为~/zhihu-browser-profile
+            pool_size: 浏览器页面池中同时使用的页面数量上限，默认3
+            max_page_uses: 单个页面复用的导航次数上限，超过后重建页面，默认50
+            intercept: 是否启用网络拦截模式，从回答接口的JSON响应中获取回答，默认False
+            engine: 爬取引擎，"browser"使用Playwright，"http"直接请求知乎接口（失败时回退到浏览器），默认browser
+            lean: 是否拦截图片、字体、媒体和第三方脚本等请求，默认False
+            allow_patterns: 启用lean时始终放行的URL通配符模式列表
+            target_answers: 目标回答数量，页面加载到该数量后停止滚动，默认None（加载到底）
+            scroll_timeout: 单个问题滚动加载的最长时间（秒），默认60秒
+            stream: 是否使用流式爬取，回答边加载边写入output/<问题ID>/answers.jsonl，默认False
+            deep: 是否深度爬取全部回答（流式写入，不限制滚动时间，并从页面中移除已提取的回答），默认False
+            max_answers: 每个问题最多获取的回答数量，默认None（不限制）
+            resume: 是否从output/<问题ID>/checkpoint.json断点继续（已完成的问题直接跳过），默认False
+            incremental: 是否增量爬取，只获取新增或更新过的回答并合并到上次的JSON结果中，默认False
+            kill_existing_browsers: 启动浏览器前是否结束已有的Chromium进程，多进程爬取时应为False，默认True
+            rate_limit: 每个主机的初始请求速率（每秒请求数），之后根据限流和响应时间自动调整，默认2
+            max_rate: 每个主机自动提速的上限（每秒请求数），默认10
+            retries: 导航、提取等单个步骤最多尝试的次数，默认3
+            step_timeouts: 步骤名称（navigate、wait、extract、fetch）到超时时间（秒）的映射，覆盖默认超时
+            headless: 是否使用无头模式启动浏览器，None表示没有显示器（未设置DISPLAY）时自动使用无头模式，默认None
+            cache: 是否把原始页面HTML和接口JSON写入按内容寻址的页面缓存，默认False
+            cache_dir: 页面缓存目录，默认output/.cache
+            cache_ttl: 缓存条目的有效期（秒），默认30天
+            cache_max_bytes: 页面缓存的大小上限（字节），超过后按最近最少使用淘汰，默认1GB
+            from_cache: 是否只从页面缓存离线重建结果（不访问网络、不启动浏览器），默认False
+            parquet_dir: 可选的Parquet数据集目录，提供时把回答同时追加写入按分区组织的Parquet文件（需要pyarrow）
+            parquet_partition: Parquet数据集的分区方式，date（按爬取日期）或question（按问题ID），默认date
+            comments: 是否同时爬取每个回答的根评论和子评论，默认False
+            max_comments: 每个回答最多获取的根评论数量，默认None（不限制）
+            max_replies: 每条根评论最多获取的子评论数量，0表示只保留根评论附带的子评论，默认None（不限制）
+            comment_concurrency: 同时请求评论接口的数量，默认4
+            comments_output: 评论的输出方式，attach附加到回答记录的comment_list字段，stream写入<问题ID>/comments.jsonl，默认attach
+            markdown: 是否把回答HTML转换为Markdown后写入.md文件（在进程池中转换，需要html2text），False时保留原始HTML，默认True
+            markdown_workers: Markdown转换进程数，默认为CPU核数（最多4个）
+            media: 是否下载回答中的图片和视频封面，并把Markdown中的链接改为本地路径（需要httpx），默认False
+            media_dir: 媒体目录，文件按内容哈希保存，默认output/media
+            media_max_bytes: 媒体目录的总大小上限（字节），达到后不再下载新文件，默认None（不限制）
+            media_per_host: 每个主机同时进行的媒体下载数量，默认4
+            profile: 爬取配置档，fast（不预热、不模拟人类行为、无slow_mo）、balanced或cautious（每次访问首页并完整模拟人类行为），默认balanced
         """
         # 加载环境变量
         load_dotenv()
         
-        # 设置浏览器持久化目录（固定使用zhihu-browser-profile）
-        self.user_data_dir = os.path.expanduser("~/zhihu-browser-profile")
+        # 设置浏览器持久化目录（默认使用~/zhihu-browser-profile）
+        self.user_data_dir = os.path.expanduser(user_data_dir or "~/zhihu-browser-profile")
         os.makedirs(self.user_data_dir, exist_ok=True)
         print(f"使用浏览器持久化目录: {self.user_data_dir}")
         
-        # 初始化浏览器实例为None，将在需要时创建
+        # 初始化浏览器页面池为None，将在首次爬取时创建，由close_browser()关闭
         self.browser = None
+        self.pool_size = pool_size
+        self.max_page_uses = max_page_uses
+        self.kill_existing_browsers = kill_existing_browsers
+        
+        # 网络拦截模式
+        self.intercept = intercept
+        
+        # 爬取引擎，HTTP客户端在首次使用时创建并在多次爬取之间复用
+        if engine not in ("browser", "http"):
+            raise ValueError(f"不支持的爬取引擎: {engine}")
+        self.engine = engine
+        self.http_fetcher = None
+        
+        # 滚动加载参数
+        self.target_answers = target_answers
+        self.scroll_timeout = scroll_timeout
+        self.stream = stream
+        self.deep = deep
+        self.max_answers = max_answers
+        self.resume = resume
+        self.incremental = incremental
+        
+        # 进程内共享的限速器，所有页面和HTTP请求按主机统一限速
+        self.rate_limiter = get_rate_limiter(rate=rate_limit, max_rate=max_rate)
+        
+        # 无头模式，未指定时根据是否有显示器决定
+        self.headless = resolve_headless(headless)
+        
+        # 爬取配置档，控制首页预热、模拟人类行为和slow_mo
+        self.profile = get_profile(profile)
+        
+        # 单步重试策略：导航、等待和提取失败时按错误类型退避重试
+        self.retry_policy = RetryPolicy(attempts=retries, timeouts=step_timeouts)
+        
+        # 页面缓存，在首次使用时打开
+        self.cache = cache
+        self.from_cache = from_cache
+        self.cache_dir = cache_dir or os.path.join("output", ".cache")
+        self.cache_ttl = cache_ttl
+        self.cache_max_bytes = cache_max_bytes
+        self.page_cache = None
+        
+        # 评论爬取，回答获取完成后并发请求评论接口
+        if comments_output not in COMMENT_OUTPUTS:
+            raise ValueError(f"不支持的评论输出方式: {comments_output}")
+        self.comments = comments
+        self.max_comments = max_comments
+        self.max_replies = max_replies
+        self.comment_concurrency = comment_concurrency
+        self.comments_output = comments_output
+        
+        # Markdown转换，进程池在第一次保存结果时创建，转换结果按内容哈希缓存在<缓存目录>/markdown
+        self.markdown_converter = MarkdownConverter(
+            workers=markdown_workers, cache_dir=os.path.join(self.cache_dir, "markdown")
+        ) if markdown else None
+        
+        # 媒体下载，保存结果后下载回答中的图片，相同内容只保存一份
+        self.media_downloader = MediaDownloader(
+            media_dir or "output/media", max_bytes=media_max_bytes, per_host=media_per_host,
+            retry_policy=self.retry_policy
+        ) if media else None
+        
+        # 列式导出，回答同时追加到Parquet数据集
+        self.sink = ParquetSink(parquet_dir, partition_by=parquet_partition) if parquet_dir else None
+        
+        # 资源过滤，只在lean模式下启用
+        self.resource_filter = ResourceFilter(allow_patterns=allow_patterns) if lean else None
         
         self.zhihu_cookie = zhihu_cookie
         self.chrome_path = self._detect_chrome_path()
@@ -240,13 +365,17 @@ class ZhihuBrowserScraper:
             f"--window-size={width},{height}"
         ]
         
+        # 手动登录需要看到浏览器窗口，只有在没有显示器时才使用无头模式
+        headless = not has_display()
+        if headless:
+            print("警告: 未检测到显示器，浏览器将以无头模式启动，无法在窗口中登录，请改用--cookie提供登录Cookie")
+        
         async with async_playwright() as p:
             # 使用持久化目录启动浏览器
             browser = await p.chromium.launch_persistent_context(
                 self.user_data_dir,
-                headless=False,
                 slow_mo=50,
-                args=browser_args,
+                **headless_launch_options(headless, browser_args),
                 viewport={"width": width, "height": height},
                 user_agent="Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/110.0.0.0 Safari/537.36",
                 locale="zh-CN",
@@ -296,13 +425,86 @@ class ZhihuBrowserScraper:
     # 从原文件导入其他方法
     from zhihu_scraper.browser import _launch_browser_manually
     from zhihu_scraper.crawler import scrape_question
+    from zhihu_scraper.batch import scrape_questions
+    from zhihu_scraper.stream import iter_answers, stream_question
+    from zhihu_scraper.incremental import incremental_update
+    from zhihu_scraper.frontier import drain_queue
+    from zhihu_scraper.cache import replay_question
+    from zhihu_scraper.comments import crawl_comments
     
     # 导入_convert_to_markdown方法
     from zhihu_scraper.crawler import _convert_to_markdown
     
+    async def get_browser_pool(self):
+        """获取浏览器页面池，首次调用时创建并启动浏览器
+        
+        Returns:
+            BrowserPool: 页面池实例
+        """
+        if self.browser is None:
+            from zhihu_scraper.crawler import _launch_context
+            self.browser = BrowserPool(
+                lambda p: _launch_context(self, p),
+                size=self.pool_size,
+                max_uses=self.max_page_uses
+            )
+        await self.browser.start()
+        return self.browser
+    
+    def get_http_fetcher(self):
+        """获取HTTP客户端，首次调用时创建
+        
+        Returns:
+            HttpFetcher: 使用当前Cookie的HTTP客户端
+        """
+        if self.http_fetcher is None:
+            self.http_fetcher = HttpFetcher(
+                cookie=self.zhihu_cookie,
+                rate_limiter=self.rate_limiter,
+                retry_policy=self.retry_policy,
+                cache=self.get_page_cache()
+            )
+        return self.http_fetcher
+    
+    def get_page_cache(self):
+        """获取页面缓存，未启用缓存时返回None
+        
+        Returns:
+            PageCache: 页面缓存实例
+        """
+        if not (self.cache or self.from_cache):
+            return None
+        if self.page_cache is None:
+            options = {}
+            if self.cache_ttl is not None:
+                options["ttl"] = self.cache_ttl
+            if self.cache_max_bytes is not None:
+                options["max_bytes"] = self.cache_max_bytes
+            self.page_cache = PageCache(self.cache_dir, **options)
+        return self.page_cache
+    
     async def close_browser(self):
-        """关闭浏览器实例，释放资源"""
-        # 由于已改为使用Playwright持久化上下文，该方法不再需要特别操作
-        print("使用持久化浏览器上下文模式，不需要手动关闭浏览器")
-        # 如果需要清理资源，可以在这里添加相关代码
-        pass 
\ No newline at end of file
+        """关闭浏览器实例、HTTP连接池、页面缓存和Markdown转换进程池，写出Parquet缓冲区，释放资源"""
+        if self.media_downloader is not None:
+            await self.media_downloader.close()
+        if self.http_fetcher is not None:
+            await self.http_fetcher.close()
+            self.http_fetcher = None
+        if self.page_cache is not None:
+            self.page_cache.close()
+            self.page_cache = None
+        if self.sink is not None:
+            await asyncio.to_thread(self.sink.flush)
+        if self.markdown_converter is not None:
+            self.markdown_converter.close()
+        if self.browser is None:
+            return
+        await self.browser.close()
+        self.browser = None
+        print("浏览器已关闭")
+    
+    async def __aenter__(self):
+        return self
+    
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close_browser() 
\ No newline at end of file
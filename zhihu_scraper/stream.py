@@ -0,0 +1,414 @@
+"""
+流式爬取模块 - 回答一出现在页面中就立即提取并追加写入磁盘
+"""
+
+import asyncio
+import json
+import os
+from datetime import datetime, timezone
+from zhihu_scraper.api import AnswerInterceptor
+from zhihu_scraper.cache import HTML
+from zhihu_scraper.checkpoint import Checkpoint
+from zhihu_scraper.convert import BATCH_SIZE
+from zhihu_scraper.crawler import _answer_to_markdown
+from zhihu_scraper.dedup import SeenSet, answer_key
+from zhihu_scraper.extract import EXPAND_SETTLE_MS, EXTRACT_NEW_ANSWERS_JS
+from zhihu_scraper.loader import ANSWER_SELECTOR, get_page_state, wait_for_growth
+from zhihu_scraper.media import collect_media_urls, localize_media
+from zhihu_scraper.retry import RetryPolicy, navigate
+from zhihu_scraper.utils import _temp_path, load_json, save_json
+
+# 每写入这么多个回答保存一次断点，中断时未保存的部分在续爬前从answers.jsonl中恢复
+CHECKPOINT_EVERY = 20
+
+async def iter_answers(self, question_id, question_info=None, checkpoint=None, order='default'):
+    """逐个产出问题下的回答
+
+    每次加载后只提取新出现的回答，按回答ID去重后立即产出，
+    不在内存中保留完整的回答列表。HTTP引擎按接口游标分页，
+    失败时回退到浏览器并跳过已产出的回答。
+
+    Args:
+        question_id: 知乎问题ID
+        question_info: 可选的字典，会写入问题的title和description
+        checkpoint: 可选的Checkpoint，跳过其中已记录的回答，并从保存的游标继续分页
+        order: 回答排序方式，"default"为默认排序，"updated"为按时间排序（最新的在前）
+
+    Yields:
+        dict: 回答记录
+    """
+    # 与断点共享同一个去重集合，HTTP引擎和浏览器回退之间、多次运行之间都不会重复产出
+    seen = SeenSet(checkpoint.seen_ids if checkpoint is not None else None)
+    if getattr(self, 'engine', 'browser') == 'http':
+        try:
+            async for answer in _iter_http_answers(self, question_id, seen, question_info, checkpoint, order):
+                yield answer
+            return
+        except Exception as e:
+            print(f"HTTP引擎获取回答失败，回退到浏览器模式（已获取 {len(seen)} 个）: {str(e)}")
+
+    async for answer in _iter_page_answers(self, question_id, seen, question_info, order):
+        yield answer
+
+def _answer_limit(self):
+    """回答数量上限：max_answers和target_answers中较小的一个，都未设置时返回None"""
+    limits = [n for n in (getattr(self, 'max_answers', None), getattr(self, 'target_answers', None)) if n]
+    return min(limits) if limits else None
+
+async def _iter_http_answers(self, question_id, seen, question_info=None, checkpoint=None, order='default'):
+    """通过HTTP接口按游标分页产出回答，每页处理完后把下一页游标记录到断点中"""
+    limit = _answer_limit(self)
+    fetcher = self.get_http_fetcher()
+    if question_info is not None and not question_info.get('title'):
+        question_info.update(await fetcher.fetch_question_info(question_id))
+
+    cursor = checkpoint.cursor if checkpoint is not None else None
+    async for answers, paging in fetcher.iter_answer_pages(question_id, cursor=cursor, order=order):
+        for answer in seen.filter(answers):
+            yield answer
+            if limit and len(seen) >= limit:
+                return
+        # 本页回答都已被消费（写入磁盘），下次可以从下一页继续
+        if checkpoint is not None:
+            checkpoint.cursor = None if paging.get('is_end') else paging.get('next')
+
+async def _iter_page_answers(self, question_id, seen, question_info=None, order='default'):
+    """在浏览器页面中边滚动边产出回答
+
+    深度爬取模式下不限制滚动时间，允许多次等待新内容，
+    并删除已提取的回答节点，使页面内存不随回答数量增长。
+    页面无法直接跳到断点位置，从断点继续时重新滚动并跳过seen中的回答。
+    """
+    question_url = f"https://www.zhihu.com/question/{question_id}"
+    if order == 'updated':
+        # 按时间排序的回答列表页
+        question_url += "/answers/updated"
+    limit = _answer_limit(self)
+    deep = getattr(self, 'deep', False)
+    max_time = None if deep else getattr(self, 'scroll_timeout', 60)
+    # 深度模式下连续多次没有新内容才认为已经到底
+    patience = 3 if deep else 1
+    options = {"virtualize": deep, "keep": 3}
+
+    retry_policy = getattr(self, 'retry_policy', None) or RetryPolicy()
+    cache = self.get_page_cache()
+
+    pool = await self.get_browser_pool()
+    async with pool.page() as page:
+        # 启用页面缓存时记录回答接口的原始响应
+        recorder = None
+        if cache is not None:
+            recorder = AnswerInterceptor(question_id, cache=cache)
+            recorder.attach(page)
+        try:
+            await navigate(page, question_url, self.rate_limiter, retry_policy, wait_until="domcontentloaded")
+            print(f"已打开问题页面: {question_url}")
+            try:
+                await page.wait_for_selector(
+                    f".QuestionHeader-title, {ANSWER_SELECTOR}",
+                    timeout=retry_policy.timeout("wait") * 1000
+                )
+            except Exception:
+                print("等待问题内容超时，继续尝试加载回答")
+            if cache is not None:
+                # 首屏HTML中包含服务端渲染的回答，后续回答由recorder记录接口响应
+                await cache.aput(question_url, await page.content(), HTML, question_id)
+
+            loop = asyncio.get_running_loop()
+            deadline = loop.time() + max_time if max_time else None
+            idle_rounds = 0
+            removed = 0
+            while True:
+                data = await retry_policy.run("extract", page.evaluate, EXTRACT_NEW_ANSWERS_JS, options)
+                removed += data.get('removed', 0)
+                if question_info is not None and not question_info.get('title'):
+                    question_info['title'] = data.get('title')
+                    question_info['description'] = data.get('description') or ''
+
+                for answer in seen.filter(data['answers']):
+                    yield answer
+                    if limit and len(seen) >= limit:
+                        return
+
+                if data.get('expanding'):
+                    # 刚展开的回答等全文渲染后再提取，不计入无增长的次数
+                    await asyncio.sleep(EXPAND_SETTLE_MS / 1000)
+                    continue
+                if idle_rounds >= patience:
+                    break
+                remaining = deadline - loop.time() if deadline else 4
+                if remaining <= 0:
+                    print(f"加载超过最长时间 {max_time} 秒，停止滚动")
+                    break
+                state = await get_page_state(page)
+                if await wait_for_growth(page, state, min(4, remaining)):
+                    idle_rounds = 0
+                else:
+                    # 没有新内容，再提取一次刚渲染完成的回答，连续多次无增长后结束
+                    idle_rounds += 1
+                    if deep:
+                        await page.evaluate("window.scrollBy(0, -600)")
+
+            if deep:
+                print(f"深度爬取结束，共提取 {len(seen)} 个回答，已从页面中移除 {removed} 个回答节点")
+        finally:
+            if recorder is not None:
+                await recorder.wait_pending()
+                recorder.detach(page)
+
+class AnswerStreamWriter:
+    """回答流写入器
+
+    每个回答到达后立即追加到 output/<问题ID>/answers.jsonl 和 answers.md，
+    程序中途崩溃时已写入的回答不会丢失。
+    """
+
+    def __init__(self, question_id, output_dir='output', append=False, offset=0):
+        """初始化写入器
+
+        Args:
+            question_id: 知乎问题ID
+            output_dir: 输出目录
+            append: 是否在已有文件后追加，默认False（覆盖上次的结果）
+            offset: 已写入的回答数量，追加时用于续接answers.md中的编号
+        """
+        self.question_id = str(question_id)
+        self.question_dir = os.path.join(output_dir, self.question_id)
+        os.makedirs(self.question_dir, exist_ok=True)
+        self.jsonl_file = os.path.join(self.question_dir, "answers.jsonl")
+        self.md_file = os.path.join(self.question_dir, "answers.md")
+        self.count = offset
+        self.md_count = offset
+        if append:
+            _trim_partial_line(self.jsonl_file)
+        mode = 'a' if append else 'w'
+        self._jsonl = open(self.jsonl_file, mode, encoding='utf-8')
+        self._md = open(self.md_file, mode, encoding='utf-8')
+
+    def write(self, answer, markdown=None):
+        """追加写入一个回答并立即刷新到磁盘
+
+        Args:
+            answer: 回答记录
+            markdown: 可选的已转换为Markdown的回答内容，默认在answers.md中使用原始HTML
+        """
+        self.write_record(answer)
+        self.write_markdown([answer], [markdown])
+
+    def write_record(self, answer):
+        """只把回答追加到answers.jsonl并立即刷新到磁盘"""
+        self.count += 1
+        self._jsonl.write(json.dumps(answer, ensure_ascii=False) + "\n")
+        self._jsonl.flush()
+
+    def write_markdown(self, answers, markdowns=None):
+        """把一批回答按写入answers.jsonl的顺序追加到answers.md
+
+        Args:
+            answers: 回答记录列表
+            markdowns: 可选的与answers一一对应的Markdown内容
+        """
+        if markdowns is None:
+            markdowns = [None] * len(answers)
+        blocks = []
+        for answer, markdown in zip(answers, markdowns):
+            self.md_count += 1
+            blocks.append(_answer_to_markdown(answer, self.md_count, markdown) + "\n")
+        self._md.write("".join(blocks))
+        self._md.flush()
+
+    async def awrite_record(self, answer):
+        """在线程池中写入answers.jsonl，磁盘写入不阻塞事件循环，参数与write_record()相同"""
+        await asyncio.to_thread(self.write_record, answer)
+
+    async def awrite_markdown(self, answers, markdowns=None):
+        """在线程池中追加answers.md，参数与write_markdown()相同"""
+        await asyncio.to_thread(self.write_markdown, answers, markdowns)
+
+    async def aclose(self):
+        """在线程池中关闭文件"""
+        await asyncio.to_thread(self.close)
+
+    def close(self):
+        """关闭文件"""
+        self._jsonl.close()
+        self._md.close()
+
+def _trim_partial_line(file_path):
+    """删除文件末尾未写完的行（上次写入时中断留下的）"""
+    if not os.path.exists(file_path):
+        return
+    with open(file_path, 'rb+') as f:
+        data = f.read()
+        if data and not data.endswith(b"\n"):
+            f.truncate(data.rfind(b"\n") + 1)
+
+def _read_answer_chunk(f, size):
+    """从answers.jsonl中读取最多size个回答记录，跳过无法解析的行"""
+    answers = []
+    while len(answers) < size:
+        line = f.readline()
+        if not line:
+            break
+        try:
+            answers.append(json.loads(line))
+        except ValueError:
+            continue
+    return answers
+
+async def _recover_stream(checkpoint, jsonl_file, md_file, converter=None, media_urls=None):
+    """按磁盘上已写入的回答重建断点进度和answers.md
+
+    回答写入后立即刷新到磁盘，断点则每CHECKPOINT_EVERY个回答才保存一次，
+    中断时断点中可能缺少最后写入的回答。续爬前以answers.jsonl中完整的行为准
+    重建去重键和回答数量，并按这些回答重新生成answers.md（去掉末尾写了一半的回答）。
+
+    Args:
+        checkpoint: 从断点文件读取的Checkpoint，去重键和回答数量会被替换
+        jsonl_file: answers.jsonl路径
+        md_file: answers.md路径
+        converter: 可选的MarkdownConverter
+        media_urls: 可选的列表，提供时追加已写入回答中的媒体地址（重新生成的answers.md需要再次改写链接）
+
+    Returns:
+        int: 已写入的回答数量
+    """
+    await asyncio.to_thread(_trim_partial_line, jsonl_file)
+    seen_ids = set()
+    count = 0
+    if os.path.exists(jsonl_file):
+        tmp_path = _temp_path(md_file)
+        try:
+            with open(jsonl_file, 'r', encoding='utf-8') as source, open(tmp_path, 'w', encoding='utf-8') as target:
+                while True:
+                    answers = await asyncio.to_thread(_read_answer_chunk, source, BATCH_SIZE)
+                    if not answers:
+                        break
+                    markdowns = await converter.convert_answers(answers) if converter is not None else [None] * len(answers)
+                    blocks = []
+                    for answer, markdown in zip(answers, markdowns):
+                        count += 1
+                        key = answer_key(answer)
+                        if key:
+                            seen_ids.add(key)
+                        if media_urls is not None:
+                            media_urls.extend(collect_media_urls(answer.get('content')))
+                        blocks.append(_answer_to_markdown(answer, count, markdown) + "\n")
+                    await asyncio.to_thread(target.write, "".join(blocks))
+            os.replace(tmp_path, md_file)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+    if count != checkpoint.offset:
+        print(f"断点记录了 {checkpoint.offset} 个回答，answers.jsonl中有 {count} 个，以文件为准继续")
+    # iter_answers与断点共享同一个去重集合，原地替换
+    checkpoint.seen_ids.clear()
+    checkpoint.seen_ids.update(seen_ids)
+    checkpoint.offset = count
+    return count
+
+async def stream_question(self, question_id, output_dir='output'):
+    """以流式方式爬取问题，回答边加载边写入磁盘
+
+    回答保存在 output/<问题ID>/answers.jsonl 和 answers.md，
+    问题信息和回答数量在结束时写入 output/<问题ID>/meta.json，
+    爬取进度持续记录在 output/<问题ID>/checkpoint.json 中。
+
+    Args:
+        question_id: 知乎问题ID
+        output_dir: 输出目录
+
+    Returns:
+        dict: 问题信息和回答数量，不包含回答内容
+    """
+    # 读取断点：resume模式下跳过已完成的问题，未完成的问题从断点继续
+    checkpoint = Checkpoint.load(question_id, output_dir)
+    meta_file = os.path.join(output_dir, str(question_id), "meta.json")
+    if getattr(self, 'resume', False) and checkpoint.completed:
+        print(f"问题 {question_id} 已爬取完成（{checkpoint.offset} 个回答），跳过")
+        return load_json(meta_file) or {"answer_count": checkpoint.offset}
+    converter = getattr(self, 'markdown_converter', None)
+    downloader = getattr(self, 'media_downloader', None)
+    media_urls = []
+    question_dir = os.path.join(output_dir, str(question_id))
+    jsonl_file = os.path.join(question_dir, "answers.jsonl")
+    # 第一次保存断点之前中断时没有进度记录，但answers.jsonl中已有回答
+    written = not checkpoint.completed and os.path.exists(jsonl_file) and os.path.getsize(jsonl_file) > 0
+    if getattr(self, 'resume', False) and (checkpoint.resumable or written):
+        await _recover_stream(
+            checkpoint, jsonl_file, os.path.join(question_dir, "answers.md"), converter,
+            media_urls=media_urls if downloader is not None else None
+        )
+        print(f"问题 {question_id} 从断点继续，已有 {checkpoint.offset} 个回答")
+        append = True
+    else:
+        checkpoint.reset()
+        append = False
+        if self.get_page_cache() is not None:
+            self.get_page_cache().begin(question_id)
+
+    question_info = {}
+    writer = await asyncio.to_thread(AnswerStreamWriter, question_id, output_dir, append=append, offset=checkpoint.offset)
+    # answers.jsonl逐条写入，Markdown转换按BATCH_SIZE成批提交给转换进程池
+    pending = []
+
+    async def write_pending():
+        markdowns = await converter.convert_answers(pending) if converter is not None else None
+        await writer.awrite_markdown(pending, markdowns)
+        pending.clear()
+
+    completed = False
+    try:
+        async for answer in self.iter_answers(question_id, question_info, checkpoint):
+            await writer.awrite_record(answer)
+            checkpoint.record(answer_key(answer))
+            pending.append(answer)
+            if converter is None or len(pending) >= BATCH_SIZE:
+                await write_pending()
+            if downloader is not None:
+                media_urls.extend(collect_media_urls(answer.get('content')))
+            if getattr(self, 'sink', None) is not None:
+                await self.sink.aadd([answer], question_id, question_info.get('title'))
+            if writer.count % CHECKPOINT_EVERY == 0:
+                await checkpoint.asave()
+                print(f"问题 {question_id} 已写入 {writer.count} 个回答")
+        if pending:
+            await write_pending()
+        completed = True
+    except Exception:
+        # 尽量补写已缓冲的回答；失败也无妨，断点续爬时会从answers.jsonl重建answers.md
+        if pending:
+            try:
+                await write_pending()
+            except Exception as e:
+                print(f"补写answers.md失败: {e}")
+        raise
+    finally:
+        await writer.aclose()
+        await checkpoint.asave(completed=completed)
+
+    # 回答已全部写入磁盘，评论按回答ID写入comments.jsonl（包括断点续爬之前的回答）
+    if getattr(self, 'comments', False):
+        answer_ids = [key for key in checkpoint.seen_ids if not key.startswith("sha1:")]
+        await self.crawl_comments(question_id, answer_ids, output_dir)
+
+    # 媒体在回答写完后统一下载，answers.md中的链接改为本地路径
+    if downloader is not None:
+        await localize_media(downloader, question_id, media_urls, output_dir, markdown_files=[writer.md_file])
+
+    result = {
+        "title": question_info.get('title'),
+        "description": question_info.get('description', ''),
+        "answer_count": writer.count,
+        "meta": {
+            "crawl_time": datetime.now(timezone.utc).isoformat(),
+            "question_id": str(question_id),
+            "url": f"https://www.zhihu.com/question/{question_id}",
+            "answers_file": writer.jsonl_file,
+            "markdown_file": writer.md_file
+        }
+    }
+    await asyncio.to_thread(save_json, result, meta_file)
+    print(f"问题 {question_id} 流式爬取完成，共写入 {writer.count} 个回答: {writer.jsonl_file}")
+    return result
@@ -0,0 +1,94 @@
+"""
+页面缓存的读写、过期和LRU淘汰测试
+"""
+
+import json
+import os
+import time
+
+from zhihu_scraper.cache import ANSWERS, HTML, PageCache, load_cached_question
+
+QUESTION_URL = "https://www.zhihu.com/question/1"
+ANSWERS_URL = "https://www.zhihu.com/api/v4/questions/1/feeds?cursor=abc"
+
+def test_put_get_and_manifest(tmp_path):
+    cache = PageCache(str(tmp_path))
+    digest = cache.put(QUESTION_URL, "<html>问题</html>", HTML, question_id=1)
+    cache.put(ANSWERS_URL, '{"data": []}', ANSWERS, question_id=1)
+
+    assert cache.get(QUESTION_URL) == "<html>问题</html>".encode("utf-8")
+    assert cache.get_json(ANSWERS_URL) == {"data": []}
+    assert cache.get("https://www.zhihu.com/question/2") is None
+    assert cache.manifest(1) == [(QUESTION_URL, HTML), (ANSWERS_URL, ANSWERS)]
+    assert os.path.exists(os.path.join(str(tmp_path), "objects", digest[:2], digest + ".gz"))
+
+    # 重新爬取时清空清单，内容保留
+    cache.begin(1)
+    assert cache.manifest(1) == []
+    assert cache.get(QUESTION_URL) is not None
+    cache.close()
+
+def test_same_content_stored_once(tmp_path):
+    cache = PageCache(str(tmp_path))
+    cache.put(ANSWERS_URL, '{"data": []}', ANSWERS)
+    size = cache.total_size()
+    cache.put(ANSWERS_URL + "&offset=5", '{"data": []}', ANSWERS)
+    assert cache.total_size() == size
+    cache.close()
+
+def test_expired_entries_are_misses_and_evicted(tmp_path):
+    cache = PageCache(str(tmp_path), ttl=60)
+    digest = cache.put(QUESTION_URL, "<html></html>", HTML, question_id=1)
+    cache.conn.execute("UPDATE entries SET stored_at = ?", (time.time() - 120,))
+
+    assert cache.get(QUESTION_URL) is None
+    assert cache.snapshot_files(1) == []
+    assert cache.evict() == 1
+    assert not os.path.exists(os.path.join(str(tmp_path), "objects", digest[:2], digest + ".gz"))
+    cache.close()
+
+def test_evict_least_recently_used(tmp_path):
+    # 随机内容无法压缩，每个条目约1KB
+    cache = PageCache(str(tmp_path), ttl=None, max_bytes=2500)
+    cache.put("https://www.zhihu.com/question/1", os.urandom(1000), HTML)
+    cache.put("https://www.zhihu.com/question/2", os.urandom(1000), HTML)
+    cache.conn.execute("UPDATE entries SET accessed_at = 1 WHERE url LIKE '%/1'")
+    cache.conn.execute("UPDATE entries SET accessed_at = 2 WHERE url LIKE '%/2'")
+    # 读取会刷新访问时间，问题1变为最近使用
+    assert cache.get("https://www.zhihu.com/question/1") is not None
+    cache.put("https://www.zhihu.com/question/3", os.urandom(1000), HTML)
+
+    assert cache.evict() == 1
+    assert cache.get("https://www.zhihu.com/question/2") is None
+    assert cache.get("https://www.zhihu.com/question/1") is not None
+    assert cache.get("https://www.zhihu.com/question/3") is not None
+    assert cache.total_size() <= 2500
+    cache.close()
+
+def test_load_cached_question_keeps_dom_only_answers(tmp_path):
+    initial_data = {"initialState": {"entities": {
+        "questions": {"1": {"title": "问题标题", "detail": "描述"}},
+        "answers": {"20": {"id": 20, "content": "<p>首屏</p>", "question": {"id": 1}}}
+    }}}
+    # 滚动加载后的页面快照：回答10只存在于DOM中，回答30的DOM点赞数不精确
+    html = (
+        '<div class="List-item"><div class="ContentItem" data-zop=\'{"itemId": 10}\'>'
+        '<div class="RichText"><p>只在DOM中</p></div></div></div>'
+        '<div class="List-item"><div class="ContentItem" data-zop=\'{"itemId": 30}\'>'
+        '<div class="RichText"><p>接口</p></div><button aria-label="赞同">赞同 1.2 万</button></div></div>'
+        '<script id="js-initialData" type="text/json">%s</script>' % json.dumps(initial_data)
+    )
+    payload = {"data": [{"target": {"id": 30, "content": "<p>接口</p>", "voteup_count": 12000}}]}
+
+    cache = PageCache(str(tmp_path))
+    cache.put(ANSWERS_URL, json.dumps(payload), ANSWERS, question_id=1)
+    cache.put(QUESTION_URL, html, HTML, question_id=1)
+    result = load_cached_question(cache, 1)
+    cache.close()
+
+    answers = {answer["id"]: answer for answer in result["answers"]}
+    assert set(answers) == {"10", "20", "30"}
+    assert answers["10"]["content"] == "<p>只在DOM中</p>"
+    assert answers["30"]["upvotes"] == 12000
+    assert result["title"] == "问题标题"
+    assert result["meta"]["source"] == "cache"
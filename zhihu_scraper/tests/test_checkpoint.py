@@ -0,0 +1,141 @@
+"""
+断点记录、保存和续爬恢复测试
+"""
+
+import asyncio
+import json
+import os
+
+from zhihu_scraper.batch import _scrape_one
+from zhihu_scraper.checkpoint import Checkpoint
+from zhihu_scraper.crawler import scrape_question
+from zhihu_scraper.stream import AnswerStreamWriter, _recover_stream, iter_answers, stream_question
+
+def test_record_save_and_load(tmp_path):
+    checkpoint = Checkpoint("1", str(tmp_path))
+    checkpoint.cursor = "https://www.zhihu.com/api/v4/questions/1/feeds?cursor=abc"
+    checkpoint.record("10")
+    checkpoint.record("sha1:deadbeef")
+    checkpoint.save()
+
+    loaded = Checkpoint.load("1", str(tmp_path))
+    assert loaded.cursor == checkpoint.cursor
+    assert loaded.seen_ids == {"10", "sha1:deadbeef"}
+    assert loaded.offset == 2
+    assert loaded.resumable
+    assert not loaded.completed
+
+def test_completed_checkpoint_is_not_resumable(tmp_path):
+    checkpoint = Checkpoint("1", str(tmp_path))
+    checkpoint.record("10")
+    asyncio.run(checkpoint.asave(completed=True))
+
+    loaded = Checkpoint.load("1", str(tmp_path))
+    assert loaded.completed
+    assert not loaded.resumable
+
+def test_load_corrupted_checkpoint_starts_over(tmp_path):
+    os.makedirs(tmp_path / "1")
+    (tmp_path / "1" / Checkpoint.FILE_NAME).write_text("{broken", encoding="utf-8")
+    loaded = Checkpoint.load("1", str(tmp_path))
+    assert loaded.offset == 0
+    assert loaded.seen_ids == set()
+    assert not loaded.resumable
+
+def test_recover_stream_uses_answers_on_disk(tmp_path):
+    # 断点只记录了第一个回答，answers.jsonl中已写入三个，最后一行写了一半
+    writer = AnswerStreamWriter("1", str(tmp_path))
+    for answer_id in ("10", "11", "12"):
+        writer.write({"id": answer_id, "content": f"<p>{answer_id}</p>"})
+    writer.close()
+    with open(writer.jsonl_file, "a", encoding="utf-8") as f:
+        f.write(json.dumps({"id": "13"})[:5])
+    with open(writer.md_file, "a", encoding="utf-8") as f:
+        f.write("### 回答 4 - 写了一半")
+
+    checkpoint = Checkpoint("1", str(tmp_path))
+    checkpoint.record("10")
+    seen_ids = checkpoint.seen_ids
+    count = asyncio.run(_recover_stream(checkpoint, writer.jsonl_file, writer.md_file))
+
+    assert count == 3
+    assert checkpoint.offset == 3
+    # 去重集合与iter_answers共享，必须原地更新
+    assert checkpoint.seen_ids is seen_ids
+    assert seen_ids == {"10", "11", "12"}
+    with open(writer.jsonl_file, encoding="utf-8") as f:
+        assert len(f.read().splitlines()) == 3
+    with open(writer.md_file, encoding="utf-8") as f:
+        markdown = f.read()
+    assert markdown.count("### 回答") == 3
+    assert "写了一半" not in markdown
+
+CURSOR = "https://www.zhihu.com/api/v4/questions/123456/feeds?cursor=page2"
+
+class StubFetcher:
+    """从指定游标开始返回一页回答的接口客户端"""
+
+    cache = None
+
+    def __init__(self):
+        self.cursors = []
+
+    async def fetch_question_info(self, question_id):
+        return {"title": "标题", "description": ""}
+
+    async def fetch_question(self, question_id, max_answers=None):
+        # 完整爬取：不读写断点
+        return {"title": "标题", "description": "", "answers": [], "meta": {}}
+
+    async def iter_answer_pages(self, question_id, cursor=None, order="default"):
+        self.cursors.append(cursor)
+        yield [{"id": "1", "content": "<p>1</p>"}, {"id": "2", "content": "<p>2</p>"}], {"is_end": True}
+
+class StubScraper:
+    """只使用HTTP引擎的断点续爬爬虫"""
+
+    engine = "http"
+    resume = True
+    from_cache = incremental = stream = deep = comments = False
+    markdown_converter = media_downloader = sink = None
+    iter_answers = iter_answers
+    stream_question = stream_question
+
+    def __init__(self):
+        self.fetcher = StubFetcher()
+
+    def get_http_fetcher(self):
+        return self.fetcher
+
+    def get_page_cache(self):
+        return None
+
+def _interrupted_crawl(output_dir):
+    """模拟第一页已写入、停在第二页游标处的中断"""
+    writer = AnswerStreamWriter("123456", str(output_dir))
+    writer.write({"id": "1", "content": "<p>1</p>"})
+    writer.close()
+    checkpoint = Checkpoint("123456", str(output_dir))
+    checkpoint.cursor = CURSOR
+    checkpoint.record("1")
+    checkpoint.save()
+
+def _assert_resumed(output_dir, scraper):
+    assert scraper.fetcher.cursors == [CURSOR]
+    checkpoint = Checkpoint.load("123456", str(output_dir))
+    assert checkpoint.completed
+    assert checkpoint.seen_ids == {"1", "2"}
+    with open(output_dir / "123456" / "answers.jsonl", encoding="utf-8") as f:
+        assert [json.loads(line)["id"] for line in f] == ["1", "2"]
+
+def test_http_engine_resume_continues_from_saved_cursor(tmp_path):
+    _interrupted_crawl(tmp_path)
+    scraper = StubScraper()
+    asyncio.run(scrape_question(scraper, "123456", str(tmp_path)))
+    _assert_resumed(tmp_path, scraper)
+
+def test_http_engine_batch_resume_continues_from_saved_cursor(tmp_path):
+    _interrupted_crawl(tmp_path)
+    scraper = StubScraper()
+    asyncio.run(_scrape_one(scraper, "123456", str(tmp_path)))
+    _assert_resumed(tmp_path, scraper)
@@ -0,0 +1,47 @@
+"""
+Parquet导出的时间转换和写出测试
+"""
+
+import asyncio
+from datetime import datetime, timezone
+
+import pytest
+
+from zhihu_scraper.columnar import _to_timestamp
+
+EXPECTED = datetime(2024, 1, 2, 3, 4, 5, tzinfo=timezone.utc)
+
+def test_to_timestamp_accepts_epoch_and_iso():
+    assert _to_timestamp(1704164645) == EXPECTED
+    assert _to_timestamp(1704164645.0) == EXPECTED
+    assert _to_timestamp("1704164645") == EXPECTED
+    assert _to_timestamp("2024-01-02T03:04:05.000Z") == EXPECTED
+    assert _to_timestamp("2024-01-02T11:04:05+08:00") == EXPECTED
+    # 没有时区的ISO时间按UTC处理
+    assert _to_timestamp("2024-01-02T03:04:05") == EXPECTED
+
+def test_to_timestamp_rejects_unknown_values():
+    assert _to_timestamp(None) is None
+    assert _to_timestamp("") is None
+    assert _to_timestamp("昨天 12:00") is None
+    assert _to_timestamp(["2024"]) is None
+
+def test_sink_buffers_and_flushes(tmp_path):
+    pq = pytest.importorskip("pyarrow.parquet")
+    from zhihu_scraper.columnar import ParquetSink
+
+    sink = ParquetSink(str(tmp_path), partition_by="question", flush_rows=2)
+    answers = [
+        {"id": "1", "content": "<p>a</p>", "author": {"name": "作者"}, "upvotes": "12", "updated_time": 1704164645},
+        {"id": "2", "content": ""}
+    ]
+    asyncio.run(sink.aadd(answers, "123456", "标题"))
+    assert sink.written == 0 and len(sink.rows) == 1
+
+    sink.add([{"id": "3", "content": "<p>c</p>", "updated_time": "2024-01-02T03:04:05.000Z"}], "123456", "标题")
+    assert sink.written == 2 and sink.files == 1 and sink.rows == []
+
+    table = pq.read_table(str(tmp_path / "question_id=123456")).sort_by("answer_id")
+    assert table.column("answer_id").to_pylist() == ["1", "3"]
+    assert table.column("upvotes").to_pylist() == [12, 0]
+    assert table.column("updated_time").to_pylist() == [EXPECTED, EXPECTED]
@@ -0,0 +1,134 @@
+"""
+评论分页、子评论补全和流式写入测试
+"""
+
+import asyncio
+import json
+
+from zhihu_scraper.comments import COMMENT_API_BASE, CommentCrawler, crawl_comments
+
+def _comment(comment_id, reply_count=0, children=()):
+    return {
+        "id": comment_id,
+        "author": {"name": f"用户{comment_id}", "url_token": f"user-{comment_id}"},
+        "content": f"评论{comment_id}",
+        "like_count": 1,
+        "child_comment_count": reply_count,
+        "child_comments": list(children)
+    }
+
+def _pages(url, pages):
+    """把若干页评论连成以paging.next串联的接口响应"""
+    responses = {}
+    for index, page in enumerate(pages):
+        current = url if index == 0 else f"{url}?page={index}"
+        is_end = index == len(pages) - 1
+        paging = {"is_end": is_end, "next": None if is_end else f"{url}?page={index + 1}"}
+        responses[current] = {"data": page, "paging": paging}
+    return responses
+
+class StubClient:
+    """按地址返回预设响应的接口客户端，未预设的地址视为请求失败"""
+
+    def __init__(self):
+        self.responses = {}
+        # 回答1：两页根评论，第一条根评论附带1条子评论，共有3条
+        self.responses.update(_pages(f"{COMMENT_API_BASE}/answers/1/root_comment", [
+            [_comment("11", reply_count=3, children=[_comment("111")]), _comment("12")],
+            [_comment("13")],
+        ]))
+        self.responses.update(_pages(f"{COMMENT_API_BASE}/comment/11/child_comment", [
+            [_comment("111"), _comment("112")],
+            [_comment("113")],
+        ]))
+        # 回答2：一页根评论
+        self.responses.update(_pages(f"{COMMENT_API_BASE}/answers/2/root_comment", [[_comment("21")]]))
+        self.urls = []
+
+    async def get_json(self, url, params=None):
+        self.urls.append(url)
+        await asyncio.sleep(0)
+        if url not in self.responses:
+            raise RuntimeError(f"请求失败: {url}")
+        return self.responses[url]
+
+def test_crawl_follows_root_and_child_pages():
+    client = StubClient()
+    results = asyncio.run(CommentCrawler(client, concurrency=2).crawl(["1", 2, "1"]))
+
+    assert set(results) == {"1", "2"}
+    roots = results["1"]
+    assert [comment["id"] for comment in roots] == ["11", "12", "13"]
+    assert [reply["id"] for reply in roots[0]["replies"]] == ["111", "112", "113"]
+    assert roots[0]["author"]["link"] == "https://www.zhihu.com/people/user-11"
+    assert [comment["id"] for comment in results["2"]] == ["21"]
+    # 重复的回答ID只请求一次
+    assert client.urls.count(f"{COMMENT_API_BASE}/answers/1/root_comment") == 1
+
+def test_crawl_respects_comment_and_reply_limits():
+    client = StubClient()
+    crawler = CommentCrawler(client, max_comments=1, max_replies=2)
+    roots = asyncio.run(crawler.crawl(["1"]))["1"]
+    assert [comment["id"] for comment in roots] == ["11"]
+    assert [reply["id"] for reply in roots[0]["replies"]] == ["111", "112"]
+    # 达到上限后不再请求后续分页
+    assert f"{COMMENT_API_BASE}/answers/1/root_comment?page=1" not in client.urls
+    assert f"{COMMENT_API_BASE}/comment/11/child_comment?page=1" not in client.urls
+
+    # max_replies为0时只使用根评论附带的子评论
+    client = StubClient()
+    roots = asyncio.run(CommentCrawler(client, max_replies=0).crawl(["1"]))["1"]
+    assert [reply["id"] for reply in roots[0]["replies"]] == ["111"]
+    assert not any("child_comment" in url for url in client.urls)
+
+def test_crawl_reports_errors_to_async_callback():
+    finished = {}
+
+    async def on_answer(answer_id, comments, error):
+        await asyncio.sleep(0)
+        finished[answer_id] = ([comment["id"] for comment in comments], error)
+
+    results = asyncio.run(CommentCrawler(StubClient()).crawl(["1", "3"], on_answer=on_answer))
+    assert results == {}
+    assert finished["1"] == (["11", "12", "13"], None)
+    # 单个回答失败不影响其他回答
+    assert finished["3"][0] == [] and "answers/3" in finished["3"][1]
+
+class StubScraper:
+    engine = "http"
+    comments_output = "stream"
+    comment_concurrency = 2
+    max_comments = max_replies = None
+
+    def __init__(self, client, resume=False):
+        self.client = client
+        self.resume = resume
+
+    def get_http_fetcher(self):
+        return self.client
+
+def _streamed(output_dir):
+    with open(output_dir / "123456" / "comments.jsonl", encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+def test_stream_resume_skips_completed_answers(tmp_path):
+    answers = [{"id": "1"}, {"id": "2"}, {"id": "3"}]
+    count = asyncio.run(crawl_comments(StubScraper(StubClient()), "123456", answers, str(tmp_path)))
+    assert count == 3
+    records = {record["answer_id"]: record for record in _streamed(tmp_path)}
+    assert set(records) == {"1", "2", "3"}
+    assert "error" in records["3"]
+    # 中断时最后一行只写了一半
+    with open(tmp_path / "123456" / "comments.jsonl", "a", encoding="utf-8") as f:
+        f.write('{"answer_id": "4", "comm')
+
+    client = StubClient()
+    client.responses.update(_pages(f"{COMMENT_API_BASE}/answers/3/root_comment", [[_comment("31")]]))
+    count = asyncio.run(crawl_comments(StubScraper(client, resume=True), "123456", answers, str(tmp_path)))
+
+    assert count == 3
+    # 只重新获取上次出错的回答
+    assert client.urls == [f"{COMMENT_API_BASE}/answers/3/root_comment"]
+    records = _streamed(tmp_path)
+    assert sorted(record["answer_id"] for record in records) == ["1", "2", "3"]
+    assert not any(record.get("error") for record in records)
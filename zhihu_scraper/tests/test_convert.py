@@ -0,0 +1,54 @@
+"""
+回答HTML到Markdown转换的测试（公式、代码块、图片和外链）
+"""
+
+import pytest
+
+from zhihu_scraper.convert import MarkdownCache, content_hash, html_to_markdown
+
+pytest.importorskip("html2text")
+
+def test_inline_and_block_formula():
+    html = (
+        '<p>质能方程 <img eeimg="1" src="https://www.zhihu.com/equation?tex=E%3Dmc%5E2" alt="E=mc^2"> 成立</p>'
+        '<p><img eeimg="1" src="https://www.zhihu.com/equation?tex=a_1" alt="\\sum_{i=1}^n a_i"></p>'
+    )
+    markdown = html_to_markdown(html)
+    assert "质能方程 $E=mc^2$ 成立" in markdown
+    # 下划线和反斜杠不能被html2text转义
+    assert "$$\\sum_{i=1}^n a_i$$" in markdown
+    assert "ZHMDTOKEN" not in markdown
+
+def test_code_block_keeps_language_and_whitespace():
+    html = '<pre><code class="language-python">def f(x):\n    return x * 2  # *不是强调*\n</code></pre>'
+    markdown = html_to_markdown(html)
+    assert markdown == "```python\ndef f(x):\n    return x * 2  # *不是强调*\n```"
+
+def test_code_containing_fence_uses_longer_fence():
+    markdown = html_to_markdown("<pre><code>```\nnested\n```</code></pre>")
+    assert markdown.startswith("````\n")
+    assert markdown.endswith("\n````")
+
+def test_lazy_images_and_redirect_links():
+    html = (
+        '<figure><noscript><img src="https://pic1.zhimg.com/a.jpg"></noscript>'
+        '<img src="data:image/svg+xml;utf8,&lt;svg&gt;" data-original="https://pic1.zhimg.com/a.jpg">'
+        '<figcaption>说明</figcaption></figure>'
+        '<p><a href="https://link.zhihu.com/?target=https%3A//example.com/page">外链</a></p>'
+    )
+    markdown = html_to_markdown(html)
+    assert markdown.count("https://pic1.zhimg.com/a.jpg") == 1
+    assert "data:image" not in markdown
+    assert "[外链](https://example.com/page)" in markdown
+
+def test_empty_html():
+    assert html_to_markdown("") == ""
+    assert html_to_markdown(None) == ""
+
+def test_markdown_cache_roundtrip(tmp_path):
+    cache = MarkdownCache(str(tmp_path))
+    digest = content_hash("<p>a</p>")
+    assert cache.get(digest) is None
+    cache.put(digest, "a")
+    assert cache.get(digest) == "a"
+    assert content_hash("<p>a</p>") != content_hash("<p>b</p>")
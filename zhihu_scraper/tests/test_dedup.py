@@ -0,0 +1,43 @@
+"""
+回答去重键和去重集合测试
+"""
+
+import hashlib
+
+from zhihu_scraper.dedup import SeenSet, answer_key, dedupe_answers
+
+def test_answer_key_prefers_id():
+    assert answer_key({"id": 123, "content": "a"}) == "123"
+    assert answer_key({"id": "123"}) == "123"
+
+def test_answer_key_hashes_full_content_without_id():
+    # 开头相同的两个回答不能被当成同一个
+    first = {"content": "x" * 200 + "结尾一"}
+    second = {"content": "x" * 200 + "结尾二"}
+    assert answer_key(first) == "sha1:" + hashlib.sha1(first["content"].encode("utf-8")).hexdigest()
+    assert answer_key(first) != answer_key(second)
+    assert answer_key({"id": "", "content": ""}) is None
+
+def test_seen_set_shares_checkpoint_keys():
+    keys = {"1"}
+    seen = SeenSet(keys)
+    assert {"id": "1"} in seen
+    assert not seen.add({"id": "1"})
+    assert seen.add({"id": "2"})
+    assert not seen.add({"content": ""})
+    assert keys == {"1", "2"}
+    assert len(seen) == 2
+
+def test_seen_set_filter_yields_first_occurrence():
+    answers = [{"id": "1"}, {"id": "2"}, {"id": "1"}, {"content": "匿名"}, {"content": "匿名"}]
+    assert list(SeenSet().filter(answers)) == [{"id": "1"}, {"id": "2"}, {"content": "匿名"}]
+
+def test_dedupe_answers_keeps_order():
+    answers = [
+        {"id": "1", "content": "旧"},
+        {"id": "2", "content": "b"},
+        {"id": "1", "content": "新"},
+        {"content": None}
+    ]
+    assert [answer["content"] for answer in dedupe_answers(answers)] == ["旧", "b"]
+    assert [answer["content"] for answer in dedupe_answers(answers, keep='last')] == ["新", "b"]
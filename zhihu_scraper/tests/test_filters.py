@@ -0,0 +1,66 @@
+"""
+资源过滤规则和路由处理测试
+"""
+
+import asyncio
+
+from zhihu_scraper.filters import ResourceFilter
+
+def test_should_block_by_type_pattern_and_third_party_script():
+    resource_filter = ResourceFilter()
+    assert resource_filter.should_block("https://pic1.zhimg.com/v2-a.jpg", "image")
+    assert resource_filter.should_block("https://static.zhihu.com/font.woff2", "font")
+    assert resource_filter.should_block("https://hm.baidu.com/hm.js?abc", "xhr")
+    assert resource_filter.should_block("https://cdn.example.com/lib.js", "script")
+
+    assert not resource_filter.should_block("https://www.zhihu.com/question/1", "document")
+    assert not resource_filter.should_block("https://www.zhihu.com/api/v4/questions/1/feeds", "xhr")
+    # 知乎自身域名及其子域名下的脚本放行，相似的域名不算
+    assert not resource_filter.should_block("https://static.zhihu.com/heifetz/main.js", "script")
+    assert not resource_filter.should_block("https://zhimg.com/app.js", "script")
+    assert resource_filter.should_block("https://evilzhihu.com/app.js", "script")
+
+def test_allow_patterns_take_priority():
+    resource_filter = ResourceFilter(allow_patterns=["*pic1.zhimg.com*", "*hm.baidu.com*"])
+    assert not resource_filter.should_block("https://pic1.zhimg.com/v2-a.jpg", "image")
+    assert not resource_filter.should_block("https://hm.baidu.com/hm.js", "script")
+    assert resource_filter.should_block("https://pic2.zhimg.com/v2-b.jpg", "image")
+
+def test_custom_rules_replace_defaults():
+    resource_filter = ResourceFilter(block_types=[], block_patterns=["*/ads/*"], block_third_party_scripts=False)
+    assert not resource_filter.should_block("https://pic1.zhimg.com/v2-a.jpg", "image")
+    assert not resource_filter.should_block("https://hm.baidu.com/hm.js", "script")
+    assert not resource_filter.should_block("https://cdn.example.com/lib.js", "script")
+    assert resource_filter.should_block("https://www.zhihu.com/ads/banner", "xhr")
+
+class FakeRequest:
+    def __init__(self, url, resource_type):
+        self.url = url
+        self.resource_type = resource_type
+
+class FakeRoute:
+    def __init__(self, url, resource_type):
+        self.request = FakeRequest(url, resource_type)
+        self.result = None
+
+    async def abort(self):
+        self.result = "abort"
+
+    async def fallback(self):
+        self.result = "fallback"
+
+def test_handle_aborts_or_falls_back_and_counts():
+    resource_filter = ResourceFilter()
+    routes = [
+        FakeRoute("https://pic1.zhimg.com/v2-a.jpg", "image"),
+        FakeRoute("https://www.zhihu.com/question/1", "document"),
+    ]
+
+    async def run():
+        for route in routes:
+            await resource_filter.handle(route)
+
+    asyncio.run(run())
+    assert [route.result for route in routes] == ["abort", "fallback"]
+    assert resource_filter.blocked == 1
+    assert resource_filter.allowed == 1
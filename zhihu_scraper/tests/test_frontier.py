@@ -0,0 +1,81 @@
+"""
+持久化任务队列的租约、确认和重试测试
+"""
+
+from zhihu_scraper.frontier import DONE, FAILED, LEASED, PENDING, JobQueue
+
+def test_enqueue_dedupes_and_leases_by_priority(tmp_path):
+    queue = JobQueue(str(tmp_path / "queue.db"))
+    assert queue.enqueue(["1", "https://www.zhihu.com/question/2", "1", "不是问题"]) == 3
+    queue.enqueue(["3"], priority=10)
+
+    jobs = queue.lease(limit=5, worker="test")
+    assert [job["question_id"] for job in jobs] == ["3", "1", "2"]
+    assert all(job["attempts"] == 1 for job in jobs)
+    # 已被取出且租约未过期的任务不会再次分配
+    assert queue.lease() == []
+    assert queue.stats()[LEASED] == 3
+    queue.close()
+
+def test_expired_lease_is_reassigned_and_old_ack_rejected(tmp_path):
+    queue = JobQueue(str(tmp_path / "queue.db"), visibility_timeout=0)
+    queue.enqueue(["1"])
+    first = queue.lease()[0]
+
+    second = queue.lease()[0]
+    assert second["question_id"] == "1"
+    assert second["attempts"] == 2
+    assert second["lease_token"] != first["lease_token"]
+
+    assert not queue.ack(first)
+    assert queue.ack(second)
+    assert queue.stats()[DONE] == 1
+    assert queue.next_available_in() is None
+    queue.close()
+
+def test_retry_backs_off_then_fails(tmp_path):
+    queue = JobQueue(str(tmp_path / "queue.db"), max_attempts=2, retry_delay=60)
+    queue.enqueue(["1"])
+
+    job = queue.lease()[0]
+    assert queue.retry(job, "超时") == PENDING
+    # 按retry_delay退避，延迟未到时取不到任务
+    assert queue.lease() == []
+    assert queue.next_available_in() > 50
+
+    queue.enqueue(["2"])
+    job = queue.lease()[0]
+    assert job["question_id"] == "2"
+    assert queue.retry(job, "超时", delay=0) == PENDING
+    job = queue.lease()[0]
+    assert job["attempts"] == 2
+    assert queue.retry(job, "超时") == FAILED
+    assert queue.retry(job, "超时") is None
+    assert queue.stats()[FAILED] == 1
+    queue.close()
+
+def test_requeue_resets_finished_jobs(tmp_path):
+    queue = JobQueue(str(tmp_path / "queue.db"))
+    queue.enqueue(["1"])
+    queue.ack(queue.lease()[0])
+
+    queue.enqueue(["1"])
+    assert queue.lease() == []
+    queue.enqueue(["1"], requeue=True)
+    job = queue.lease()[0]
+    assert job["attempts"] == 1
+    queue.close()
+
+def test_expired_lease_at_max_attempts_is_failed(tmp_path):
+    # 工作进程每次都在ack()或retry()之前崩溃，任务不能被无限重新分配
+    queue = JobQueue(str(tmp_path / "queue.db"), visibility_timeout=0, max_attempts=2)
+    queue.enqueue(["1"])
+    assert queue.lease()[0]["attempts"] == 1
+    assert queue.lease()[0]["attempts"] == 2
+
+    assert queue.lease() == []
+    assert queue.stats()[FAILED] == 1
+    assert queue.next_available_in() is None
+    row = queue.conn.execute("SELECT last_error, lease_token FROM jobs WHERE question_id = '1'").fetchone()
+    assert row["last_error"] and row["lease_token"] is None
+    queue.close()
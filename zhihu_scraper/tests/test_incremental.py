@@ -0,0 +1,131 @@
+"""
+增量爬取的回答比较与合并测试
+"""
+
+import asyncio
+import json
+
+from zhihu_scraper.batch import _scrape_one
+from zhihu_scraper.crawler import scrape_question
+from zhihu_scraper.incremental import incremental_update, index_answers, is_unchanged, merge_answers
+from zhihu_scraper.stream import iter_answers
+
+def test_is_unchanged_matches_iso_and_epoch_updated_time():
+    # 上次由页面提取（ISO字符串），这次由接口获取（Unix时间戳），是同一个时间
+    previous = {"answers": [{"id": "1", "content": "a", "updated_time": "2024-01-02T03:04:05.000Z"}]}
+    answer = {"id": "1", "content": "a", "updated_time": 1704164645}
+    assert is_unchanged(answer, index_answers(previous))
+
+def test_is_unchanged_detects_newer_epoch_against_iso():
+    previous = {"answers": [{"id": "1", "content": "a", "updated_time": "2024-01-02T03:04:05+00:00"}]}
+    answer = {"id": "1", "content": "a", "updated_time": 1704164646}
+    assert not is_unchanged(answer, index_answers(previous))
+
+def test_is_unchanged_compares_content_without_updated_time():
+    known = index_answers({"answers": [{"content": "<p>匿名回答</p>"}]})
+    assert is_unchanged({"content": "<p>匿名回答</p>"}, known)
+    assert not is_unchanged({"id": "2", "content": "<p>匿名回答</p>"}, known)
+
+def test_merge_answers_updates_in_place_and_prepends_new():
+    previous = {
+        "title": "旧标题",
+        "answers": [
+            {"id": "1", "content": "a", "updated_time": 1},
+            {"id": "2", "content": "b", "updated_time": 1},
+            {"content": "匿名"}
+        ]
+    }
+    delta = [
+        {"id": "3", "content": "c", "updated_time": 3},
+        {"id": "2", "content": "b2", "updated_time": 2},
+        {"content": "匿名"}
+    ]
+    result, stats = merge_answers(previous, delta, {"title": "新标题"})
+
+    assert [answer.get("id") for answer in result["answers"]] == ["3", "1", "2", None]
+    assert result["answers"][2]["content"] == "b2"
+    assert result["title"] == "新标题"
+    assert (stats["added"], stats["updated"], stats["unchanged"]) == (1, 1, 2)
+    assert result["meta"]["incremental"] is stats
+
+class StubFetcher:
+    """返回固定回答的接口客户端"""
+
+    cache = None
+
+    def __init__(self, answers):
+        self.answers = answers
+        self.orders = []
+
+    async def fetch_question_info(self, question_id):
+        return {"title": "新标题", "description": ""}
+
+    async def fetch_question(self, question_id, max_answers=None):
+        # 完整爬取：结果会覆盖上次保存的回答
+        return {"title": "新标题", "description": "", "answers": list(self.answers), "meta": {}}
+
+    async def iter_answer_pages(self, question_id, cursor=None, order="default"):
+        self.orders.append(order)
+        yield list(self.answers), {"is_end": True}
+
+class StubScraper:
+    """只使用HTTP引擎的爬虫，访问浏览器时测试失败"""
+
+    engine = "http"
+    incremental = True
+    from_cache = stream = deep = resume = False
+    markdown_converter = media_downloader = sink = None
+    iter_answers = iter_answers
+    incremental_update = incremental_update
+
+    def __init__(self, fetcher):
+        self.fetcher = fetcher
+
+    def get_http_fetcher(self):
+        return self.fetcher
+
+    def get_page_cache(self):
+        return None
+
+    async def get_browser_pool(self):
+        raise AssertionError("HTTP引擎的增量爬取不应启动浏览器")
+
+def _write_previous(output_dir):
+    previous = {
+        "title": "旧标题",
+        "description": "",
+        "answers": [
+            {"id": "1", "content": "a", "updated_time": 1},
+            {"id": "2", "content": "b", "updated_time": 1}
+        ],
+        "meta": {"question_id": "123456"}
+    }
+    (output_dir / "zhihu_question_123456.json").write_text(json.dumps(previous), encoding="utf-8")
+
+def _fetcher():
+    return StubFetcher([
+        {"id": "3", "content": "c", "updated_time": 3},
+        {"id": "2", "content": "b2", "updated_time": 2},
+        {"id": "1", "content": "a", "updated_time": 1}
+    ])
+
+def _assert_merged(output_dir, fetcher):
+    saved = json.loads((output_dir / "zhihu_question_123456.json").read_text(encoding="utf-8"))
+    assert fetcher.orders == ["updated"]
+    assert [answer["id"] for answer in saved["answers"]] == ["3", "1", "2"]
+    assert saved["answers"][2]["content"] == "b2"
+    assert saved["title"] == "新标题"
+    stats = saved["meta"]["incremental"]
+    assert (stats["added"], stats["updated"], stats["unchanged"]) == (1, 1, 1)
+
+def test_http_engine_incremental_scrape_merges_previous_result(tmp_path):
+    _write_previous(tmp_path)
+    fetcher = _fetcher()
+    asyncio.run(scrape_question(StubScraper(fetcher), "123456", str(tmp_path)))
+    _assert_merged(tmp_path, fetcher)
+
+def test_http_engine_incremental_batch_merges_previous_result(tmp_path):
+    _write_previous(tmp_path)
+    fetcher = _fetcher()
+    asyncio.run(_scrape_one(StubScraper(fetcher), "123456", str(tmp_path)))
+    _assert_merged(tmp_path, fetcher)
@@ -0,0 +1,53 @@
+"""
+滚动加载的停止条件测试
+"""
+
+import asyncio
+
+from zhihu_scraper.loader import PAGE_STATE_JS, WAIT_FOR_GROWTH_JS, scroll_until_stable, wait_for_growth
+
+class FakePage:
+    """每次滚动后回答数量按growth依次增长的页面，growth用完后页面不再增长"""
+
+    def __init__(self, count, growth):
+        self.count = count
+        self.growth = list(growth)
+        self.waits = []
+
+    async def evaluate(self, script, arg=None):
+        if script == PAGE_STATE_JS:
+            return {"count": self.count, "height": self.count * 100}
+        assert script == WAIT_FOR_GROWTH_JS
+        self.waits.append(arg)
+        if not self.growth:
+            return False
+        self.count += self.growth.pop(0)
+        return True
+
+def test_stops_when_page_stops_growing():
+    page = FakePage(5, [5, 5])
+    assert asyncio.run(scroll_until_stable(page, idle_timeout=2)) == 15
+    # 两次增长后第三次等待超时
+    assert len(page.waits) == 3
+    assert page.waits[-1]["count"] == 15
+    assert page.waits[-1]["timeout"] == 2000
+
+def test_stops_at_target_count():
+    page = FakePage(5, [5, 5, 5])
+    assert asyncio.run(scroll_until_stable(page, target_count=10)) == 10
+    assert len(page.waits) == 1
+    # 首屏已达到目标时不滚动
+    page = FakePage(20, [5])
+    assert asyncio.run(scroll_until_stable(page, target_count=10)) == 20
+    assert page.waits == []
+
+def test_stops_at_max_time():
+    page = FakePage(5, [5] * 100)
+    assert asyncio.run(scroll_until_stable(page, max_time=0)) == 5
+    assert page.waits == []
+
+def test_wait_for_growth_passes_previous_state():
+    page = FakePage(5, [])
+    state = {"count": 3, "height": 300}
+    assert not asyncio.run(wait_for_growth(page, state, 1.5, selector=".List-item"))
+    assert page.waits == [{"selector": ".List-item", "count": 3, "height": 300, "timeout": 1500}]
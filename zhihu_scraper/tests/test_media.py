@@ -0,0 +1,100 @@
+"""
+媒体地址收集、链接改写和下载测试
+"""
+
+import asyncio
+import os
+import threading
+
+import pytest
+
+from zhihu_scraper.media import collect_media_urls, rewrite_links
+
+def test_collect_media_urls_prefers_real_source():
+    content = (
+        '<img src="data:image/svg+xml;utf8,x" data-original="//pic1.zhimg.com/v2-a_r.jpg" data-actualsrc="//pic1.zhimg.com/v2-a_b.jpg">'
+        '<img eeimg="1" src="https://www.zhihu.com/equation?tex=x" alt="x">'
+        '<img src="https://pic2.zhimg.com/v2-b.png?a=1&amp;b=2">'
+        '<video poster="https://pic3.zhimg.com/cover.jpg"></video>'
+        '<img src="https://pic1.zhimg.com/v2-a_r.jpg">'
+        '<img src="/relative.png">'
+    )
+    assert collect_media_urls(content) == [
+        "https://pic1.zhimg.com/v2-a_r.jpg",
+        "https://pic2.zhimg.com/v2-b.png?a=1&b=2",
+        "https://pic3.zhimg.com/cover.jpg"
+    ]
+    assert collect_media_urls(None) == []
+
+def test_rewrite_links_relative_to_markdown_file(tmp_path):
+    media_root = os.path.join(str(tmp_path), "media")
+    base_dir = os.path.join(str(tmp_path), "123456")
+    mapping = {
+        "https://pic1.zhimg.com/v2-a.jpg": "ab/abc.jpg",
+        "https://pic1.zhimg.com/v2-a.jpg?source=1": "cd/cde.jpg"
+    }
+    text = (
+        "![](https://pic1.zhimg.com/v2-a.jpg)\n"
+        "![](https://pic1.zhimg.com/v2-a.jpg?source=1)\n"
+        '<img src="//pic1.zhimg.com/v2-a.jpg">'
+    )
+    assert rewrite_links(text, mapping, media_root, base_dir) == (
+        "![](../media/ab/abc.jpg)\n"
+        "![](../media/cd/cde.jpg)\n"
+        '<img src="../media/ab/abc.jpg">'
+    )
+
+def test_download_without_download_all(tmp_path):
+    httpx = pytest.importorskip("httpx")
+    from zhihu_scraper.media import MediaDownloader
+
+    def handler(request):
+        return httpx.Response(200, content=b"same image", headers={"content-type": "image/png"})
+
+    async def run():
+        downloader = MediaDownloader(root=str(tmp_path))
+        downloader._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        try:
+            first = await downloader.download("https://pic1.zhimg.com/a.png")
+            mapping = await downloader.download_all(["https://pic2.zhimg.com/b.png", "https://pic1.zhimg.com/a.png"])
+        finally:
+            await downloader.close()
+        return first, mapping
+
+    first, mapping = asyncio.run(run())
+    assert first.endswith(".png")
+    # 相同内容只保存一份
+    assert mapping == {"https://pic2.zhimg.com/b.png": first, "https://pic1.zhimg.com/a.png": first}
+    assert os.path.exists(os.path.join(str(tmp_path), first))
+
+def test_index_queries_run_off_the_event_loop(tmp_path, monkeypatch):
+    httpx = pytest.importorskip("httpx")
+    from zhihu_scraper.media import MediaDownloader
+
+    threads = set()
+    for name in ("lookup", "_lookup_digest", "_record"):
+        method = getattr(MediaDownloader, name)
+
+        def recording(self, *args, _method=method, **kwargs):
+            threads.add(threading.get_ident())
+            return _method(self, *args, **kwargs)
+
+        monkeypatch.setattr(MediaDownloader, name, recording)
+
+    def handler(request):
+        return httpx.Response(200, content=request.url.path.encode(), headers={"content-type": "image/png"})
+
+    async def run():
+        downloader = MediaDownloader(root=str(tmp_path))
+        downloader._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        try:
+            first = await downloader.download("https://pic1.zhimg.com/a.png")
+            # 已下载的地址直接从索引返回
+            again = await downloader.download("https://pic1.zhimg.com/a.png")
+        finally:
+            await downloader.close()
+        return first, again
+
+    first, again = asyncio.run(run())
+    assert first == again
+    assert threads and threading.get_ident() not in threads
@@ -0,0 +1,88 @@
+"""
+离线解析页面HTML和接口JSON快照的测试
+"""
+
+import gzip
+import json
+
+from zhihu_scraper.parser import parse_json_snapshot, parse_question_html, parse_snapshot
+
+INITIAL_DATA = {
+    "initialState": {
+        "entities": {
+            "questions": {"123456": {"title": "初始数据标题", "detail": "问题描述"}},
+            "users": {"someone": {"name": "作者乙", "url_token": "someone"}},
+            "answers": {
+                "2002": {"id": 2002, "author": "someone", "content": "<p>首屏回答</p>",
+                         "voteupCount": 7, "question": {"id": 123456}},
+                "3003": {"id": 3003, "content": "<p>其他问题</p>", "question": {"id": 999999}}
+            }
+        }
+    }
+}
+
+QUESTION_HTML = """
+<html><head><link rel="canonical" href="https://www.zhihu.com/question/123456"></head>
+<body>
+<h1 class="QuestionHeader-title">问题标题</h1>
+<div class="List-item">
+  <div class="ContentItem AnswerItem" data-zop='{"itemId": 1001}'>
+    <meta itemprop="dateModified" content="2024-01-02T03:04:05.000Z">
+    <div class="AuthorInfo-name"><a href="/people/author">作者甲</a></div>
+    <div class="RichText"><p>DOM中的回答</p></div>
+    <button aria-label="赞同">赞同 1,234</button>
+    <button class="Button--withIcon Button--withLabel">56 条评论</button>
+  </div>
+</div>
+<script id="js-initialData" type="text/json">%s</script>
+</body></html>
+""" % json.dumps(INITIAL_DATA, ensure_ascii=False)
+
+def test_parse_question_html_merges_dom_and_initial_data():
+    parsed = parse_question_html(QUESTION_HTML)
+    assert parsed["question_id"] == "123456"
+    assert parsed["title"] == "问题标题"
+    assert parsed["description"] == "问题描述"
+
+    answers = {answer["id"]: answer for answer in parsed["answers"]}
+    assert set(answers) == {"1001", "2002"}
+    dom_answer = answers["1001"]
+    assert dom_answer["author"] == {"name": "作者甲", "link": "https://www.zhihu.com/people/author"}
+    assert dom_answer["content"] == "<p>DOM中的回答</p>"
+    assert dom_answer["upvotes"] == 1234
+    assert dom_answer["comments"] == 56
+    assert dom_answer["updated_time"] == "2024-01-02T03:04:05.000Z"
+    assert answers["2002"]["author"]["name"] == "作者乙"
+    assert answers["2002"]["upvotes"] == 7
+
+def test_parse_json_snapshot_answers_payload():
+    payload = {
+        "data": [
+            {"target_type": "answer", "target": {"id": 1, "content": "<p>a</p>", "voteup_count": 3,
+                                                 "question": {"id": 123456}}},
+            {"target_type": "zvideo", "target": {"id": 2}}
+        ],
+        "paging": {"next": "https://www.zhihu.com/api/v4/questions/123456/feeds?cursor=x", "is_end": False}
+    }
+    parsed = parse_json_snapshot(payload)
+    assert parsed["question_id"] == "123456"
+    assert [answer["id"] for answer in parsed["answers"]] == ["1"]
+    assert parsed["answers"][0]["url"] == "https://www.zhihu.com/question/123456/answer/1"
+
+def test_parse_json_snapshot_question_and_initial_data():
+    question = parse_json_snapshot({"type": "question", "id": 123456, "title": "标题", "detail": "描述"})
+    assert question == {"question_id": "123456", "title": "标题", "description": "描述", "answers": []}
+
+    # 页面初始数据必须知道问题ID才能筛选回答
+    assert parse_json_snapshot(INITIAL_DATA) is None
+    parsed = parse_json_snapshot(INITIAL_DATA, "123456")
+    assert [answer["id"] for answer in parsed["answers"]] == ["2002"]
+    assert parse_json_snapshot({"unknown": True}) is None
+    assert parse_json_snapshot([1, 2]) is None
+
+def test_parse_snapshot_reads_gzip_and_filename_id(tmp_path):
+    path = tmp_path / "question_654321.json.gz"
+    path.write_bytes(gzip.compress(json.dumps({"data": [{"id": 5, "content": "<p>x</p>"}]}).encode("utf-8")))
+    parsed = parse_snapshot(str(path))
+    assert parsed["question_id"] == "654321"
+    assert parsed["answers"][0]["id"] == "5"
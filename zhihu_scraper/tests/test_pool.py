@@ -0,0 +1,137 @@
+"""
+浏览器页面池的复用、回收和崩溃重启测试
+"""
+
+import asyncio
+
+import pytest
+
+pytest.importorskip("playwright")
+
+from zhihu_scraper.pool import BrowserPool
+
+class FakePage:
+    def __init__(self, healthy=True):
+        self.healthy = healthy
+        self.closed = False
+
+    def is_closed(self):
+        return self.closed
+
+    async def evaluate(self, script):
+        if not self.healthy:
+            raise RuntimeError("页面无响应")
+        return 1
+
+    async def close(self):
+        self.closed = True
+
+class FakeContext:
+    def __init__(self):
+        self.pages = []
+        self.handlers = []
+        self.closed = False
+
+    def on(self, event, handler):
+        self.handlers.append(handler)
+
+    async def new_page(self):
+        page = FakePage()
+        self.pages.append(page)
+        return page
+
+    async def close(self):
+        self.closed = True
+        for handler in self.handlers:
+            handler()
+
+def make_pool(**kwargs):
+    contexts = []
+
+    async def launch_context(playwright):
+        context = FakeContext()
+        contexts.append(context)
+        return context
+
+    pool = BrowserPool(launch_context, **kwargs)
+    # 不启动真实的Playwright
+    pool._playwright = object()
+    return pool, contexts
+
+def test_pages_are_reused_until_max_uses():
+    pool, contexts = make_pool(max_uses=2)
+
+    async def run():
+        async with pool.page() as first:
+            pass
+        async with pool.page() as second:
+            pass
+        async with pool.page() as third:
+            pass
+        return first, second, third
+
+    first, second, third = asyncio.run(run())
+    assert first is second
+    # 使用两次后关闭并重建
+    assert first.closed
+    assert third is not first
+    assert len(contexts) == 1 and pool.launches == 1
+
+def test_unhealthy_and_failed_pages_are_discarded():
+    pool, contexts = make_pool()
+
+    async def run():
+        with pytest.raises(ValueError):
+            async with pool.page() as failed:
+                raise ValueError("爬取出错")
+        async with pool.page() as page:
+            page.healthy = False
+        async with pool.page() as fresh:
+            pass
+        return failed, page, fresh
+
+    failed, page, fresh = asyncio.run(run())
+    assert failed.closed
+    # 健康检查失败的空闲页面在取出时被关闭
+    assert page.closed
+    assert fresh not in (failed, page)
+    assert len(contexts[0].pages) == 3
+
+def test_size_limits_concurrent_pages():
+    pool, contexts = make_pool(size=2)
+    active = 0
+    peak = 0
+
+    async def borrow():
+        nonlocal active, peak
+        async with pool.page():
+            active += 1
+            peak = max(peak, active)
+            await asyncio.sleep(0.01)
+            active -= 1
+
+    async def run():
+        await asyncio.gather(*(borrow() for _ in range(5)))
+
+    asyncio.run(run())
+    assert peak == 2
+    assert len(contexts[0].pages) == 2
+
+def test_restarts_after_context_closed():
+    pool, contexts = make_pool()
+
+    async def run():
+        async with pool.page() as first:
+            pass
+        # 浏览器意外关闭
+        await contexts[0].close()
+        assert not pool.started
+        async with pool.page() as second:
+            pass
+        await pool.close()
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert second is not first
+    assert len(contexts) == 2 and pool.launches == 2
+    assert contexts[1].closed and second.closed
@@ -0,0 +1,60 @@
+"""
+按主机限速的AIMD调整和限流暂停测试
+"""
+
+import asyncio
+import time
+
+from zhihu_scraper.ratelimit import HostLimiter, RateLimiter
+
+def test_success_increases_additively():
+    limiter = HostLimiter("www.zhihu.com", rate=2.0, max_rate=2.15, concurrency=4)
+    limiter.on_success(latency=0.1)
+    assert limiter.rate == 2.1
+    assert limiter.concurrency == 4.25
+    limiter.on_success(latency=0.1)
+    assert limiter.rate == 2.15
+
+def test_slow_response_decreases_multiplicatively():
+    limiter = HostLimiter("www.zhihu.com", rate=2.0, concurrency=4, slow_threshold=1.0)
+    limiter.on_success(latency=5.0)
+    assert limiter.rate == 1.0
+    assert limiter.concurrency == 2
+    assert limiter.paused_until == 0.0
+
+def test_throttle_halves_and_pauses_once():
+    limiter = HostLimiter("www.zhihu.com", rate=2.0, min_rate=0.2, concurrency=4, cooldown=30.0)
+    limiter.on_throttle(429)
+    assert limiter.rate == 1.0
+    assert limiter.concurrency == 2
+    assert limiter.paused_until - time.monotonic() > 29
+    assert limiter._wait_time(time.monotonic()) > 29
+
+    # 暂停期间陆续返回的限流响应不再降速
+    limiter.on_throttle(429)
+    assert limiter.rate == 1.0
+    assert limiter.throttled == 1
+
+def test_consecutive_throttles_double_cooldown():
+    limiter = HostLimiter("www.zhihu.com", cooldown=10.0)
+    limiter.on_throttle(403)
+    limiter.paused_until = 0.0
+    limiter.on_throttle(403)
+    assert limiter.paused_until - time.monotonic() > 19
+    limiter.on_success()
+    assert limiter.throttled == 0
+
+def test_request_reports_status_per_host():
+    async def run():
+        limiter = RateLimiter(rate=5.0, cooldown=30.0)
+        async with limiter.request("https://www.zhihu.com/api/v4/questions/1") as slot:
+            slot.record(429)
+        async with limiter.request("https://pic1.zhimg.com/a.png") as slot:
+            slot.record(200)
+        return limiter
+
+    limiter = asyncio.run(run())
+    assert limiter.host("https://www.zhihu.com/").rate == 2.5
+    assert limiter.host("https://www.zhihu.com/").snapshot()["paused"] > 29
+    assert limiter.host("https://pic1.zhimg.com/").rate == 5.1
+    assert all(host.in_flight == 0 for host in limiter.hosts.values())
@@ -0,0 +1,107 @@
+"""
+步骤重试的错误分类、重试和导航超时测试
+"""
+
+import asyncio
+import json
+import time
+
+import pytest
+
+from zhihu_scraper.ratelimit import RateLimiter
+from zhihu_scraper.retry import (
+    BLOCKED, NAVIGATION, OTHER, PARSE, TIMEOUT,
+    BlockedError, ParseError, RetryPolicy, StepError, classify_error, navigate
+)
+
+class StatusError(Exception):
+    def __init__(self, status):
+        super().__init__(f"HTTP {status}")
+        self.status = status
+
+class FakeResponse:
+    def __init__(self, status):
+        self.status = status
+
+class FakePage:
+    def __init__(self, statuses, delay=0):
+        self.statuses = list(statuses)
+        self.delay = delay
+        self.calls = 0
+
+    async def goto(self, url, **kwargs):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        return FakeResponse(self.statuses.pop(0))
+
+def test_classify_error():
+    assert classify_error(asyncio.TimeoutError()) == TIMEOUT
+    assert classify_error(BlockedError("验证页面")) == BLOCKED
+    assert classify_error(StatusError(429)) == BLOCKED
+    assert classify_error(StatusError(401)) == BLOCKED
+    assert classify_error(ParseError("缺少字段")) == PARSE
+    assert classify_error(json.JSONDecodeError("bad", "{", 0)) == PARSE
+    assert classify_error(Exception("net::ERR_CONNECTION_RESET at https://www.zhihu.com")) == NAVIGATION
+    assert classify_error(StepError("fetch", TIMEOUT, 3, None)) == TIMEOUT
+    assert classify_error(RuntimeError("其他错误")) == OTHER
+
+def test_run_retries_until_success():
+    calls = []
+
+    async def flaky():
+        calls.append(1)
+        if len(calls) < 3:
+            raise ParseError("数据不完整")
+        return "ok"
+
+    policy = RetryPolicy(attempts=3, base_delay=0)
+    assert asyncio.run(policy.run("extract", flaky)) == "ok"
+    assert len(calls) == 3
+
+def test_run_does_not_retry_other_errors():
+    calls = []
+
+    async def broken():
+        calls.append(1)
+        raise RuntimeError("程序错误")
+
+    with pytest.raises(StepError) as excinfo:
+        asyncio.run(RetryPolicy(attempts=3, base_delay=0).run("extract", broken))
+    assert excinfo.value.kind == OTHER
+    assert excinfo.value.attempts == 1
+    assert len(calls) == 1
+
+def test_run_step_timeout():
+    async def slow():
+        await asyncio.sleep(1)
+
+    policy = RetryPolicy(attempts=2, base_delay=0, timeouts={"wait": 0.05})
+    with pytest.raises(StepError) as excinfo:
+        asyncio.run(policy.run("wait", slow))
+    assert excinfo.value.kind == TIMEOUT
+    assert excinfo.value.attempts == 2
+
+def test_navigate_timeout_excludes_rate_limiter_pause():
+    # 主机暂停的时间比navigate超时还长，排队不应导致超时
+    rate_limiter = RateLimiter()
+    url = "https://www.zhihu.com/question/1"
+    rate_limiter.host(url).paused_until = time.monotonic() + 0.3
+    policy = RetryPolicy(attempts=1, timeouts={"navigate": 0.2})
+    page = FakePage([200])
+    response = asyncio.run(navigate(page, url, rate_limiter=rate_limiter, retry_policy=policy))
+    assert response.status == 200
+
+def test_navigate_times_out_slow_goto():
+    policy = RetryPolicy(attempts=1, timeouts={"navigate": 0.05})
+    page = FakePage([200], delay=1)
+    with pytest.raises(StepError) as excinfo:
+        asyncio.run(navigate(page, "https://www.zhihu.com/question/1", rate_limiter=RateLimiter(), retry_policy=policy))
+    assert excinfo.value.kind == TIMEOUT
+
+def test_navigate_retries_blocked_response():
+    rate_limiter = RateLimiter(rate=100.0, cooldown=0.01)
+    policy = RetryPolicy(attempts=2, base_delay=0)
+    page = FakePage([429, 200])
+    response = asyncio.run(navigate(page, "https://www.zhihu.com/question/1", rate_limiter=rate_limiter, retry_policy=policy))
+    assert response.status == 200
+    assert page.calls == 2
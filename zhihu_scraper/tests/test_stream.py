@@ -0,0 +1,135 @@
+"""
+流式爬取的分发、接口分页和页面增量提取测试
+"""
+
+import asyncio
+import json
+import threading
+from contextlib import asynccontextmanager
+
+from zhihu_scraper import stream
+from zhihu_scraper.batch import _scrape_one
+from zhihu_scraper.crawler import scrape_question
+from zhihu_scraper.extract import EXTRACT_NEW_ANSWERS_JS
+from zhihu_scraper.ratelimit import RateLimiter
+from zhihu_scraper.stream import AnswerStreamWriter, iter_answers, stream_question
+
+PAGES = [
+    ([{"id": "1", "content": "<p>1</p>"}, {"id": "2", "content": "<p>2</p>"}],
+     {"is_end": False, "next": "https://www.zhihu.com/api/v4/questions/123456/feeds?cursor=page2"}),
+    ([{"id": "2", "content": "<p>2</p>"}, {"id": "3", "content": "<p>3</p>"}], {"is_end": True}),
+]
+
+class StubFetcher:
+    """按分页游标依次返回回答的接口客户端"""
+
+    cache = None
+
+    async def fetch_question_info(self, question_id):
+        return {"title": "标题", "description": ""}
+
+    async def fetch_question(self, question_id, max_answers=None):
+        # 非流式的完整爬取：不写入answers.jsonl
+        return {"title": "标题", "description": "", "answers": [], "meta": {}}
+
+    async def iter_answer_pages(self, question_id, cursor=None, order="default"):
+        for page in PAGES:
+            yield page
+
+class FakePage:
+    """按顺序返回EXTRACT_NEW_ANSWERS_JS结果的页面，其他脚本表示页面不再增长"""
+
+    def __init__(self, extractions):
+        self.extractions = list(extractions)
+
+    async def goto(self, url, **kwargs):
+        return None
+
+    async def wait_for_selector(self, selector, timeout=None):
+        return None
+
+    async def evaluate(self, script, arg=None):
+        if script == EXTRACT_NEW_ANSWERS_JS:
+            data = self.extractions.pop(0) if self.extractions else {"answers": []}
+            return {"title": "标题", "description": "", "removed": 0, "expanding": 0, **data}
+        if "scrollBy" in script:
+            return None
+        if arg is not None and "timeout" in arg:
+            return False
+        return {"count": 0, "height": 0}
+
+class FakePool:
+    def __init__(self, page):
+        self._page = page
+
+    @asynccontextmanager
+    async def page(self):
+        yield self._page
+
+class StubScraper:
+    """不启动浏览器的爬虫"""
+
+    from_cache = incremental = resume = comments = False
+    markdown_converter = media_downloader = sink = retry_policy = None
+    scroll_timeout = 60
+    iter_answers = iter_answers
+    stream_question = stream_question
+
+    def __init__(self, engine="http", stream=False, deep=False, page=None):
+        self.engine = engine
+        self.stream = stream
+        self.deep = deep
+        self.page = page
+        self.rate_limiter = RateLimiter(rate=100.0)
+
+    def get_http_fetcher(self):
+        return StubFetcher()
+
+    def get_page_cache(self):
+        return None
+
+    async def get_browser_pool(self):
+        return FakePool(self.page)
+
+def _streamed_ids(output_dir):
+    with open(output_dir / "123456" / "answers.jsonl", encoding="utf-8") as f:
+        return [json.loads(line)["id"] for line in f]
+
+def test_http_engine_stream_follows_pages_through_writer(tmp_path):
+    result = asyncio.run(scrape_question(StubScraper(stream=True), "123456", str(tmp_path)))
+    assert result["answer_count"] == 3
+    assert _streamed_ids(tmp_path) == ["1", "2", "3"]
+
+def test_http_engine_deep_batch_streams_answers(tmp_path):
+    asyncio.run(_scrape_one(StubScraper(deep=True), "123456", str(tmp_path)))
+    assert _streamed_ids(tmp_path) == ["1", "2", "3"]
+
+def test_stream_writes_run_off_the_event_loop(tmp_path, monkeypatch):
+    threads = set()
+    write_record = AnswerStreamWriter.write_record
+
+    def recording_write_record(self, answer):
+        threads.add(threading.get_ident())
+        write_record(self, answer)
+
+    monkeypatch.setattr(AnswerStreamWriter, "write_record", recording_write_record)
+    asyncio.run(scrape_question(StubScraper(stream=True), "123456", str(tmp_path)))
+    assert threads and threading.get_ident() not in threads
+    assert _streamed_ids(tmp_path) == ["1", "2", "3"]
+
+def test_page_answers_expanded_on_last_pass_are_extracted(monkeypatch):
+    monkeypatch.setattr(stream, "EXPAND_SETTLE_MS", 0)
+    # 第二次提取时页面已不再增长，但刚展开了一个被折叠的回答，全文在下一次提取时读取
+    page = FakePage([
+        {"answers": [{"id": "1", "content": "<p>1</p>"}]},
+        {"answers": [], "expanding": 1},
+        {"answers": [{"id": "2", "content": "<p>全文</p>"}]},
+    ])
+    scraper = StubScraper(engine="browser", page=page)
+
+    async def collect():
+        return [answer async for answer in iter_answers(scraper, "123456")]
+
+    answers = asyncio.run(collect())
+    assert [answer["id"] for answer in answers] == ["1", "2"]
+    assert answers[1]["content"] == "<p>全文</p>"
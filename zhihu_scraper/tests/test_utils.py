@@ -0,0 +1,57 @@
+"""
+原子写入和文件链接测试
+"""
+
+import os
+
+import pytest
+
+from zhihu_scraper import utils
+from zhihu_scraper.utils import link_file, write_atomic
+
+def test_write_atomic_text_and_bytes(tmp_path):
+    path = str(tmp_path / "result.json")
+    write_atomic(path, "第一次")
+    write_atomic(path, "第二次")
+    with open(path, encoding="utf-8") as f:
+        assert f.read() == "第二次"
+
+    write_atomic(path, b"\x00\x01")
+    with open(path, "rb") as f:
+        assert f.read() == b"\x00\x01"
+    assert os.listdir(tmp_path) == ["result.json"]
+
+def test_write_atomic_failure_keeps_old_file(tmp_path):
+    path = str(tmp_path / "result.json")
+    write_atomic(path, "完整内容")
+    with pytest.raises(TypeError):
+        write_atomic(path, 123)
+    with open(path, encoding="utf-8") as f:
+        assert f.read() == "完整内容"
+    # 临时文件已删除
+    assert os.listdir(tmp_path) == ["result.json"]
+
+def test_link_file_hard_links_and_replaces(tmp_path):
+    source = str(tmp_path / "question.md")
+    target = str(tmp_path / "123456" / "question.md")
+    os.makedirs(os.path.dirname(target))
+    write_atomic(target, "旧内容")
+    write_atomic(source, "新内容")
+
+    link_file(source, target)
+    assert os.path.samefile(source, target)
+    assert os.listdir(os.path.dirname(target)) == ["question.md"]
+
+def test_link_file_copies_without_hard_links(tmp_path, monkeypatch):
+    def no_link(source, target):
+        raise OSError("不支持硬链接")
+
+    monkeypatch.setattr(utils.os, "link", no_link)
+    source = str(tmp_path / "question.md")
+    target = str(tmp_path / "copy.md")
+    write_atomic(source, "内容")
+
+    link_file(source, target)
+    assert not os.path.samefile(source, target)
+    with open(target, encoding="utf-8") as f:
+        assert f.read() == "内容"
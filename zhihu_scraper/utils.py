@@ -9,6 +9,8 @@ import platform
 import uuid
 import json
 import time
+import shutil
+import threading
 from datetime import datetime
 
 def parse_question_id(url_or_id):
@@ -32,6 +34,26 @@ def parse_question_id(url_or_id):
     # 无法识别的格式
     raise ValueError(f"无法从 '{url_or_id}' 中提取问题ID")
 
+def parse_cookie_string(cookie_string):
+    """将Cookie字符串解析为字典
+    
+    Args:
+        cookie_string: 形如"z_c0=xxx; _xsrf=xxx"的Cookie字符串
+        
+    Returns:
+        dict: Cookie名称到值的映射，空字符串或None返回空字典
+    """
+    cookies = {}
+    if not cookie_string:
+        return cookies
+    
+    for part in cookie_string.split(';'):
+        if '=' in part:
+            name, value = part.strip().split('=', 1)
+            if name and value:
+                cookies[name] = value
+    return cookies
+
 def format_file_size(size_bytes):
     """格式化文件大小为人类可读格式
     
@@ -112,15 +134,104 @@ def kill_browser_processes():
     except Exception as e:
         print(f"关闭浏览器进程失败: {e}")
 
+def has_display():
+    """当前环境是否可以显示浏览器窗口
+    
+    Linux下根据DISPLAY和WAYLAND_DISPLAY环境变量判断，macOS和Windows始终视为有显示器。
+    
+    Returns:
+        bool: 可以显示窗口时返回True
+    """
+    if platform.system() != "Linux":
+        return True
+    return bool(os.environ.get("DISPLAY") or os.environ.get("WAYLAND_DISPLAY"))
+
+def resolve_headless(headless=None):
+    """确定是否使用无头模式
+    
+    Args:
+        headless: True/False为显式指定，None表示没有显示器时自动使用无头模式
+    
+    Returns:
+        bool: 是否使用无头模式
+    """
+    if headless is None:
+        return not has_display()
+    return bool(headless)
+
+def headless_launch_options(headless, args=None):
+    """生成Playwright启动浏览器时与无头模式相关的参数
+    
+    无头模式使用Chromium的新版无头模式（--headless=new），与有界面浏览器是同一套实现，
+    页面指纹与有界面时一致，同时不需要显示服务器和合成器。
+    
+    Args:
+        headless: 是否使用无头模式
+        args: 其他浏览器启动参数
+    
+    Returns:
+        dict: 可直接传给launch/launch_persistent_context的headless和args参数
+    """
+    args = list(args or [])
+    if headless:
+        # 由参数启用新版无头模式，Playwright的headless=True会使用旧版headless shell
+        args.append("--headless=new")
+    return {"headless": False, "args": args}
+
+def _temp_path(file_path):
+    """与目标文件同目录的临时文件路径，保证os.replace是原子操作"""
+    return f"{file_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+
+def write_atomic(file_path, content):
+    """先写入同目录的临时文件再替换目标文件，中断或并发读取时不会看到写了一半的文件
+    
+    Args:
+        file_path: 文件路径
+        content: 文件内容（str按UTF-8写入，bytes原样写入）
+    """
+    tmp_path = _temp_path(file_path)
+    try:
+        if isinstance(content, bytes):
+            with open(tmp_path, 'wb') as f:
+                f.write(content)
+        else:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(content)
+        os.replace(tmp_path, file_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+def link_file(source, target):
+    """让target与source内容相同：优先创建硬链接，文件系统不支持时复制
+    
+    同样先在临时路径创建再替换，已存在的target会被原子地覆盖。
+    
+    Args:
+        source: 已写入的文件
+        target: 需要相同内容的文件路径
+    """
+    tmp_path = _temp_path(target)
+    try:
+        try:
+            os.link(source, tmp_path)
+        except OSError:
+            shutil.copyfile(source, tmp_path)
+        os.replace(tmp_path, target)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
 def save_json(data, file_path):
-    """保存数据为JSON文件
+    """保存数据为JSON文件（原子写入）
     
     Args:
         data: 要保存的数据
         file_path: 文件路径
     """
-    with open(file_path, 'w', encoding='utf-8') as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+    write_atomic(file_path, json.dumps(data, ensure_ascii=False, indent=2))
 
 def load_json(file_path):
     """从JSON文件加载数据
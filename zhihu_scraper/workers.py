@@ -0,0 +1,169 @@
+"""
+多进程爬取模块 - 将问题分片到多个进程，每个进程运行独立的浏览器和事件循环
+"""
+
+import asyncio
+import os
+import queue
+import shutil
+import tempfile
+import multiprocessing
+from zhihu_scraper.utils import parse_question_id
+
+# 复制浏览器配置目录时跳过Chromium的单实例锁文件，否则副本无法启动
+PROFILE_IGNORE_PATTERNS = ("Singleton*", "lockfile", "*.lock")
+
+def shard(question_ids, workers):
+    """按轮询方式把问题分配到各个进程
+
+    Args:
+        question_ids: 问题ID列表
+        workers: 进程数
+
+    Returns:
+        list: 每个进程的问题ID列表（不包含空分片）
+    """
+    workers = max(1, min(workers, len(question_ids)))
+    shards = [question_ids[i::workers] for i in range(workers)]
+    return [ids for ids in shards if ids]
+
+def _copy_profile(user_data_dir, index):
+    """为工作进程复制一份浏览器配置目录
+
+    持久化目录同一时间只能被一个浏览器占用，每个进程使用独立的副本，
+    副本保留了登录状态（Cookie和本地存储）。
+
+    Args:
+        user_data_dir: 原始浏览器配置目录
+        index: 工作进程序号
+
+    Returns:
+        str: 副本目录路径
+    """
+    target = tempfile.mkdtemp(prefix=f"zhihu-browser-profile-{index}-")
+    if user_data_dir and os.path.isdir(user_data_dir):
+        shutil.copytree(
+            user_data_dir, target,
+            ignore=shutil.ignore_patterns(*PROFILE_IGNORE_PATTERNS),
+            dirs_exist_ok=True
+        )
+    return target
+
+def _run_shard(index, question_ids, output_dir, scraper_options, concurrency, progress_queue):
+    """工作进程入口：爬取一个分片的问题
+
+    Args:
+        index: 工作进程序号
+        question_ids: 本进程负责的问题ID列表
+        output_dir: 输出目录
+        scraper_options: ZhihuBrowserScraper的关键字参数
+        concurrency: 进程内同时爬取的问题数量
+        progress_queue: 用于向主进程汇报每个问题结果的队列
+
+    Returns:
+        dict: 问题ID到爬取结果的映射
+    """
+    # 在子进程中导入，避免主进程加载浏览器相关依赖后再序列化
+    from zhihu_scraper.scraper import ZhihuBrowserScraper
+
+    options = dict(scraper_options or {})
+    source_dir = os.path.expanduser(options.get("user_data_dir") or "~/zhihu-browser-profile")
+    profile_dir = _copy_profile(source_dir, index)
+    options["user_data_dir"] = profile_dir
+    options["kill_existing_browsers"] = False
+
+    def report(question_id, result):
+        progress_queue.put((index, question_id, result))
+
+    async def run():
+        scraper = ZhihuBrowserScraper(**options)
+        async with scraper:
+            return await scraper.scrape_questions(
+                question_ids, output_dir, concurrency=concurrency, on_result=report
+            )
+
+    try:
+        return asyncio.run(run())
+    finally:
+        shutil.rmtree(profile_dir, ignore_errors=True)
+
+def scrape_sharded(question_ids, workers, output_dir='output', concurrency=3, scraper_options=None):
+    """使用多个进程批量爬取问题
+
+    问题按轮询方式分片，每个分片运行在独立的进程中，启动自己的浏览器和事件循环，
+    进程内仍按concurrency并发爬取。主进程汇总各进程上报的进度，某个进程崩溃
+    （浏览器内存不足、段错误等）时只有其分片中未上报的问题记为失败，其他进程继续运行。
+
+    Args:
+        question_ids: 知乎问题ID或URL列表
+        workers: 进程数
+        output_dir: 输出目录
+        concurrency: 每个进程内同时爬取的问题数量，默认3
+        scraper_options: 传给每个进程中ZhihuBrowserScraper的关键字参数
+
+    Returns:
+        dict: 问题ID到爬取结果的映射，格式与scrape_questions()相同，按输入顺序排列
+    """
+    # 解析并去重问题ID，保持原有顺序
+    ids = list(dict.fromkeys(parse_question_id(str(item).strip()) for item in question_ids))
+    shards = shard(ids, workers) if ids else []
+    if not shards:
+        return {}
+
+    os.makedirs(output_dir, exist_ok=True)
+    total = len(ids)
+    print(f"开始多进程批量爬取 {total} 个问题，进程数: {len(shards)}，每进程并发数: {concurrency}")
+
+    # 使用spawn启动子进程，避免fork继承事件循环和浏览器连接
+    mp_context = multiprocessing.get_context("spawn")
+    progress_queue = mp_context.Queue()
+    processes = []
+    for index, shard_ids in enumerate(shards):
+        process = mp_context.Process(
+            target=_run_shard,
+            args=(index, shard_ids, output_dir, scraper_options, concurrency, progress_queue),
+            name=f"zhihu-shard-{index}"
+        )
+        process.start()
+        processes.append((process, shard_ids))
+
+    results = {}
+
+    def collect(timeout):
+        index, question_id, result = progress_queue.get(timeout=timeout)
+        results[question_id] = result
+        print(f"总进度: {len(results)}/{total} - 进程{index} 问题 {question_id}: {result['status']}")
+
+    try:
+        while any(process.is_alive() for process, _ in processes):
+            try:
+                collect(1)
+            except queue.Empty:
+                pass
+        # 进程退出前上报的进度可能还在队列中
+        while True:
+            try:
+                collect(0.1)
+            except queue.Empty:
+                break
+    finally:
+        for process, _ in processes:
+            if process.is_alive():
+                process.terminate()
+            process.join()
+
+    # 异常退出的进程中未上报的问题记为失败
+    for process, shard_ids in processes:
+        if process.exitcode == 0:
+            continue
+        error = f"爬取进程异常退出（退出码 {process.exitcode}）"
+        print(f"{process.name}: {error}")
+        for question_id in shard_ids:
+            results.setdefault(question_id, {
+                "status": "error",
+                "answers": 0,
+                "elapsed": 0,
+                "error": error
+            })
+
+    return {question_id: results[question_id] for question_id in ids if question_id in results}